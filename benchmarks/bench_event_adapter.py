@@ -0,0 +1,53 @@
+"""Compare the compiled event adapters against the previous EventAdapter.adapt.
+
+Usage: python -m benchmarks.bench_event_adapter [events]
+"""
+
+import json
+import sys
+import timeit
+
+from benchmarks.bench_json_decoding import create_bind_payload
+from chatovod.api.event_adapter import API_EVENT_TYPE_ATTRIBUTE
+from chatovod.api.events import APIAdapter, APIEvents
+
+
+def legacy_adapt(data):
+    """EventAdapter.adapt before the adapters were compiled."""
+    event_type = data.get(API_EVENT_TYPE_ATTRIBUTE)
+    event = APIEvents.get_event_by_type(event_type)
+
+    transforms = event.transforms
+    transformed_data = {transforms.get(k, k): v for k, v in data.items()}
+
+    try:
+        transformed_data[API_EVENT_TYPE_ATTRIBUTE] = event.new_type
+    finally:
+        return transformed_data
+
+
+def main(size=5000, number=50):
+    events = json.loads(create_bind_payload(size))
+
+    def run_legacy():
+        for data in events:
+            legacy_adapt(data)
+
+    def run_compiled():
+        adapt = APIAdapter.adapt
+        for data in events:
+            adapt(data)
+
+    legacy = min(timeit.repeat(run_legacy, number=number, repeat=5))
+    compiled = min(timeit.repeat(run_compiled, number=number, repeat=5))
+
+    print("{} events".format(size))
+
+    for name, elapsed in (("legacy", legacy), ("compiled", compiled)):
+        print("{:<12}{:>12,.0f} events/s".format(name, size * number / elapsed))
+
+    print("{:.2f}x".format(legacy / compiled))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
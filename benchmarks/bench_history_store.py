@@ -0,0 +1,59 @@
+"""Compare the memory used by a list of messages against a HistoryStore.
+
+Usage: python -m benchmarks.bench_history_store [messages]
+"""
+
+import sys
+import tracemalloc
+
+from chatovod.core.history import HistoryStore
+from chatovod.structures.message import Message
+
+
+class Room:
+    def __init__(self, room_id):
+        self.id = room_id
+
+
+def create_messages(size):
+    rooms = [Room(room_id) for room_id in range(3)]
+
+    for index in range(size):
+        data = {
+            "timestamp": 1590000000000 + index,
+            "author": "User{}".format(index % 40),
+            "content": "Привет всем, сообщение номер {} :)".format(index),
+        }
+        yield Message(chat=None, room=rooms[index % 3], data=data)
+
+
+def measure(build):
+    tracemalloc.start()
+    container = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return container, size
+
+
+def main(size=100000):
+    _, objects_size = measure(lambda: list(create_messages(size)))
+
+    def build_store():
+        store = HistoryStore()
+        store.extend(create_messages(size))
+        return store
+
+    _, store_size = measure(build_store)
+
+    print("{} messages".format(size))
+    print("{:<16}{:>10.1f} MiB".format("Message list", objects_size / 2**20))
+    print(
+        "{:<16}{:>10.1f} MiB  {:.1f}x".format(
+            "HistoryStore", store_size / 2**20, objects_size / store_size
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
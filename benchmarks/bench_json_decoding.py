@@ -0,0 +1,60 @@
+"""Compare decoding a chat_bind body through str against decoding its bytes.
+
+The payload mimics a backlog batch received after a reconnect:
+messages with cyrillic content mixed with user and room events.
+
+Usage: python -m benchmarks.bench_json_decoding [events]
+"""
+
+import json
+import sys
+import timeit
+
+from chatovod.utils.decoders import JSON_DECODERS
+
+
+def create_bind_payload(size):
+    events = []
+
+    for index in range(size):
+        timestamp = 1590000000000 + index
+
+        if index % 10 == 0:
+            events.append({"t": "ue", "nick": "User{}".format(index), "sx": 1})
+        elif index % 25 == 0:
+            events.append({"t": "ru", "r": 1, "closeable": False})
+        else:
+            events.append(
+                {
+                    "t": "m",
+                    "ts": timestamp,
+                    "f": "User{}".format(index % 40),
+                    "m": "Привет всем, сообщение номер {} :)".format(index),
+                    "r": index % 3,
+                    "to": [],
+                }
+            )
+
+    return json.dumps(events, ensure_ascii=False).encode("utf-8")
+
+
+def main(size=5000, number=50):
+    body = create_bind_payload(size)
+
+    print("{} events, {} KiB".format(size, len(body) // 1024))
+
+    # How HTTPClient.request used to decode the body
+    baseline = timeit.timeit(lambda: json.loads(body.decode("utf-8")), number=number)
+    print("{:<16}{:>10.2f} ms".format("str + json", baseline / number * 1000))
+
+    for name, decode in sorted(JSON_DECODERS.items()):
+        elapsed = timeit.timeit(lambda: decode(body), number=number)
+        print(
+            "{:<16}{:>10.2f} ms  {:.2f}x".format(
+                "bytes + " + name, elapsed / number * 1000, baseline / elapsed
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -1,5 +1,13 @@
+import keyword
+from abc import ABCMeta, abstractmethod
+from collections.abc import Mapping
+from typing import Callable, Dict, FrozenSet, Type
+
 API_EVENT_TYPE_ATTRIBUTE = "t"
 
+# Default of the keys missing from the data, which may also hold None
+_UNSET = object()
+
 
 class EventNotRegisteredError(Exception):
     """
@@ -13,23 +21,357 @@ class BaseEvent:
     transforms: dict
 
 
+def compile_adapter(event_structure) -> Callable[[dict], dict]:
+    """Build a function adapting the data of a single event type.
+
+    The renames are unrolled into the function's code,
+    so adapting an event doesn't look up every key of its data.
+    """
+    transforms = {
+        key: new_key
+        for key, new_key in getattr(event_structure, "transforms", {}).items()
+        if key != new_key
+    }
+    new_type = getattr(event_structure, "new_type", None)
+
+    keys = set(transforms)
+    new_keys = set(transforms.values())
+
+    if keys & new_keys or API_EVENT_TYPE_ATTRIBUTE in keys | new_keys:
+        # Renames depending on each other have to be done all at once
+        get_key = transforms.get
+
+        def adapt(data):
+            adapted_data = {get_key(k, k): v for k, v in data.items()}
+
+            if new_type is not None:
+                adapted_data[API_EVENT_TYPE_ATTRIBUTE] = new_type
+
+            return adapted_data
+
+    else:
+        lines = ["def adapt(data):", "    adapted_data = data.copy()"]
+
+        for key, new_key in transforms.items():
+            lines.append("    if {0!r} in adapted_data:".format(key))
+            lines.append(
+                "        adapted_data[{0!r}] = adapted_data.pop({1!r})".format(
+                    new_key, key
+                )
+            )
+
+        if new_type is not None:
+            lines.append(
+                "    adapted_data[{0!r}] = {1!r}".format(
+                    API_EVENT_TYPE_ATTRIBUTE, new_type
+                )
+            )
+
+        lines.append("    return adapted_data")
+
+        namespace: Dict[str, Callable[[dict], dict]] = {}
+        exec("\n".join(lines), namespace)
+        adapt = namespace["adapt"]
+
+    adapt.__qualname__ = "{0}.adapt".format(event_structure.__name__)
+
+    return adapt
+
+
+class EventViewSpec:
+    """The key translations of an event type, used by its views.
+
+    Calling it with the raw data of an event returns an `EventView`.
+    """
+
+    __slots__ = ("transforms", "keys", "renamed_keys", "new_type", "adapt")
+
+    def __init__(self, event_structure, adapt):
+        transforms = getattr(event_structure, "transforms", {})
+
+        self.transforms = transforms
+        # Adapted key -> raw key
+        self.keys = {new_key: key for key, new_key in transforms.items()}
+        # Raw keys that are only reachable by their adapted name
+        self.renamed_keys = frozenset(
+            key for key, new_key in transforms.items() if key != new_key
+        ) - set(self.keys)
+        self.new_type = getattr(event_structure, "new_type", None)
+        self.adapt = adapt
+
+    def __call__(self, data):
+        return EventView(data, self)
+
+
+class EventView(Mapping):
+    """A read-only view of the raw data of an event.
+
+    Keys are translated when they are accessed, so the data is neither
+    copied nor renamed unless `to_dict` is called.
+    """
+
+    __slots__ = ("_data", "_spec")
+
+    def __init__(self, data, spec):
+        self._data = data
+        self._spec = spec
+
+    def __getitem__(self, key):
+        spec = self._spec
+
+        if key == API_EVENT_TYPE_ATTRIBUTE and spec.new_type is not None:
+            return spec.new_type
+
+        raw_key = spec.keys.get(key)
+
+        if raw_key is not None:
+            return self._data[raw_key]
+        elif key in spec.renamed_keys:
+            raise KeyError(key)
+
+        return self._data[key]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+
+        return True
+
+    def __iter__(self):
+        get_key = self._spec.transforms.get
+
+        for key in self._data:
+            yield get_key(key, key)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return "<EventView {0!r}>".format(self.to_dict())
+
+    @property
+    def raw(self):
+        """The data of the event as received from the API."""
+        return self._data
+
+    def to_dict(self):
+        """Return the adapted data of the event as a new dict."""
+        return self._spec.adapt(self._data)
+
+
+class Event(metaclass=ABCMeta):
+    """Base of the typed events generated by `compile_event_class`.
+
+    Every adapted key of the event is an attribute, stored in ``__slots__``.
+    Keys without a transform are kept aside and are still reachable
+    as attributes or items, so events can be read like adapted dicts.
+    """
+
+    __slots__ = ("_extra",)
+
+    event_type: str
+    new_type: str
+    transforms: dict
+    # Adapted type of the event
+    _type: str
+    # Adapted key -> attribute
+    _fields: Dict[str, str]
+    # Attributes of the fields, set only when the data has their key
+    _attributes: FrozenSet[str]
+
+    @abstractmethod
+    def __init__(self, data: dict):
+        """Built by `compile_event_class` for each event structure."""
+
+    def __getattr__(self, name):
+        # Only called for unset fields and for attributes that are not fields
+        if name in self._attributes:
+            return None
+
+        extra = self._extra
+
+        if extra is not None and name in extra:
+            return extra[name]
+
+        raise AttributeError(
+            "{0!r} object has no attribute {1!r}".format(type(self).__name__, name)
+        )
+
+    def __getitem__(self, key):
+        if key == API_EVENT_TYPE_ATTRIBUTE:
+            return self._type
+        elif key in self._fields:
+            try:
+                # Unlike getattr, doesn't fall back to None for unset fields
+                return object.__getattribute__(self, self._fields[key])
+            except AttributeError:
+                raise KeyError(key)
+
+        extra = self._extra
+
+        if extra is not None and key in extra:
+            return extra[key]
+
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+
+        return True
+
+    def __eq__(self, other):
+        if isinstance(other, Event):
+            return self.to_dict() == other.to_dict()
+        elif isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+
+        return NotImplemented
+
+    def __repr__(self):
+        return "<{0} {1!r}>".format(type(self).__name__, self.to_dict())
+
+    def to_dict(self):
+        """Return the event as an adapted dict."""
+        adapted_data = {API_EVENT_TYPE_ATTRIBUTE: self._type}
+
+        for key, attribute in self._fields.items():
+            try:
+                adapted_data[key] = object.__getattribute__(self, attribute)
+            except AttributeError:
+                pass
+
+        if self._extra is not None:
+            adapted_data.update(self._extra)
+
+        return adapted_data
+
+
+def compile_event_class(event_structure) -> type:
+    """Generate a typed `Event` subclass for an event structure.
+
+    The generated class keeps the name and the attributes of the structure,
+    and has one slot per adapted key which is a valid attribute name.
+    Its ``__init__`` takes the raw data of the event. Fields missing from the
+    data are left unset: they read as `None` as attributes, but are not items.
+    """
+    transforms = getattr(event_structure, "transforms", {})
+    reserved = set(dir(Event)) | {"event_type", "new_type", "transforms"}
+
+    # Adapted key -> attribute name
+    fields = {}
+    # Raw key -> adapted key, for the keys stored as attributes
+    field_keys = {}
+
+    for key, new_key in transforms.items():
+        is_attribute = (
+            new_key.isidentifier()
+            and not keyword.iskeyword(new_key)
+            and new_key not in reserved
+            and key != API_EVENT_TYPE_ATTRIBUTE
+        )
+
+        if is_attribute:
+            fields[new_key] = new_key
+            field_keys[key] = new_key
+
+    extra_keys = {key: new_key for key, new_key in transforms.items()}
+    known_keys = frozenset(field_keys) | {API_EVENT_TYPE_ATTRIBUTE}
+
+    lines = ["def __init__(self, data):", "    get = data.get"]
+
+    for key, attribute in field_keys.items():
+        lines.append("    value = get({0!r}, unset)".format(key))
+        lines.append("    if value is not unset:")
+        lines.append("        self.{0} = value".format(attribute))
+
+    lines.append(
+        "    self._extra = {"
+        "get_key(k, k): v for k, v in data.items() if k not in known_keys"
+        "} or None"
+    )
+
+    namespace = {
+        "known_keys": known_keys,
+        "get_key": extra_keys.get,
+        "unset": _UNSET,
+    }
+    exec("\n".join(lines), namespace)
+
+    class_namespace = {
+        key: value
+        for key, value in vars(event_structure).items()
+        if key not in ("__dict__", "__weakref__")
+    }
+    class_namespace.update(
+        {
+            "__slots__": tuple(fields.values()),
+            "__qualname__": event_structure.__qualname__,
+            "__init__": namespace["__init__"],
+            "_type": getattr(event_structure, "new_type", event_structure.event_type),
+            "_fields": fields,
+            "_attributes": frozenset(fields.values()),
+        }
+    )
+
+    return ABCMeta(event_structure.__name__, (Event,), class_namespace)
+
+
 class EventsCollection:
     def __init__(self):
         self.events_map = {}
+        self.adapters = {}
+        self.views = {}
 
     def register(self, event_structure):
-        self.events_map[event_structure.event_type] = event_structure
+        """Register an event structure, returning its typed `Event` class.
+
+        The returned class replaces the structure in the collection
+        and keeps all of its attributes.
+        """
+        event_class = compile_event_class(event_structure)
+        event_type = event_class.event_type
+        adapter = compile_adapter(event_class)
+
+        self.events_map[event_type] = event_class
+        self.adapters[event_type] = adapter
+        self.views[event_type] = EventViewSpec(event_class, adapter)
 
-        return event_structure
+        return event_class
 
-    def get_event_by_type(self, event_type) -> BaseEvent:
+    def _get_registered(self, registry, event_type):
         try:
-            return self.events_map[event_type]
+            return registry[event_type]
         except KeyError:
             raise EventNotRegisteredError(
                 "The event {} is not registered is this collection".format(event_type)
             )
 
+    def get_event_by_type(self, event_type) -> Type[Event]:
+        return self._get_registered(self.events_map, event_type)
+
+    def get_adapter(self, event_type) -> Callable[[dict], dict]:
+        return self._get_registered(self.adapters, event_type)
+
+    def get_view_spec(self, event_type) -> EventViewSpec:
+        return self._get_registered(self.views, event_type)
+
 
 class EventAdapter:
     def __init__(self, events_collection: EventsCollection):
@@ -40,12 +382,20 @@ class EventAdapter:
 
     def adapt(self, data: dict):
         event_type = data.get(API_EVENT_TYPE_ATTRIBUTE)
-        event = self.events_collection.get_event_by_type(event_type)
+        adapter = self.events_collection.get_adapter(event_type)
 
-        transformed_data = self.transform(data, event.transforms)
+        return adapter(data)
 
-        # Patch the type of the event
-        try:
-            transformed_data[API_EVENT_TYPE_ATTRIBUTE] = event.new_type
-        finally:
-            return transformed_data
+    def view(self, data: dict) -> EventView:
+        """Like `adapt`, but translates the keys lazily instead of copying."""
+        event_type = data.get(API_EVENT_TYPE_ATTRIBUTE)
+        view_spec = self.events_collection.get_view_spec(event_type)
+
+        return view_spec(data)
+
+    def build(self, data: dict) -> Event:
+        """Like `adapt`, but returns an instance of the typed event class."""
+        event_type = data.get(API_EVENT_TYPE_ATTRIBUTE)
+        event_class = self.events_collection.get_event_by_type(event_type)
+
+        return event_class(data)
@@ -1,9 +1,10 @@
-from typing import Dict
-
-from .event_adapter import EventsCollection
+from .event_adapter import EventAdapter, EventsCollection
 
 APIEvents = EventsCollection()
 
+# Keys of the users in the events, see chatovod.structures.user.User
+USER_KEYS = ("nick", "id", "sx", "g", "s", "c", "tc", "vip", "b", "tb")
+
 
 @APIEvents.register
 class SetOptionEvent:
@@ -56,7 +57,13 @@ class MessageEvent:
         "f": "author",
         "m": "content",
         "r": "room_id",
+        # Kept as they are, so typed events store them in slots
         "actions": "actions",
+        "to": "to",
+        "nh": "nh",
+        "u": "u",
+        "s": "s",
+        "pp": "pp",
     }
 
 
@@ -78,7 +85,11 @@ class MessageReadEvent:
 class RoomUpdateEvent:
     event_type = "ru"
     new_type = "room_update"
-    transforms = {"closeable": "can_be_closed", "showEnterLeave": "display_user_flow"}
+    transforms = {
+        "r": "r",
+        "closeable": "can_be_closed",
+        "showEnterLeave": "display_user_flow",
+    }
 
 
 @APIEvents.register
@@ -120,18 +131,21 @@ class UserLeaveEvent:
 class UserEnterEvent:
     event_type = "ue"
     new_type = "user_enter"
-    transforms: Dict[str, str] = {}
+    transforms = {key: key for key in USER_KEYS}
 
 
 @APIEvents.register
 class UserEnterRoomEvent:
     event_type = "uer"
     new_type = "user_enter_room"
-    transforms: Dict[str, str] = {}
+    transforms = {"nick": "nick", "r": "r"}
 
 
 @APIEvents.register
 class UserLeaveRoomEvent:
     event_type = "ulr"
     new_type = "user_leave_room"
-    transforms: Dict[str, str] = {}
+    transforms = {"nick": "nick", "r": "r"}
+
+
+APIAdapter = EventAdapter(APIEvents)
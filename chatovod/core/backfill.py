@@ -0,0 +1,158 @@
+import asyncio
+import logging
+
+from chatovod.api.events import APIAdapter
+
+log = logging.getLogger(__name__)
+
+_ROOM_DONE = object()
+
+
+class HistoryLoader:
+    """Load the message history of rooms, from the latest message backwards.
+
+    The latest page is always requested, then older pages until the server
+    reports that the room has no older events, or until the stop condition
+    of `load` is met. Loaded messages are cached by the chat as they arrive.
+    """
+
+    def __init__(self, chat, concurrency=3, page_size=50):
+        self.chat = chat
+        # Pages requested at the same time, across all rooms
+        self.concurrency = concurrency
+        self.page_size = page_size
+        # Created by the first request, so it belongs to the running loop
+        self._semaphore = None
+
+    async def _fetch_page(self, room_id, before):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._semaphore:
+            page = await self.chat._http.fetch_messages(
+                room_id, before=before, limit=self.page_size
+            )
+
+        messages = []
+        has_older_events = False
+
+        for data in page:
+            adapted_data = APIAdapter.adapt(data)
+            event = adapted_data.get("t")
+
+            if event == "message":
+                adapted_data.setdefault("room_id", room_id)
+                messages.append(self.chat._create_message(adapted_data))
+            elif event == "has_older_events":
+                has_older_events = adapted_data.get("value", False)
+
+        self.chat._has_older_events[room_id] = has_older_events
+        messages.sort(key=lambda message: message.id, reverse=True)
+
+        return messages, has_older_events
+
+    async def load(self, room_id, limit=None, since=None):
+        """Yield the messages of ``room_id``, latest first.
+
+        Stops after ``limit`` messages, or at the first message sent before
+        the ``since`` timestamp, when given.
+        """
+        before = None
+        # The messages sent at ``before`` already yielded, by timestamp and author
+        boundary = set()
+        count = 0
+        has_older_events = True
+
+        while has_older_events:
+            messages, has_older_events = await self._fetch_page(room_id, before)
+            # Whether the page includes the messages sent at ``before`` or not
+            messages = [
+                message
+                for message in messages
+                if before is None
+                or message.id < before
+                or message.id == before
+                and (message.id, message.author) not in boundary
+            ]
+
+            if not messages:
+                break
+
+            page = []
+
+            for message in messages:
+                if (since is not None and message.id < since) or (
+                    limit is not None and count >= limit
+                ):
+                    has_older_events = False
+                    break
+
+                page.append(message)
+                count += 1
+
+            # Older than the messages received so far, keeping the history ordered
+            self.chat._cache_history(page)
+
+            for message in page:
+                yield message
+
+            if limit is not None and count >= limit:
+                break
+
+            if messages[-1].id != before:
+                boundary = set()
+
+            before = messages[-1].id
+            boundary.update(
+                (message.id, message.author)
+                for message in messages
+                if message.id == before
+            )
+
+        log.debug("Loaded the history of room %s", room_id)
+
+    async def _load_into(self, queue, room_id, **kwargs):
+        try:
+            async for message in self.load(room_id, **kwargs):
+                await queue.put(message)
+        except asyncio.CancelledError:
+            # Nobody is waiting for the room anymore
+            raise
+        except Exception:
+            await queue.put(_ROOM_DONE)
+            raise
+
+        await queue.put(_ROOM_DONE)
+
+    async def load_rooms(self, room_ids, **kwargs):
+        """Yield the messages of several rooms as they arrive.
+
+        Messages of each room are in order, the rooms are interleaved.
+        Keyword arguments are the stop conditions of `load`, for each room.
+        """
+        queue = asyncio.Queue(maxsize=self.page_size)
+        loop = self.chat.loop
+        tasks = [
+            loop.create_task(self._load_into(queue, room_id, **kwargs))
+            for room_id in room_ids
+        ]
+        remaining = len(tasks)
+
+        try:
+            while remaining:
+                message = await queue.get()
+
+                if message is _ROOM_DONE:
+                    remaining -= 1
+                else:
+                    yield message
+
+            # Raise the errors of the rooms which failed
+            for task in tasks:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            if tasks:
+                await asyncio.wait(tasks)
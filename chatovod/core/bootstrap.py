@@ -0,0 +1,96 @@
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class BootstrapStep:
+    """A request made when the chat starts."""
+
+    __slots__ = ("name", "run", "requires", "optional")
+
+    def __init__(self, name, run, requires=(), optional=False):
+        self.name = name
+        # Coroutine function called without arguments
+        self.run = run
+        # Names of the steps finishing before this one starts
+        self.requires = requires
+        # An optional step failing has a None result instead of stopping the start
+        self.optional = optional
+
+
+class BootstrapPlanner:
+    """Run the steps of a bootstrap as soon as the steps they require finish.
+
+    Steps which don't depend on each other run concurrently, so the bootstrap
+    takes about as long as its slowest chain of steps.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.steps = {}
+        # Seconds taken by each step, and by the whole bootstrap under "total"
+        self.timings = {}
+
+    def add(self, name, run, requires=(), optional=False):
+        for requirement in requires:
+            if requirement not in self.steps:
+                raise ValueError(
+                    "Step {0!r} requires the unknown step {1!r}".format(
+                        name, requirement
+                    )
+                )
+
+        self.steps[name] = BootstrapStep(name, run, requires, optional)
+
+    async def _run_step(self, step, tasks):
+        for requirement in step.requires:
+            await asyncio.shield(tasks[requirement])
+
+        started_at = self.loop.time()
+
+        try:
+            return await step.run()
+        except Exception as e:
+            if not step.optional:
+                raise
+
+            log.warning("Optional step %s failed: %s", step.name, type(e).__name__)
+        finally:
+            self.timings[step.name] = self.loop.time() - started_at
+
+    async def run(self):
+        """Run every step and return their results, by name."""
+        started_at = self.loop.time()
+        tasks = {}
+
+        # Steps are added after their requirements
+        for name, step in self.steps.items():
+            tasks[name] = self.loop.create_task(self._run_step(step, tasks))
+
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+
+            await asyncio.wait(list(tasks.values()))
+
+            # Steps failing with their requirements raise the same error
+            for task in tasks.values():
+                if not task.cancelled():
+                    task.exception()
+
+            raise
+        finally:
+            # Failed bootstraps are timed too
+            self.timings["total"] = self.loop.time() - started_at
+            log.debug(
+                "Bootstrap took %s",
+                ", ".join(
+                    "{}={:.3f}s".format(name, seconds)
+                    for name, seconds in self.timings.items()
+                ),
+            )
+
+        return dict(zip(tasks, results))
@@ -0,0 +1,118 @@
+import logging
+
+from chatovod.api.event_adapter import API_EVENT_TYPE_ATTRIBUTE
+
+from .buffer import EventQueue
+from .workers import ROOM_ATTRIBUTE
+
+log = logging.getLogger(__name__)
+
+
+class EventSubscription:
+    """Events received by the chat, as an asynchronous iterator.
+
+    Each subscription buffers its events in an `EventQueue` of its own,
+    so a slow consumer does not hold back the others. Publishing never waits:
+    once the buffer is full, the newest events are dropped and counted
+    in ``overflowed``. With the ``drop_oldest`` policy, the oldest droppable
+    events, e.g. ``message_read``, are dropped first.
+    """
+
+    def __init__(self, broadcaster, types=None, rooms=None, **kwargs):
+        self.broadcaster = broadcaster
+        # Raw types and rooms of the events received, None for all of them
+        self.types = types
+        self.rooms = rooms
+        self.queue = EventQueue(loop=broadcaster.loop, **kwargs)
+        self.overflowed = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            data = await self.queue.get()
+
+            if data is None:
+                raise StopAsyncIteration
+
+            dispatcher = self.broadcaster.dispatcher
+            event = dispatcher.adapt(data)
+
+            # Like handlers, subscriptions don't see the events the middleware drops
+            if event is not None and dispatcher.middleware.stages:
+                event = dispatcher.middleware.run(event)
+
+            if event is not None:
+                return event
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def accepts(self, data):
+        if self.types is not None:
+            if data.get(API_EVENT_TYPE_ATTRIBUTE) not in self.types:
+                return False
+
+        return self.rooms is None or data.get(ROOM_ATTRIBUTE) in self.rooms
+
+    def publish(self, data):
+        if not self.queue.put_nowait(data):
+            if not self.overflowed:
+                log.warning("Subscription buffer full, dropping events")
+
+            self.overflowed += 1
+
+    def close(self):
+        """Stop receiving events, iteration ends with the buffered ones."""
+        self.broadcaster.unsubscribe(self)
+        self.queue.close()
+
+
+class EventBroadcaster:
+    """Fan out the raw events received by the chat to every subscription.
+
+    Events are adapted by each subscription when it takes them, in the
+    event format of ``dispatcher``, and go through its middleware.
+    """
+
+    def __init__(self, loop, dispatcher):
+        self.loop = loop
+        self.dispatcher = dispatcher
+        self.subscriptions = []
+
+    def subscribe(self, types=None, rooms=None, **kwargs):
+        """Create an `EventSubscription`.
+
+        ``types`` are raw or adapted event types. Other keyword arguments
+        are passed to the `EventQueue` of the subscription.
+        """
+        if types is not None:
+            types = frozenset(self.dispatcher.get_event_type(event) for event in types)
+            self.dispatcher.add_subscriptions(*types)
+
+        if rooms is not None:
+            rooms = frozenset(rooms)
+
+        # A full buffer drops the newest events, see EventSubscription
+        kwargs.setdefault("maxsize", 1000)
+        subscription = EventSubscription(self, types, rooms, **kwargs)
+        self.subscriptions.append(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def publish(self, data):
+        for subscription in self.subscriptions:
+            if subscription.accepts(data):
+                subscription.publish(data)
+
+    def close(self):
+        for subscription in list(self.subscriptions):
+            subscription.close()
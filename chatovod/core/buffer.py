@@ -0,0 +1,248 @@
+from collections import Counter, deque
+
+from chatovod.api.event_adapter import API_EVENT_TYPE_ATTRIBUTE
+
+# Events which may be lost without leaving the chat state inconsistent
+DROPPABLE_EVENTS = frozenset(("pmr",))
+
+# State events where only the latest one matters -> raw key they are about
+COALESCED_EVENTS = {"ru": "r"}
+
+QUEUE_POLICIES = ("block", "drop_oldest", "coalesce")
+
+_DROPPED = object()
+
+
+class EventQueueStats:
+    """Counters of an `EventQueue`."""
+
+    __slots__ = ("high_water", "dropped", "coalesced", "blocked")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Largest number of events queued at once
+        self.high_water = 0
+        # Events dropped or replaced by a newer one, by raw type
+        self.dropped = Counter()
+        self.coalesced = Counter()
+        # Times a producer waited for free space
+        self.blocked = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class EventQueue:
+    """A bounded queue of raw events with a policy for when it is full.
+
+    ``block``
+        Producers wait for free space.
+    ``drop_oldest``
+        The oldest queued droppable event, e.g. ``message_read``, is dropped
+        to make room. Other events are never dropped, producers wait
+        when no droppable event is queued.
+    ``coalesce``
+        A state event replaces the queued event of the same type and subject,
+        e.g. a ``room_update`` of the same room, keeping its place in the queue.
+        Producers wait when nothing can be replaced.
+
+    A ``maxsize`` of ``0`` means no limit.
+    """
+
+    def __init__(
+        self,
+        loop,
+        maxsize=10000,
+        policy="block",
+        droppable=DROPPABLE_EVENTS,
+    ):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError("Unknown queue policy {0!r}".format(policy))
+
+        self.loop = loop
+        self.maxsize = maxsize
+        self.policy = policy
+        self.droppable = droppable
+        self.coalesced = COALESCED_EVENTS
+        self.closed = False
+        self.stats = EventQueueStats()
+
+        # Events are boxed in lists with their coalesce key,
+        # so they can be replaced or dropped in place
+        self._boxes = deque()
+        # Boxes of the droppable events, oldest first, for drop_oldest
+        self._droppable_boxes = deque()
+        # Box of the queued state event of each coalesce key
+        self._coalesced_boxes = {}
+        self._size = 0
+
+        self._getters = deque()
+        self._putters = deque()
+
+    def __len__(self):
+        return self._size
+
+    def full(self):
+        return 0 < self.maxsize <= self._size
+
+    def _wake_up(self, waiters):
+        while waiters:
+            waiter = waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    def _coalesce_key(self, event_type, data):
+        key = self.coalesced.get(event_type)
+
+        if self.policy != "coalesce" or key is None:
+            return None
+
+        return event_type, data.get(key)
+
+    def _replace(self, key, data):
+        """Replace the queued state event with the same key, if any."""
+        box = self._coalesced_boxes.get(key)
+
+        if box is None or box[0] is _DROPPED:
+            return False
+
+        self.stats.coalesced[data.get(API_EVENT_TYPE_ATTRIBUTE)] += 1
+        box[0] = data
+
+        return True
+
+    def _drop_oldest(self):
+        if self.policy != "drop_oldest":
+            return False
+
+        while self._droppable_boxes:
+            box = self._droppable_boxes.popleft()
+
+            if box[0] is not _DROPPED:
+                self.stats.dropped[box[0].get(API_EVENT_TYPE_ATTRIBUTE)] += 1
+                box[0] = _DROPPED
+                self._size -= 1
+                self._forget_key(box)
+                return True
+
+        return False
+
+    def put_nowait(self, data):
+        """Queue an event following the policy.
+
+        Returns `False` when the event couldn't be queued because it is full.
+        """
+        event_type = data.get(API_EVENT_TYPE_ATTRIBUTE)
+        key = self._coalesce_key(event_type, data)
+
+        if key is not None and self._replace(key, data):
+            return True
+
+        if self.full() and not self._drop_oldest():
+            # Nothing older can be dropped, drop the event itself if it may be
+            dropped = self.policy == "drop_oldest" and event_type in self.droppable
+
+            if dropped:
+                self.stats.dropped[event_type] += 1
+
+            return dropped
+
+        box = [data, key]
+        self._boxes.append(box)
+        self._size += 1
+        self.stats.high_water = max(self.stats.high_water, self._size)
+
+        if self.policy == "drop_oldest" and event_type in self.droppable:
+            self._droppable_boxes.append(box)
+
+        if key is not None:
+            self._coalesced_boxes[key] = box
+
+        self._wake_up(self._getters)
+
+        return True
+
+    async def put(self, data):
+        """Queue an event, waiting for free space when the policy requires it."""
+        if self.put_nowait(data):
+            return
+
+        self.stats.blocked += 1
+
+        while not self.put_nowait(data):
+            waiter = self.loop.create_future()
+            self._putters.append(waiter)
+
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                # Pass the free space on to the next producer
+                if not self.full():
+                    self._wake_up(self._putters)
+                raise
+
+    def _take(self, box):
+        """Mark a box as taken, dropping and coalescing can't see it anymore."""
+        box[0] = _DROPPED
+        self._size -= 1
+
+        droppable_boxes = self._droppable_boxes
+
+        # Droppable boxes are taken in order, or dropped already
+        while droppable_boxes and droppable_boxes[0][0] is _DROPPED:
+            droppable_boxes.popleft()
+
+        self._forget_key(box)
+
+    def _forget_key(self, box):
+        key = box[1]
+
+        if key is not None and self._coalesced_boxes.get(key) is box:
+            del self._coalesced_boxes[key]
+
+    def get_nowait(self):
+        while self._boxes:
+            box = self._boxes.popleft()
+            data = box[0]
+
+            if data is _DROPPED:
+                continue
+
+            self._take(box)
+            self._wake_up(self._putters)
+
+            return data
+
+        return None
+
+    async def get(self):
+        """Take the oldest event. Returns `None` once closed and empty."""
+        while not self._size:
+            if self.closed:
+                return None
+
+            waiter = self.loop.create_future()
+            self._getters.append(waiter)
+
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                raise
+
+        return self.get_nowait()
+
+    def close(self):
+        """Let consumers finish once the queued events are taken."""
+        self.closed = True
+
+        while self._getters:
+            self._wake_up(self._getters)
+
+    def reopen(self):
+        self.closed = False
@@ -0,0 +1,186 @@
+import sys
+
+
+def message_size(message):
+    """Approximate memory used by the content of a message, in bytes."""
+    return sys.getsizeof(message.content)
+
+
+class RoomMessages:
+    """The latest messages of a room, ordered by timestamp.
+
+    Messages are kept in a ring buffer of ``max_messages`` slots, so the
+    oldest message is evicted in constant time. The timestamps are kept in
+    a parallel buffer searched by bisection. Messages usually arrive in order
+    and are appended; older ones are inserted in place.
+    """
+
+    def __init__(self, max_messages=1000, max_bytes=None):
+        self.max_messages = max_messages
+        # Total message_size of the messages kept, None for no limit
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evicted = 0
+
+        self._messages = [None] * max_messages
+        self._timestamps = [0] * max_messages
+        self._start = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        """Iterate from the oldest message to the latest one."""
+        for index in range(self._count):
+            yield self._messages[self._slot(index)]
+
+    def _slot(self, index):
+        return (self._start + index) % self.max_messages
+
+    def _bisect(self, timestamp):
+        """Index of the first message not older than ``timestamp``."""
+        low, high = 0, self._count
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self._timestamps[self._slot(middle)] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def _find(self, timestamp):
+        index = self._bisect(timestamp)
+
+        if index < self._count and self._timestamps[self._slot(index)] == timestamp:
+            return index
+
+        return None
+
+    def _move(self, source, destination):
+        source, destination = self._slot(source), self._slot(destination)
+        self._messages[destination] = self._messages[source]
+        self._timestamps[destination] = self._timestamps[source]
+
+    def _evict_oldest(self):
+        slot = self._start
+        self.size -= message_size(self._messages[slot])
+        self._messages[slot] = None
+        self._start = (slot + 1) % self.max_messages
+        self._count -= 1
+        self.evicted += 1
+
+    def add(self, message):
+        """Keep ``message``, replacing the message with the same timestamp."""
+        timestamp = message.id
+        count = self._count
+
+        if count and timestamp > self._timestamps[self._slot(count - 1)]:
+            index = count
+        else:
+            index = self._bisect(timestamp)
+
+        if index < count and self._timestamps[self._slot(index)] == timestamp:
+            slot = self._slot(index)
+            self.size += message_size(message) - message_size(self._messages[slot])
+            self._messages[slot] = message
+            return
+
+        if count == self.max_messages:
+            if index == 0:
+                # Older than every message kept, it would be evicted right away
+                return
+
+            self._evict_oldest()
+            index -= 1
+
+        # Shift the newer messages, only when inserting an older message
+        for position in range(self._count, index, -1):
+            self._move(position - 1, position)
+
+        slot = self._slot(index)
+        self._messages[slot] = message
+        self._timestamps[slot] = timestamp
+        self._count += 1
+        self.size += message_size(message)
+
+        if self.max_bytes is not None:
+            while self._count > 1 and self.size > self.max_bytes:
+                self._evict_oldest()
+
+    def get(self, timestamp):
+        index = self._find(timestamp)
+
+        if index is None:
+            return None
+
+        return self._messages[self._slot(index)]
+
+    def remove(self, timestamp):
+        """Remove and return the message with ``timestamp``, if kept."""
+        index = self._find(timestamp)
+
+        if index is None:
+            return None
+
+        message = self._messages[self._slot(index)]
+
+        for position in range(index + 1, self._count):
+            self._move(position, position - 1)
+
+        self._count -= 1
+        self._messages[self._slot(self._count)] = None
+        self.size -= message_size(message)
+
+        return message
+
+    def since(self, timestamp):
+        """Iterate over the messages sent at or after ``timestamp``."""
+        for index in range(self._bisect(timestamp), self._count):
+            yield self._messages[self._slot(index)]
+
+
+class MessageCache:
+    """The latest messages of every room, see `RoomMessages`."""
+
+    def __init__(self, max_messages=1000, max_bytes=None):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self._rooms = {}
+
+    def __len__(self):
+        return sum(len(messages) for messages in self._rooms.values())
+
+    def room(self, room_id):
+        messages = self._rooms.get(room_id)
+
+        if messages is None:
+            messages = RoomMessages(self.max_messages, self.max_bytes)
+            self._rooms[room_id] = messages
+
+        return messages
+
+    def add(self, room_id, message):
+        self.room(room_id).add(message)
+
+    def get(self, room_id, timestamp):
+        messages = self._rooms.get(room_id)
+
+        if messages is None:
+            return None
+
+        return messages.get(timestamp)
+
+    def remove(self, room_id, timestamp):
+        messages = self._rooms.get(room_id)
+
+        if messages is None:
+            return None
+
+        return messages.remove(timestamp)
+
+    def clear(self):
+        self._rooms.clear()
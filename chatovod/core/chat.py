@@ -1,48 +1,102 @@
 import asyncio
 import logging
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict
 
-from chatovod.api.event_adapter import EventAdapter
+from chatovod.api.events import APIAdapter
+from chatovod.structures.message import Message
 from chatovod.structures.room import Room
-
+from chatovod.structures.user import User
+
+from .bootstrap import BootstrapPlanner
+from .broadcast import EventBroadcaster
+from .buffer import EventQueue
+from .cache import MessageCache
+from .deleter import DeferredDeleter
+from .dispatch import EventDispatcher
 from .errors import ChatovodConnectionError, ConnectionReset
+from .history import HistoryStore
+from .options import ClientOptions
+from .users import UserRegistry, nickname_key
+from .workers import RoomWorkers
 
 log = logging.getLogger(__name__)
 
 
+def event_key(data):
+    """Tell apart the events received in the same millisecond."""
+    get = data.get
+    return (get("ts"), get("t"), get("r"), get("f"), get("id"))
+
+
 class Chat:
-    def __init__(self, client, user, http, loop):
+    def __init__(self, client, user, http, loop, options=None):
         self.client = client
         self.user = user
         self.loop = loop
         self._http = http
-        self._event_listener = EventListener(chat=self)
+        # The options of the client, see ClientOptions
+        self.options = options = ClientOptions() if options is None else options
         self._event_handler = EventHandler(chat=self)
+        self._event_listener = EventListener(
+            chat=self,
+            streaming=options.streaming,
+            pipelined=options.pipelined,
+            event_queue=EventQueue(
+                loop=loop, maxsize=options.queue_size, policy=options.queue_policy
+            ),
+            event_format=options.event_format,
+        )
+        self._messages = MessageCache(
+            max_messages=options.max_messages, max_bytes=options.max_message_bytes
+        )
+        # Every message received, see the keep_history option
+        self._history = None
+        if options.keep_history:
+            self._history = HistoryStore(
+                self,
+                max_messages=options.history_max_messages,
+                max_bytes=options.history_max_bytes,
+            )
+        self._deleter = DeferredDeleter(
+            self,
+            interval=options.delete_interval,
+            concurrency=options.delete_concurrency,
+        )
+        # What to fetch while starting, along with the chat info, see _plan_bootstrap
+        self._prefetch = options.prefetch
+        self._prefetched = {}
+        self.bootstrap_timings = {}
 
         self.reset()
 
     def reset(self):
-        self._users = OrderedDict()
+        self._users = UserRegistry()
         self._rooms = OrderedDict()
         self._emojis = []
         self._emojis_groups = []
         self._emojis_base_path = None
         self._custom_emojis_base_path = None
         self._messages_to_delete = []
+        self._messages.clear()
+        self._has_older_events = {}
+        # Timestamp of the latest event received, kept by snapshots
+        self._last_event_ts = None
 
     @property
     def url(self):
         return self._http.url
 
     def _get_user(self, nickname):
-        return self.users[nickname.lower()]
+        return self._users.get(nickname)
+
+    def _get_user_by_id(self, user_id):
+        return self._users.get_by_id(user_id)
 
     def _add_user(self, user):
-        nickname = user.nickname.lower()
-        self._users[nickname] = user
+        self._users.add(user)
 
     def _remove_user(self, user):
-        return self._users.pop(user.nickname.lower())
+        return self._users.remove(user.nickname)
 
     def _get_room(self, room_id):
         return self._rooms.get(room_id)
@@ -53,62 +107,289 @@ class Chat:
     def _remove_room(self, room):
         self._rooms.pop(room.id)
 
+    def _merge_state(self, rooms, users):
+        for room_id in [room_id for room_id in self._rooms if room_id not in rooms]:
+            self._remove_room(self._rooms[room_id])
+
+        for room_id, room in rooms.items():
+            self._rooms.setdefault(room_id, room)
+
+        nicknames = {nickname_key(user.nickname) for user in users}
+
+        for user in list(self._users):
+            if nickname_key(user.nickname) not in nicknames:
+                self._remove_user(user)
+
+        for user in users:
+            self._add_user(user)
+
+    def _get_message(self, room_id, message_id):
+        return self._messages.get(room_id, message_id)
+
+    def _cache_message(self, message):
+        if message.room is not None:
+            self._messages.add(message.room.id, message)
+
+        if self._history is not None:
+            self._history.append(message)
+
+    def _cache_history(self, messages):
+        """Cache ``messages`` loaded from the history of a room."""
+        for message in messages:
+            if message.room is not None:
+                self._messages.add(message.room.id, message)
+
+        if self._history is not None:
+            self._history.insert(messages)
+
+    def _uncache_message(self, room_id, message_id):
+        if self._history is not None:
+            self._history.remove(room_id, message_id)
+
+        return self._messages.remove(room_id, message_id)
+
     def _add_message_to_delete(self, message):
         self._messages_to_delete.append(message)
+        self._deleter.notify()
+
+    def _pop_prefetched(self, name):
+        return self._prefetched.pop(name, None)
 
     async def _delete_deferred_messages(self):
-        messages_to_delete = self._messages_to_delete
-        messages_by_room = defaultdict(list)
+        await self._deleter.flush()
+
+    def _plan_bootstrap(self):
+        http = self._http
+        planner = BootstrapPlanner(self.loop)
 
-        for message in messages_to_delete:
-            messages_by_room[message.room.id].append(message.id)
+        # The other requests need the session cookie
+        planner.add("session", http.fetch_session)
+        planner.add("info", http.fetch_info, requires=("session",))
 
-        messages_to_delete.clear()
+        if "rooms" in self._prefetch:
+            planner.add("rooms", http.fetch_rooms, requires=("session",), optional=True)
+        if "bans" in self._prefetch:
+            planner.add("bans", http.fetch_bans, requires=("session",), optional=True)
 
-        for room_id, messages in messages_by_room.items():
-            log.debug("Deleting deferred messages from %s", room_id)
-            await self._http.delete_messages(room_id, messages)
+        return planner
 
     async def _start(self):
-        await self._http.fetch_session()
-        info = await self._http.fetch_info()
+        planner = self._plan_bootstrap()
+
+        try:
+            results = await planner.run()
+        finally:
+            self.bootstrap_timings = planner.timings
+
+        info = results.pop("info")
+        results.pop("session")
+        # Results of the requests made ahead of time, e.g. the ban list
+        self._prefetched = results
+
+        # Updates the state restored from a snapshot, if any
         await self._event_handler.handle_start(info)
+        self._deleter.start()
 
     def _create_room(self, data):
         room = Room(data=data)
         return room
 
+    def _create_user(self, data):
+        user = User(event=data)
+        return user
+
+    def _create_message(self, data):
+        room = self._get_room(data.get("room_id"))
+        message = Message(chat=self, room=room, data=data)
+        return message
+
 
 class EventListener:
-    def __init__(self, chat, *args, **kwargs):
+    def __init__(
+        self,
+        chat,
+        *,
+        streaming=False,
+        pipelined=False,
+        event_queue=None,
+        event_format="dict",
+    ):
         self.chat = chat
+        self.dispatcher = EventDispatcher(
+            chat._event_handler, loop=chat.loop, event_format=event_format
+        )
+        # Dispatch each event as soon as it is decoded
+        # instead of waiting for the whole batch
+        self.streaming = streaming
+        # Send the next bind while the events of the previous one are handled
+        self.pipelined = pipelined
+        # Handle the events of different rooms concurrently, see RoomWorkers
+        self.room_workers = None
+        # Events waiting to be handled while pipelined
+        if event_queue is None:
+            event_queue = EventQueue(loop=chat.loop)
+        self.event_queue = event_queue
+        # Events iterated with Client.events
+        self.broadcaster = EventBroadcaster(chat.loop, self.dispatcher)
+        # Timestamp up to which the next bind replays events already received,
+        # and the event_key of those received at that timestamp,
+        # set by Reconnector after the connection is restored
+        self.replayed_until = None
+        self.replayed = frozenset()
+        # The event_key of the events received at the chat's _last_event_ts
+        self.latest_keys = set()
+        # Events dropped for being received again after a reconnect
+        self.duplicates = 0
+
+    def use_room_workers(self, concurrency=10):
+        self.room_workers = RoomWorkers(
+            loop=self.chat.loop,
+            handle=self.dispatcher.dispatch_in_order,
+            concurrency=concurrency,
+        )
+
+    def add_middleware(self, stage, name=None):
+        """Run ``stage`` on every adapted event before its handlers.
+
+        The stage returns the event, a replacement of it or `None` to drop it.
+        The time spent by each stage is kept in
+        ``dispatcher.middleware.histograms``, by name.
+        """
+        self.dispatcher.middleware.add(stage, name)
+
+    async def _fetch_events(self):
+        replayed_until = self.replayed_until
+
+        async for data in self._bind():
+            timestamp = data.get("ts")
+
+            if (
+                replayed_until is not None
+                and isinstance(timestamp, int)
+                and (
+                    timestamp < replayed_until
+                    or timestamp == replayed_until
+                    and event_key(data) in self.replayed
+                )
+            ):
+                self.duplicates += 1
+                continue
+
+            yield data
+
+        # The binds after it only return events received after the gap
+        self.replayed_until = None
+        self.replayed = frozenset()
+
+    async def _bind(self):
+        if self.streaming:
+            async for data in self.chat._http.stream_chat_bind():
+                yield data
+        else:
+            coro = self.chat._http.chat_bind()
+            msg_stream = await asyncio.wait_for(coro, timeout=80)
+
+            if not isinstance(msg_stream, list):
+                log.warning("Received %s with content %s", type(msg_stream), msg_stream)
+                raise Exception
+
+            for data in msg_stream:
+                yield data
+
+    async def _wait_for_room_workers(self):
+        # Events pending on the workers are bound like the ones of the queue
+        if self.room_workers is not None:
+            await self.room_workers.wait_for_space(self.event_queue.maxsize)
 
     async def listen(self):
         try:
-            coro = self.chat._http.chat_bind()
-            msg_stream = await asyncio.wait_for(coro, timeout=80, loop=self.chat.loop)
-            await self.received_message(msg_stream)
+            async for data in self._fetch_events():
+                await self._wait_for_room_workers()
+                self.received_event(data)
         except (ConnectionReset, ChatovodConnectionError) as e:
-            log.warning("A %s error occurred during event bind", e.__name__)
+            log.warning("A %s error occurred during event bind", type(e).__name__)
             raise
 
+    async def listen_forever(self):
+        if not self.pipelined:
+            while True:
+                await self.listen()
+
+        queue = self.event_queue
+        queue.reopen()
+        loop = self.chat.loop
+
+        poller = loop.create_task(self._poll(queue))
+        consumer = loop.create_task(self._consume(queue))
+
+        try:
+            await asyncio.wait([poller, consumer], return_when=asyncio.FIRST_COMPLETED)
+
+            if poller.done():
+                # Events received before the error are still handled, in order
+                queue.close()
+                await consumer
+                poller.result()
+            else:
+                consumer.result()
+        finally:
+            poller.cancel()
+            consumer.cancel()
+            await asyncio.wait([poller, consumer])
+
+    async def _poll(self, queue):
+        while True:
+            try:
+                async for data in self._fetch_events():
+                    if not self.dispatcher.subscribed(data):
+                        continue
+
+                    # Waits while the queue is full, depending on its policy
+                    await queue.put(data)
+            except (ConnectionReset, ChatovodConnectionError) as e:
+                log.warning("A %s error occurred during event bind", type(e).__name__)
+                raise
+
+    async def _consume(self, queue):
+        while True:
+            data = await queue.get()
+
+            if data is None:
+                return
+
+            await self._wait_for_room_workers()
+            self.received_event(data)
+
     async def received_message(self, msg_stream):
         if not isinstance(msg_stream, list):
             log.warning("Received %s with content %s", type(msg_stream), msg_stream)
             raise Exception
 
         for data in msg_stream:
-            adapted_data = EventAdapter.adapt(data)
-
-            event = adapted_data.get("t")
-            parser = "parse_" + event.lower()
-
-            try:
-                parser_func = getattr(self.chat._event_handler, parser)
-            except AttributeError:
-                log.warning('Unknown event "%s"', event)
-            else:
-                parser_func(adapted_data)
+            self.received_event(data)
+
+    def received_event(self, data):
+        timestamp = data.get("ts")
+        if isinstance(timestamp, int):
+            last_event_ts = self.chat._last_event_ts
+            if last_event_ts is None or timestamp > last_event_ts:
+                self.chat._last_event_ts = timestamp
+                self.latest_keys = {event_key(data)}
+            elif timestamp == last_event_ts:
+                self.latest_keys.add(event_key(data))
+
+        if not self.dispatcher.subscribed(data):
+            return
+
+        if self.broadcaster.subscriptions:
+            self.broadcaster.publish(data)
+
+        if self.room_workers is not None:
+            # The state is updated in order, only the handlers run on the workers
+            adapted_data = self.dispatcher.update_state(data)
+            self.room_workers.submit(data, adapted_data)
+        else:
+            self.dispatcher.dispatch(data)
 
 
 class EventHandler:
@@ -116,21 +397,21 @@ class EventHandler:
         self.chat = chat
 
     async def handle_start(self, msg_stream):
+        # Before the messages, which belong to the rooms
+        self.reconcile(msg_stream)
+
         for data in msg_stream:
-            adapted_data = EventAdapter.adapt(data)
+            adapted_data = APIAdapter.adapt(data)
             event = adapted_data.get("t")
             # parser = "_parse_" + event
 
-            if event == "room_open":
-                room = self.chat._create_room(adapted_data)
-                self.chat._add_room(room)
-            elif event == "message":
-                # message = self.chat._create_message(message)
-                # self.chat._cache_message(message)
-                ...
+            if event == "message":
+                message = self.chat._create_message(adapted_data)
+                self.chat._cache_message(message)
             elif event == "has_older_events":
-                # TODO: Implement this
-                ...
+                self.parse_has_older_events(adapted_data)
+            elif event == "set_option":
+                self.parse_set_option(adapted_data)
             # else:
             #     try:
             #         parser_func = getattr(self, parser)
@@ -141,11 +422,54 @@ class EventHandler:
 
         log.info("Handle start finished")
 
+    def reconcile(self, msg_stream):
+        """Update the rooms and users to those of the chat info ``msg_stream``.
+
+        Rooms already known are kept, users are replaced by their current data.
+        """
+        rooms = OrderedDict()
+        users = []
+
+        for data in msg_stream:
+            event = data.get("t")
+
+            if event == "ro":
+                room = self.chat._create_room(APIAdapter.adapt(data))
+                rooms[room.id] = room
+            elif event == "ue":
+                users.append(self.chat._create_user(APIAdapter.adapt(data)))
+
+        self.chat._merge_state(rooms, users)
+
     def _parse_message(self, data):
         message = self.chat._create_message(data)
 
         return message
 
+    def parse_message(self, data):
+        message = self._parse_message(data)
+        self.chat._cache_message(message)
+
+    def parse_has_older_events(self, data):
+        self.chat._has_older_events[data["room_id"]] = data.get("value", False)
+
+    def parse_message_delete(self, data):
+        for message_id in data["messages"]:
+            self.chat._uncache_message(data["room_id"], message_id)
+
+    def parse_user_enter(self, data):
+        user = self.chat._create_user(data)
+        self.chat._add_user(user)
+
+    def parse_user_leave(self, data):
+        self.chat._users.remove(data["nickname"])
+
+    def parse_user_enter_room(self, data):
+        self.chat._users.enter_room(data["nick"], data["r"])
+
+    def parse_user_leave_room(self, data):
+        self.chat._users.leave_room(data["nick"], data["r"])
+
     def parse_set_option(self, raw):
         option = raw["option"]
         value = raw.get("value")
@@ -153,11 +477,11 @@ class EventHandler:
         log.debug("Setting option '%s' to '%s'", option, value)
 
         if option == "nick":
-            self.user.nickname = value
+            self.chat.user.nickname = value
         elif option == "signedIn":
-            self.user.signed_in = value
+            self.chat.user.signed_in = value
         elif option == "wid":
-            self._http.window_id = value
+            self.chat._http.window_id = value
         else:
             log.info("Unhandled option %s:%s", option, raw)
 
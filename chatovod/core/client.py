@@ -1,22 +1,50 @@
 import asyncio
 import logging
 
+from .backfill import HistoryLoader
 from .chat import Chat
 from .client_user import ClientUser
 from .http import HTTPClient
+from .options import ClientOptions
+from .reconnect import Reconnector
+from .snapshot import read_snapshot, restore_snapshot, take_snapshot, write_snapshot
 
 logger = logging.getLogger(__name__)
 
 
 class Client:
-    def __init__(self, chat_name, custom=False, loop=None):
+    def __init__(self, chat_name, custom=False, loop=None, **options):
         self.host = chat_name if custom else "{}.chatovod.com".format(chat_name)
         self.loop = asyncio.get_event_loop() if loop is None else loop
         self.user = ClientUser(client=self)
-        self.http = HTTPClient(host=self.host, loop=loop)
-        self.chat = Chat(client=self, user=self.user, http=self.http, loop=self.loop)
+        # Unknown options raise a TypeError, see ClientOptions for the defaults
+        self.options = options = ClientOptions(**options)
+        self.http = HTTPClient(host=self.host, loop=loop, **options.http_options())
+        self.chat = Chat(
+            client=self, user=self.user, http=self.http, loop=self.loop, options=options
+        )
+        self.history_loader = HistoryLoader(
+            self.chat, concurrency=options.history_concurrency
+        )
+        # Restores the connection when a bind fails, unless disabled
+        self.reconnector = None
+        if options.reconnect:
+            self.reconnector = Reconnector(
+                self.chat,
+                base_delay=options.reconnect_delay,
+                max_delay=options.reconnect_max_delay,
+                max_attempts=options.reconnect_attempts,
+            )
+        # Where the state of the chat is kept between runs
+        self.snapshot_path = options.snapshot_path
         self.event_listener = self.chat._event_listener
 
+        if options.events is not None:
+            self.subscribe(*options.events)
+
+        if options.room_concurrency is not None:
+            self.event_listener.use_room_workers(options.room_concurrency)
+
     def run(self, *args, **kwargs):
         loop = self.loop
 
@@ -46,10 +74,22 @@ class Client:
         await self.init()
 
     async def init(self):
+        if self.snapshot_path is not None:
+            snapshot = await self.loop.run_in_executor(
+                None, read_snapshot, self.snapshot_path
+            )
+
+            # Serve the previous state until the current one is fetched,
+            # the chat info then updates it instead of replacing it
+            if snapshot is not None:
+                restore_snapshot(self.chat, snapshot)
+
         await self.chat._start()
 
-        while True:
-            await self.event_listener.listen()
+        if self.reconnector is not None:
+            await self.reconnector.listen_forever()
+        else:
+            await self.event_listener.listen_forever()
 
     async def close(self):
         # TODO: Only if signed in
@@ -57,7 +97,71 @@ class Client:
         # TODO: Only if logged in
         # await self.http.logout()
         # await self.http.close()
-        ...
+        self.event_listener.broadcaster.close()
+        await self.chat._deleter.close()
+
+        if self.snapshot_path is not None:
+            snapshot = take_snapshot(self.chat)
+            await self.loop.run_in_executor(
+                None, write_snapshot, snapshot, self.snapshot_path
+            )
+
+    def subscribe(self, *events):
+        """Only handle ``events``, e.g. ``message``.
+
+        The events the library needs to keep its state are always handled.
+        Other events are dropped as they are received, without being adapted.
+        """
+        self.event_listener.dispatcher.subscribe(*events)
+
+    def events(self, types=None, rooms=None, **kwargs):
+        """Iterate over the events received from the chat.
+
+        ::
+
+            async for event in client.events(types=["message"], rooms=[1]):
+                ...
+
+        ``types`` are raw or adapted event types, by default every event
+        the client is subscribed to. ``rooms`` are the ids of the rooms
+        of the events, by default every room. Each iterator buffers up to
+        ``maxsize`` events, see `EventSubscription`. It stops receiving
+        events once closed, or used with ``async with``. Events go through
+        the middleware, like those passed to the handlers.
+        """
+        return self.event_listener.broadcaster.subscribe(types, rooms, **kwargs)
+
+    def fetch_history(self, *room_ids, limit=None, since=None):
+        """Iterate over the past messages of rooms, latest first in each room.
+
+        ::
+
+            async for message in client.fetch_history(1, 2, limit=500):
+                ...
+
+        Each room is loaded until it has no older messages, ``limit`` messages
+        or a message sent before the ``since`` timestamp.
+        """
+        return self.history_loader.load_rooms(room_ids, limit=limit, since=since)
+
+    def pop_prefetched(self, name):
+        """The result of a request made while starting, e.g. ``bans``.
+
+        See the ``prefetch`` option. `None` when the request wasn't made,
+        failed or its result was already popped.
+        """
+        return self.chat._pop_prefetched(name)
+
+    def add_event_handler(self, event, handler):
+        """Call ``handler`` with every ``event`` received from the chat.
+
+        ``event`` is either the API type of the event, e.g. ``m``,
+        or its adapted type, e.g. ``message``.
+        """
+        self.event_listener.dispatcher.register(event, handler)
+
+    def remove_event_handler(self, event, handler):
+        self.event_listener.dispatcher.unregister(event, handler)
 
     async def login(self, email, password):
         logger.info("Attempting to login")
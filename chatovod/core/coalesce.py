@@ -0,0 +1,68 @@
+import asyncio
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD"))
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, str(v)) for k, v in value.items()))
+    elif isinstance(value, (list, tuple)):
+        return tuple((k, str(v)) for k, v in value)
+
+    return value
+
+
+def request_key(method, url, params=None, data=None, headers=None):
+    """Build a hashable key identifying a request.
+
+    Dict params and data are sorted so the order in which they were written
+    doesn't matter, while list params keep their order, as repeated keys
+    are sent in that order.
+    """
+    return (method, str(url), _freeze(params), _freeze(data), _freeze(headers))
+
+
+class RequestCoalescer:
+    """Share one in-flight request between concurrent identical callers.
+
+    The first caller for a key starts the request, later callers with the
+    same key wait for it instead of making a round-trip of their own.
+    Once it finishes, the next caller starts a new one.
+
+    Every caller receives the same result object, so it must not be mutated.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self._calls = {}
+        # Callers joining a request in flight, and requests actually started
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def in_flight(self):
+        return len(self._calls)
+
+    async def run(self, key, coro_factory):
+        task = self._calls.get(key)
+
+        if task is None:
+            self.misses += 1
+
+            task = self.loop.create_task(coro_factory())
+            self._calls[key] = task
+
+            def on_task_done(future):
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+                # Callers may all be gone by now, mark the error as retrieved
+                if not future.cancelled():
+                    future.exception()
+
+            task.add_done_callback(on_task_done)
+        else:
+            self.hits += 1
+
+        # A cancelled caller must not cancel the request of the others
+        return await asyncio.shield(task)
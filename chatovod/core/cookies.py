@@ -0,0 +1,145 @@
+import time
+from collections.abc import Mapping
+from email.utils import parsedate_to_datetime
+from http.cookies import CookieError, Morsel, SimpleCookie
+
+import aiohttp
+from yarl import URL
+
+
+def cookie_expiry(morsel, now):
+    """Timestamp when a cookie expires, `None` if it lasts for the session."""
+    max_age = morsel["max-age"]
+
+    if max_age:
+        try:
+            return now + int(max_age)
+        except ValueError:
+            pass
+
+    expires = morsel["expires"]
+
+    if expires:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            pass
+
+    return None
+
+
+class VersionedCookieJar(aiohttp.CookieJar):
+    """A cookie jar counting the changes made to it in ``version``.
+
+    The jar only removes expired cookies when they are filtered, so it also
+    keeps when each cookie expires in ``expirations``, by domain and name.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.version = 0
+        self.expirations = {}
+
+    def _set_expirations(self, cookies, response_url):
+        now = time.time()
+        # Cookies without a domain belong to the host which set them
+        hostname = URL(response_url).raw_host or ""
+
+        for name, cookie in cookies:
+            # Plain values are session cookies
+            if isinstance(cookie, Morsel):
+                domain = cookie["domain"].lstrip(".") or hostname
+                expiry = cookie_expiry(cookie, now)
+            else:
+                domain, expiry = hostname, None
+
+            self.expirations[(domain, name)] = expiry
+
+    def get_expiry(self, url, name):
+        """When the cookie ``name`` sent to ``url`` expires, see `cookie_expiry`.
+
+        Like the jar, the cookie of the most specific domain is used.
+        """
+        labels = (URL(url).raw_host or "").split(".")
+        domains = [".".join(labels[index:]) for index in range(len(labels))]
+
+        for domain in domains + [""]:
+            key = (domain, name)
+
+            if key in self.expirations:
+                return self.expirations[key]
+
+        return None
+
+    def update_cookies(self, cookies, response_url=URL()):
+        super().update_cookies(cookies, response_url)
+        self.version += 1
+
+        if isinstance(cookies, Mapping):
+            cookies = cookies.items()
+
+        self._set_expirations(cookies, response_url)
+
+    def update_cookies_from_headers(self, headers, response_url):
+        # Used by newer versions of aiohttp to store the cookies of responses
+        super().update_cookies_from_headers(headers, response_url)
+        self.version += 1
+
+        for header in headers:
+            cookies = SimpleCookie()
+
+            try:
+                cookies.load(header)
+            except CookieError:
+                continue
+
+            self._set_expirations(cookies.items(), response_url)
+
+    def clear(self, *args, **kwargs):
+        super().clear(*args, **kwargs)
+        self.version += 1
+
+    def load(self, *args, **kwargs):
+        super().load(*args, **kwargs)
+        self.version += 1
+
+
+class CookieCache:
+    """Values of cookies, read from a `VersionedCookieJar` only after it changes.
+
+    Filtering the cookies of a jar scans all of them, while requests
+    only need the same few values, like the CSRF token.
+    """
+
+    __slots__ = ("cookie_jar", "hits", "misses", "_values", "_version")
+
+    def __init__(self, cookie_jar):
+        self.cookie_jar = cookie_jar
+        # Values returned from the cache, and read from the jar
+        self.hits = 0
+        self.misses = 0
+        # (value, expiry) of each cookie, by URL and name
+        self._values = {}
+        self._version = cookie_jar.version
+
+    def get(self, url, name):
+        """The value of the cookie ``name`` sent to ``url``, or `None`."""
+        if self._version != self.cookie_jar.version:
+            self._values.clear()
+            self._version = self.cookie_jar.version
+
+        key = (url, name)
+        cached = self._values.get(key)
+
+        # Expired cookies are only removed by the jar once filtered again
+        if cached is not None and (cached[1] is None or cached[1] > time.time()):
+            self.hits += 1
+            value = cached[0]
+        else:
+            self.misses += 1
+            morsel = self.cookie_jar.filter_cookies(url).get(name)
+            value = None if morsel is None else morsel.value
+            expiry = None if morsel is None else self.cookie_jar.get_expiry(url, name)
+            self._values[key] = (value, expiry)
+
+        return value
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from .errors import RETRIED_ERRORS, HTTPException
+
+log = logging.getLogger(__name__)
+
+
+class DeleteStats:
+    """Counters of a `DeferredDeleter`."""
+
+    __slots__ = ("deleted", "requests", "retries", "failed")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.deleted = 0
+        # Chunks sent, including the retries
+        self.requests = 0
+        self.retries = 0
+        # Messages which couldn't be deleted
+        self.failed = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class DeferredDeleter:
+    """Delete the messages queued by ``Message.delete_later`` in the background.
+
+    Queued messages are deleted every ``interval`` seconds, or as soon as
+    ``threshold`` messages are queued. The messages of each room are deleted
+    in chunks of ``chunk_size``, the chunks of every room are sent
+    concurrently, up to ``concurrency`` at a time. Chunks failing with one
+    of `RETRIED_ERRORS` are sent again up to ``retries`` times, waiting
+    ``retry_delay`` seconds, doubled after each attempt.
+    """
+
+    retries = 3
+    retry_delay = 0.5
+
+    def __init__(
+        self, chat, interval=1.0, threshold=100, chunk_size=100, concurrency=3
+    ):
+        self.chat = chat
+        self.loop = chat.loop
+        self.interval = interval
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.stats = DeleteStats()
+
+        # Created by the first flush, so it belongs to the running loop
+        self._semaphore = None
+        self._task = None
+        self._waiter = None
+        # The flush started by _run, left running when it is cancelled
+        self._flushing = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = self.loop.create_task(self._run())
+
+    async def close(self):
+        """Stop deleting in the background, deleting the queued messages first."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.wait([self._task])
+            self._task = None
+
+        # Cancelling _run leaves its flush running, its chunks already left the queue
+        if self._flushing is not None:
+            await self._flushing
+            self._flushing = None
+
+        await self.flush()
+
+    def notify(self):
+        """Called when a message is queued, flushing early past the threshold."""
+        if len(self.chat._messages_to_delete) >= self.threshold:
+            self._wake_up()
+
+    def _wake_up(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def _run(self):
+        while True:
+            self._waiter = self.loop.create_future()
+            timer = self.loop.call_later(self.interval, self._wake_up)
+
+            try:
+                await self._waiter
+            finally:
+                timer.cancel()
+
+            self._flushing = self.loop.create_task(self._flush_logged())
+            await asyncio.shield(self._flushing)
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception:
+            log.exception("Error while deleting deferred messages")
+
+    def _take_chunks(self):
+        messages_to_delete = self.chat._messages_to_delete
+        messages_by_room = defaultdict(list)
+
+        for message in messages_to_delete:
+            messages_by_room[message.room.id].append(message.id)
+
+        messages_to_delete.clear()
+
+        for room_id, message_ids in messages_by_room.items():
+            for start in range(0, len(message_ids), self.chunk_size):
+                yield room_id, message_ids[start : start + self.chunk_size]
+
+    async def flush(self):
+        """Delete every queued message now."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        chunks = [
+            self._delete_chunk(room_id, message_ids)
+            for room_id, message_ids in self._take_chunks()
+        ]
+
+        if chunks:
+            await asyncio.gather(*chunks)
+
+    async def _delete_chunk(self, room_id, message_ids):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats.retries += 1
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+            try:
+                async with self._semaphore:
+                    self.stats.requests += 1
+                    await self.chat._http.delete_messages(room_id, message_ids)
+            except RETRIED_ERRORS as e:
+                log.warning(
+                    "A %s error occurred deleting messages from %s",
+                    type(e).__name__,
+                    room_id,
+                )
+                continue
+            except HTTPException as e:
+                log.warning(
+                    "Couldn't delete messages from %s: %s", room_id, type(e).__name__
+                )
+                break
+
+            self.stats.deleted += len(message_ids)
+            return
+
+        self.stats.failed += len(message_ids)
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+from collections import Counter
+
+from chatovod.api.event_adapter import API_EVENT_TYPE_ATTRIBUTE
+from chatovod.api.events import APIEvents
+
+from .middleware import MiddlewareChain
+
+log = logging.getLogger(__name__)
+
+# Format of the data passed to handlers -> registry of the collection building it
+EVENT_FORMATS = {
+    # Adapted copies of the data
+    "dict": "adapters",
+    # EventView, translating the keys of the raw data on access
+    "view": "views",
+    # Instances of the typed Event classes
+    "typed": "events_map",
+}
+
+
+class EventDispatcher:
+    """Route raw events to their handlers using a table keyed by their type.
+
+    The ``parse_<event>`` methods of the handler keep the state of the chat.
+    Their table is built once, so dispatching an event is a single dictionary
+    lookup on its raw type, made before the event is adapted.
+    """
+
+    def __init__(
+        self, handler, events_collection=APIEvents, loop=None, event_format="dict"
+    ):
+        self.events_collection = events_collection
+        self.loop = loop
+        # Callables by raw event type, called with the event in event_format
+        self.parsers = {}
+        self.handlers = {}
+        # Events dispatched, without a handler and left out by subscribe
+        self.counters = Counter()
+        self.unhandled = Counter()
+        self.skipped = Counter()
+        self.subscriptions = None
+        self.middleware = MiddlewareChain()
+        # What handlers receive, one of EVENT_FORMATS
+        self.event_format = event_format
+        self._event_types = {
+            getattr(event, "new_type", event_type): event_type
+            for event_type, event in events_collection.events_map.items()
+        }
+
+        for name, event_type in self._event_types.items():
+            parser = getattr(handler, "parse_" + name.lower(), None)
+
+            if parser is not None:
+                self.parsers[event_type] = parser
+
+    @property
+    def event_format(self):
+        return self._event_format
+
+    @event_format.setter
+    def event_format(self, value):
+        try:
+            registry = EVENT_FORMATS[value]
+        except KeyError:
+            raise ValueError("Unknown event format {0!r}".format(value))
+
+        self._factories = getattr(self.events_collection, registry)
+        self._event_format = value
+
+    def get_event_type(self, event):
+        """Accept both the raw type of an event and its adapted type."""
+        if event in self.events_collection.events_map:
+            return event
+
+        try:
+            return self._event_types[event]
+        except KeyError:
+            raise ValueError("Unknown event {0!r}".format(event))
+
+    def subscribe(self, *events):
+        """Only dispatch ``events``, along with the events which have a parser.
+
+        Other events are dropped by `subscribed` before being adapted.
+        Calling it without events dispatches every event again.
+        """
+        if not events:
+            self.subscriptions = None
+            return
+
+        # The parsers keep the state of the chat, so they are never filtered out
+        self.subscriptions = frozenset(self.parsers).union(
+            self.get_event_type(event) for event in events
+        )
+
+    def subscribed(self, data):
+        event_type = data.get(API_EVENT_TYPE_ATTRIBUTE)
+
+        if self.subscriptions is None or event_type in self.subscriptions:
+            return True
+
+        self.skipped[event_type] += 1
+
+        return False
+
+    def register(self, event, handler):
+        """Call ``handler`` with the adapted data of every ``event``.
+
+        Coroutine functions are run as tasks on the loop of the dispatcher.
+        The event is added to the subscriptions, if any.
+        """
+        event_type = self.get_event_type(event)
+        self.handlers.setdefault(event_type, []).append(handler)
+
+        self.add_subscriptions(event_type)
+
+    def add_subscriptions(self, *event_types):
+        """Add raw event types to the subscriptions, if any."""
+        if self.subscriptions is not None:
+            self.subscriptions = self.subscriptions.union(event_types)
+
+    def unregister(self, event, handler):
+        event_type = self.get_event_type(event)
+        handlers = self.handlers.get(event_type, [])
+
+        if handler in handlers:
+            handlers.remove(handler)
+
+        if not handlers:
+            self.handlers.pop(event_type, None)
+
+    def adapt(self, data):
+        """Build what handlers receive, `None` for unknown events."""
+        factory = self._factories.get(data.get(API_EVENT_TYPE_ATTRIBUTE))
+
+        if factory is None:
+            return None
+
+        return factory(data)
+
+    def update_state(self, data):
+        """Run the parser of the event, if any, keeping the state of the chat.
+
+        Returns the adapted event, which is built once and passed to both
+        the parser and the handlers, or `None` when nothing needs it.
+        """
+        event_type = data.get(API_EVENT_TYPE_ATTRIBUTE)
+        parser = self.parsers.get(event_type)
+
+        # Stages see every known event, even without handlers
+        needed = event_type in self.handlers or self.middleware.stages
+
+        if parser is None and not needed:
+            return None
+
+        adapted_data = self.adapt(data)
+
+        if parser is not None:
+            parser(adapted_data)
+
+        return adapted_data
+
+    def _count(self, event_type, handled):
+        if handled or event_type in self.parsers:
+            self.counters[event_type] += 1
+            return
+
+        if event_type not in self.unhandled:
+            log.warning('Unknown event "%s"', event_type)
+
+        self.unhandled[event_type] += 1
+
+    def _get_handlers(self, data, adapted_data):
+        event_type = data.get(API_EVENT_TYPE_ATTRIBUTE)
+        handlers = self.handlers.get(event_type)
+        self._count(event_type, handlers is not None)
+
+        if adapted_data is not None and self.middleware.stages:
+            adapted_data = self.middleware.run(adapted_data)
+
+        if adapted_data is None:
+            handlers = None
+
+        return handlers, adapted_data
+
+    def dispatch(self, data):
+        adapted_data = self.update_state(data)
+        handlers, adapted_data = self._get_handlers(data, adapted_data)
+
+        if handlers is None:
+            return
+
+        for handler in handlers:
+            result = handler(adapted_data)
+
+            if asyncio.iscoroutine(result):
+                asyncio.ensure_future(result, loop=self.loop)
+
+    async def dispatch_in_order(self, data, adapted_data=None):
+        """Like `dispatch`, but waits for coroutine handlers one by one.
+
+        The state is not updated, `update_state` is called beforehand
+        and its result is passed as ``adapted_data``.
+        """
+        if adapted_data is None:
+            adapted_data = self.adapt(data)
+
+        handlers, adapted_data = self._get_handlers(data, adapted_data)
+
+        if handlers is None:
+            return
+
+        for handler in handlers:
+            result = handler(adapted_data)
+
+            if asyncio.iscoroutine(result):
+                await result
@@ -1,4 +1,8 @@
-from chatovod.api.event_adapter import EventAdapter
+import asyncio
+
+import aiohttp
+
+from chatovod.api.events import APIAdapter
 
 
 class ChatovodException(Exception):
@@ -29,8 +33,13 @@ class InvalidLogin(HTTPException):
     """The provided login or password is incorrect."""
 
 
+# Errors of requests which failed to reach the chat and may be tried again,
+# including ConnectionReset and the aiohttp errors such as ServerDisconnectedError
+RETRIED_ERRORS = (ChatovodConnectionError, aiohttp.ClientError, asyncio.TimeoutError)
+
+
 def error_factory(raw):
-    error = EventAdapter.adapt(data=raw)
+    error = APIAdapter.adapt(data=raw)
     error_type = error["type"]
 
     if error_type == "connection":
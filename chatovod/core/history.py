@@ -0,0 +1,427 @@
+import bisect
+import heapq
+import itertools
+from array import array
+
+from chatovod.structures.message import Message
+
+_CMD_ME = 1
+_SEEN = 2
+_OLD = 4
+_FETCHED = 8
+# Removed, left in the columns until they are compacted
+_DELETED = 16
+
+_NO_AUTHOR = -1
+
+
+class InternTable:
+    """Map values, e.g. nicknames, to small integers and back."""
+
+    def __init__(self):
+        self.values = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value):
+        value_id = self._ids.get(value)
+
+        if value_id is None:
+            value_id = self._ids[value] = len(self.values)
+            self.values.append(value)
+
+        return value_id
+
+    def get_id(self, value):
+        return self._ids.get(value)
+
+
+class HistoryStore:
+    """Message history kept in columns instead of `Message` objects.
+
+    Timestamps are kept in an ``array('q')``, authors and rooms as ids of
+    an `InternTable` and the contents of every message in a single UTF-8
+    buffer. `Message` objects are only created when read.
+
+    Lookups by timestamp use bisection while messages are added in order,
+    and scan the store otherwise. Older messages, e.g. loaded by
+    `HistoryLoader`, are added with `insert` to keep the store in order.
+
+    The store is capped by ``max_messages`` and ``max_bytes``, see `nbytes`,
+    when set. Once over a cap, the oldest messages are dropped down to three
+    quarters of it, so the columns are rebuilt once every quarter of the cap.
+    Removed messages are only flagged, their rows are compacted along with
+    the next trim or once they are a quarter of the store.
+    """
+
+    def __init__(self, chat=None, max_messages=None, max_bytes=None):
+        self.chat = chat
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        # Messages dropped for being over a cap
+        self.dropped = 0
+        self.authors = InternTable()
+        self.rooms = InternTable()
+
+        self._timestamps = array("q")
+        self._author_ids = array("l")
+        self._room_ids = array("l")
+        self._flags = array("B")
+        # Content of the message at index i is _content[_offsets[i]:_offsets[i + 1]],
+        # offsets starting at _offsets[0] instead of 0 once older rows are spliced
+        self._offsets = array("q", [0])
+        self._content = bytearray()
+        # Recipients are rare, keep them only for the messages which have some
+        self._recipients = {}
+        self._ordered = True
+        # Rows flagged as _DELETED
+        self._deleted = 0
+
+    def __len__(self):
+        return len(self._timestamps) - self._deleted
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+
+        if self._deleted:
+            index = next(itertools.islice(self._rows(), index, None))
+
+        return self._create_message(index)
+
+    def __iter__(self):
+        for index in self._rows():
+            yield self._create_message(index)
+
+    def _rows(self, start=0):
+        """Indexes of the rows from ``start`` which were not removed."""
+        if not self._deleted:
+            return range(start, len(self._timestamps))
+
+        flags = self._flags
+
+        return (
+            index for index in range(start, len(flags)) if not flags[index] & _DELETED
+        )
+
+    @property
+    def nbytes(self):
+        """Memory used by the columns, in bytes."""
+        columns_size = sum(column.itemsize * len(column) for column in self._columns())
+
+        return columns_size + len(self._content)
+
+    def _columns(self):
+        return (
+            self._timestamps,
+            self._author_ids,
+            self._room_ids,
+            self._flags,
+            self._offsets,
+        )
+
+    def append(self, message):
+        timestamp = message.id
+
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            self._ordered = False
+
+        if message.author is None:
+            self._author_ids.append(_NO_AUTHOR)
+        else:
+            self._author_ids.append(self.authors.intern(message.author))
+
+        room_id = None if message.room is None else message.room.id
+        self._room_ids.append(self.rooms.intern(room_id))
+
+        flags = 0
+        if message.cmd_me:
+            flags |= _CMD_ME
+        if message.seen:
+            flags |= _SEEN
+        if message._old:
+            flags |= _OLD
+        if message.fetched:
+            flags |= _FETCHED
+        self._flags.append(flags)
+
+        if message.to:
+            self._recipients[len(self._timestamps)] = tuple(
+                self.authors.intern(nickname) for nickname in message.to
+            )
+
+        content = message.content.encode("utf-8")
+        self._content += content
+        self._offsets.append(self._offsets[-1] + len(content))
+        self._timestamps.append(timestamp)
+        self._trim()
+
+    def extend(self, messages):
+        for message in messages:
+            self.append(message)
+
+    def insert(self, messages):
+        """Add ``messages`` at their place in the store, in timestamp order."""
+        added = HistoryStore(self.chat)
+        added.authors = self.authors
+        added.rooms = self.rooms
+        added.extend(sorted(messages, key=lambda message: message.id))
+
+        if self._ordered and self._timestamps and added._timestamps:
+            timestamps = self._timestamps
+            position = bisect.bisect_right(timestamps, added._timestamps[0])
+
+            # Pages of older messages usually fit between two stored ones
+            if position < len(timestamps) and (
+                timestamps[position] < added._timestamps[-1]
+            ):
+                self._merge(added)
+            else:
+                self._splice(position, added)
+        else:
+            self._concatenate(added)
+
+        self._trim()
+
+    def _splice(self, position, other):
+        """Insert the rows of ``other`` before the row at ``position``."""
+        offsets = self._offsets
+        start = offsets[position]
+        count = len(other._timestamps)
+        size = len(other._content)
+        index = start - offsets[0]
+
+        self._content[index:index] = other._content
+
+        # Only the offsets on the shorter side of the splice are moved
+        if position * 2 < len(self._timestamps):
+            start -= size
+            head = array("q", map((-size).__add__, offsets[:position]))
+            tail = offsets[position:]
+        else:
+            head = offsets[:position]
+            tail = array("q", map(size.__add__, offsets[position:]))
+
+        added = array("q", map((start - other._offsets[0]).__add__, other._offsets))
+        self._offsets = head + added[:-1] + tail
+
+        self._timestamps[position:position] = other._timestamps
+        self._author_ids[position:position] = other._author_ids
+        self._room_ids[position:position] = other._room_ids
+        self._flags[position:position] = other._flags
+
+        recipients = {
+            index + count if index >= position else index: value
+            for index, value in self._recipients.items()
+        }
+        recipients.update(
+            (position + index, value) for index, value in other._recipients.items()
+        )
+        self._recipients = recipients
+
+    def _concatenate(self, other):
+        if self._timestamps and other._timestamps:
+            self._ordered &= other._timestamps[0] >= self._timestamps[-1]
+
+        size = len(self)
+        self._recipients.update(
+            (size + index, recipients)
+            for index, recipients in other._recipients.items()
+        )
+        shift = self._offsets[-1] - other._offsets[0]
+        self._offsets.extend(shift + offset for offset in other._offsets[1:])
+        self._content += other._content
+        self._timestamps.extend(other._timestamps)
+        self._author_ids.extend(other._author_ids)
+        self._room_ids.extend(other._room_ids)
+        self._flags.extend(other._flags)
+
+    def _merge(self, other):
+        # Rows of both stores by timestamp, the ones of this store first
+        rows = heapq.merge(
+            ((timestamp, 0, index) for index, timestamp in enumerate(self._timestamps)),
+            (
+                (timestamp, 1, index)
+                for index, timestamp in enumerate(other._timestamps)
+            ),
+        )
+
+        self._rebuild((other if source else self, index) for _, source, index in rows)
+
+    def _rebuild(self, rows):
+        """Replace the columns by ``rows``, pairs of a store and an index in it.
+
+        Removed rows are left out.
+        """
+        rebuilt = HistoryStore(self.chat)
+        rows = ((store, index) for store, index in rows if not store._is_deleted(index))
+
+        for position, (store, index) in enumerate(rows):
+            recipients = store._recipients.get(index)
+
+            if recipients is not None:
+                rebuilt._recipients[position] = recipients
+
+            rebuilt._timestamps.append(store._timestamps[index])
+            rebuilt._author_ids.append(store._author_ids[index])
+            rebuilt._room_ids.append(store._room_ids[index])
+            rebuilt._flags.append(store._flags[index])
+            rebuilt._content += store._content_of(index)
+            rebuilt._offsets.append(len(rebuilt._content))
+
+        self._timestamps = rebuilt._timestamps
+        self._author_ids = rebuilt._author_ids
+        self._room_ids = rebuilt._room_ids
+        self._flags = rebuilt._flags
+        self._offsets = rebuilt._offsets
+        self._content = rebuilt._content
+        self._recipients = rebuilt._recipients
+        self._deleted = 0
+
+    def _is_deleted(self, index):
+        return self._deleted and self._flags[index] & _DELETED
+
+    def _trim(self):
+        count = len(self)
+        drop = 0
+
+        if self.max_messages is not None and count > self.max_messages:
+            drop = count - self.max_messages * 3 // 4
+
+        if self.max_bytes is not None and self.nbytes > self.max_bytes:
+            excess = self.nbytes - self.max_bytes * 3 // 4
+            row_size = sum(column.itemsize for column in self._columns())
+            freed = 0
+            oldest = 0
+
+            for index in self._oldest():
+                if freed >= excess:
+                    break
+
+                freed += row_size + self._offsets[index + 1] - self._offsets[index]
+                oldest += 1
+
+            drop = max(drop, oldest)
+
+        if drop:
+            dropped = set(itertools.islice(self._oldest(), drop))
+            self._rebuild(
+                (self, index) for index in self._rows() if index not in dropped
+            )
+            self.dropped += drop
+        elif self._deleted * 4 > len(self._timestamps):
+            self._rebuild((self, index) for index in self._rows())
+
+    def _oldest(self):
+        """Indexes of the messages, oldest first."""
+        if self._ordered:
+            return self._rows()
+
+        return sorted(self._rows(), key=self._timestamps.__getitem__)
+
+    def remove(self, room_id, timestamp):
+        """Remove and return the message of ``room_id`` sent at ``timestamp``."""
+        room = self.rooms.get_id(room_id)
+        message = None
+
+        for index in self._indexes_of(timestamp):
+            if self._room_ids[index] == room:
+                message = self._create_message(index)
+                self._flags[index] |= _DELETED
+                self._deleted += 1
+                self._trim()
+                break
+
+        return message
+
+    def _content_of(self, index):
+        first = self._offsets[0]
+
+        return self._content[
+            self._offsets[index] - first : self._offsets[index + 1] - first
+        ]
+
+    def _create_message(self, index):
+        author_id = self._author_ids[index]
+        flags = self._flags[index]
+        content = self._content_of(index)
+        recipients = self._recipients.get(index, ())
+
+        data = {
+            "timestamp": self._timestamps[index],
+            "author": (
+                None if author_id == _NO_AUTHOR else self.authors.values[author_id]
+            ),
+            "content": content.decode("utf-8"),
+            "to": [self.authors.values[author_id] for author_id in recipients],
+            "nh": bool(flags & _CMD_ME),
+            "u": not flags & _SEEN,
+            "s": bool(flags & _OLD),
+            "pp": bool(flags & _FETCHED),
+        }
+
+        room_id = self.rooms.values[self._room_ids[index]]
+        room = None if self.chat is None else self.chat._get_room(room_id)
+
+        return Message(chat=self.chat, room=room, data=data)
+
+    def _indexes_of(self, timestamp):
+        if self._ordered:
+            start = bisect.bisect_left(self._timestamps, timestamp)
+            end = bisect.bisect_right(self._timestamps, timestamp, start)
+            indexes = range(start, end)
+        else:
+            indexes = (
+                index
+                for index, other in enumerate(self._timestamps)
+                if other == timestamp
+            )
+
+        return [index for index in indexes if not self._is_deleted(index)]
+
+    def get(self, room_id, timestamp):
+        """The message of ``room_id`` sent at ``timestamp``, if any."""
+        room = self.rooms.get_id(room_id)
+
+        for index in self._indexes_of(timestamp):
+            if self._room_ids[index] == room:
+                return self._create_message(index)
+
+        return None
+
+    def messages(self, room_id=None, since=None, until=None):
+        """Iterate over the messages of a room sent between two timestamps.
+
+        Each filter is ignored when `None`.
+        """
+        start = 0
+
+        if since is not None and self._ordered:
+            start = bisect.bisect_left(self._timestamps, since)
+            since = None
+
+        room = None if room_id is None else self.rooms.get_id(room_id)
+
+        if room_id is not None and room is None:
+            return
+
+        for index in self._rows(start):
+            timestamp = self._timestamps[index]
+
+            if until is not None and timestamp > until:
+                if self._ordered:
+                    break
+                continue
+
+            if since is not None and timestamp < since:
+                continue
+
+            if room is not None and self._room_ids[index] != room:
+                continue
+
+            yield self._create_message(index)
@@ -1,5 +1,4 @@
 import asyncio
-import json
 import logging
 
 import aiohttp
@@ -9,16 +8,91 @@ from chatovod import __version__
 from chatovod.api.endpoints import AccountEndpoint
 from chatovod.api.endpoints import APIEndpoint as Endpoints
 from chatovod.api.endpoints import Route
-
-from .errors import InvalidLogin, error_factory
+from chatovod.utils.decoders import get_json_decoder
+from chatovod.utils.stream import JSONArrayParser
+
+from .coalesce import IDEMPOTENT_METHODS, RequestCoalescer, request_key
+from .cookies import CookieCache, VersionedCookieJar
+from .errors import (
+    RETRIED_ERRORS,
+    ChatovodConnectionError,
+    HTTPException,
+    InvalidLogin,
+    error_factory,
+)
+from .options import HTTPOptions
+from .scheduler import Priority
+from .sessions import dump_session, is_session_valid, is_signed_in, load_session
+from .transport import TransportProfile, TransportStats
 
 logger = logging.getLogger(__name__)
 
 
+class RequestOptions:
+    """How `HTTPClient.request` sends a request, apart from the aiohttp arguments.
+
+    ``coalesce`` defaults to whether the method is idempotent. Requests are
+    only paced when the client has a scheduler, and requests without
+    a ``priority`` never are.
+    """
+
+    __slots__ = ("long_poll", "coalesce", "priority")
+
+    def __init__(self, long_poll=False, coalesce=None, priority=Priority.chat):
+        self.long_poll = long_poll
+        self.coalesce = coalesce
+        self.priority = priority
+
+
+CHAT_REQUEST = RequestOptions()
+MODERATION_REQUEST = RequestOptions(priority=Priority.moderation)
+HOUSEKEEPING_REQUEST = RequestOptions(priority=Priority.housekeeping)
+COALESCED_MODERATION_REQUEST = RequestOptions(
+    coalesce=True, priority=Priority.moderation
+)
+# The long-poll is expected to be always pending, it is never paced
+LONG_POLL_REQUEST = RequestOptions(long_poll=True, coalesce=False, priority=None)
+
+
 class HTTPClient:
-    def __init__(self, host, secure=True, client=None, loop=None):
+    def __init__(self, host, secure=True, client=None, loop=None, **options):
         self.loop = asyncio.get_event_loop() if loop is None else loop
-        self._session = aiohttp.ClientSession(loop=self.loop)
+        options = HTTPOptions(**options)
+        self._json_loads = get_json_decoder(options.json_decoder)
+
+        transport = options.transport
+        self.transport = TransportProfile() if transport is None else transport
+        self.transport_stats = TransportStats()
+        trace_configs = [self.transport_stats.create_trace_config()]
+
+        self._session = aiohttp.ClientSession(
+            connector=self.transport.create_connector(self.loop),
+            cookie_jar=VersionedCookieJar(loop=self.loop),
+            trace_configs=trace_configs,
+            loop=self.loop,
+        )
+        # The CSRF token and the session ID are read on every write
+        self.cookie_cache = CookieCache(self._session.cookie_jar)
+
+        if self.transport.reserve_bind_connection:
+            # The long-poll holds its connection for up to 80 seconds,
+            # so it gets one outside of the pool used by the other requests.
+            self._bind_session = aiohttp.ClientSession(
+                connector=self.transport.create_connector(self.loop, limit=1),
+                cookie_jar=self._session.cookie_jar,
+                trace_configs=trace_configs,
+                loop=self.loop,
+            )
+        else:
+            self._bind_session = self._session
+
+        self._coalescer = RequestCoalescer(loop=self.loop)
+
+        # Paces the requests when set, e.g. to a RequestScheduler
+        self.scheduler = options.scheduler
+
+        # Keeps the session cookies between runs, see chatovod.core.sessions
+        self.session_store = options.session_store
 
         self.window_id = 0
 
@@ -35,13 +109,11 @@ class HTTPClient:
 
     @property
     def csrf_token(self):
-        return self._filter_cookies(self.url).get("csrf").value
+        return self.cookie_cache.get(self.url, "csrf")
 
     @property
     def session_id(self):
-        cookies = self._filter_cookies(self.url)
-        session_id_cookie = cookies.get("ssid" if self.secure else "sid")
-        return session_id_cookie.value
+        return self.cookie_cache.get(self.url, "ssid" if self.secure else "sid")
 
     def _filter_cookies(self, request_url):
         return self._session.cookie_jar.filter_cookies(request_url)
@@ -67,9 +139,18 @@ class HTTPClient:
             elif type(data) == list:
                 req_data["data"] = [(k, v) for k, v in data if v is not None]
 
-    async def request(self, route, headers=None, return_response=False, **kwargs):
+    async def request(
+        self, route, headers=None, return_response=False, options=CHAT_REQUEST, **kwargs
+    ):
+        """Send a request, passing ``kwargs`` to aiohttp.
+
+        ``options`` is a `RequestOptions`.
+        """
         method = route.method
         url = route.url
+        long_poll = options.long_poll
+        coalesce = options.coalesce
+        priority = options.priority
 
         self._remove_none_params_and_data(kwargs)
 
@@ -80,43 +161,119 @@ class HTTPClient:
         if headers:
             kwargs["headers"].update(headers)
 
-        response = await self._session.request(method, url, **kwargs)
+        session = self._bind_session if long_poll else self._session
+
+        if coalesce is None:
+            coalesce = method in IDEMPOTENT_METHODS and not long_poll
+
+        # Raw responses are released by their caller, so they can't be shared
+        if coalesce and not return_response:
+            key = request_key(
+                method, url, kwargs.get("params"), kwargs.get("data"), headers
+            )
+
+            return await self._coalescer.run(
+                key, lambda: self._send(session, route, priority, **kwargs)
+            )
+
+        return await self._send(session, route, priority, return_response, **kwargs)
+
+    async def _send(self, session, route, priority, return_response=False, **kwargs):
+        method = route.method
+        url = route.url
+
+        if priority is not None and self.scheduler is not None:
+            await self.scheduler.wait(route.path, priority)
+
+        response = await session.request(method, url, **kwargs)
 
         try:
             if return_response:
                 return response
 
-            text = await response.text(encoding="utf-8")
+            body = await response.read()
             is_json = response.content_type == "application/json"
 
+            # orjson and ujson parse the bytes without an intermediate str
             if is_json:
-                data = json.loads(text)
+                data = self._json_loads(body)
             else:
-                data = text
+                data = body.decode("utf-8")
 
-            if 200 <= response.status < 300:
-                if is_json:
-                    if isinstance(data, dict) and data.get("t") == "error":
-                        error = error_factory(data)
-                        logger.debug(data)
-                        raise error
+            if is_json and isinstance(data, dict) and data.get("t") == "error":
+                error = error_factory(data)
+                logger.debug(data)
+                raise error
 
-                logger.debug('"%s %s" has received %s', method, url, data)
-                return data
+            if not 200 <= response.status < 300:
+                raise self._status_error(method, url, response.status)
 
+            logger.debug('"%s %s" has received %s', method, url, data)
+            return data
         finally:
             # Prevents 'Unclosed connection' and 'Unclosed response'
             await response.release()
 
+    def _status_error(self, method, url, status):
+        """The error of a response outside of the 2xx range."""
+        # Errors of the server are temporary, the request can be sent again
+        error_class = ChatovodConnectionError if status >= 500 else HTTPException
+
+        return error_class('"{0} {1}" has received {2}'.format(method, url, status))
+
     def raw_request(self, *args, **kwargs):
         return self.request(*args, return_response=True, **kwargs)
 
     async def close(self):
         await self._session.close()
 
+        if self._bind_session is not self._session:
+            await self._bind_session.close()
+
     def chat_bind(self):
         route = Route(path=Endpoints.CHAT_BIND, url=self.url)
-        return self.request(route)
+        return self.request(route, options=LONG_POLL_REQUEST)
+
+    async def stream_chat_bind(self):
+        """Yield the events of a ``chat_bind`` response as soon as they arrive."""
+        route = Route(path=Endpoints.CHAT_BIND, url=self.url)
+        method = route.method
+        url = route.url
+
+        headers = {
+            "User-Agent": self.user_agent,
+        }
+        # Times out when the server sends nothing, instead of on the whole body
+        timeout = aiohttp.ClientTimeout(sock_read=80)
+
+        response = await self._bind_session.request(
+            method, url, headers=headers, timeout=timeout
+        )
+
+        try:
+            if not 200 <= response.status < 300:
+                raise self._status_error(method, url, response.status)
+
+            parser = JSONArrayParser(loads=self._json_loads)
+
+            async for chunk in response.content.iter_any():
+                for event in parser.feed(chunk):
+                    yield event
+
+            data = parser.close()
+
+            if parser.is_array:
+                for event in data:
+                    yield event
+            elif isinstance(data, dict) and data.get("t") == "error":
+                error = error_factory(data)
+                logger.debug(data)
+                raise error
+            else:
+                logger.warning('"%s %s" has received %s', method, url, data)
+        finally:
+            # Prevents 'Unclosed connection' and 'Unclosed response'
+            await response.release()
 
     def fetch_info(self, limit=20):
         route = Route(path=Endpoints.CHAT_INFO_FETCH, url=self.url)
@@ -133,7 +290,7 @@ class HTTPClient:
 
     def fetch_bans(self):
         route = Route(path=Endpoints.CHAT_BANS_FETCH, url=self.url)
-        return self.request(route)
+        return self.request(route, options=MODERATION_REQUEST)
 
     def fetch_rooms(self):
         route = Route(path=Endpoints.CHAT_ROOMS_FETCH, url=self.url)
@@ -150,7 +307,7 @@ class HTTPClient:
             "csrf": self.csrf_token,
         }
 
-        return self.request(route, data=data)
+        return self.request(route, data=data, options=MODERATION_REQUEST)
 
     def unban(self, entries):
         route = Route(path=Endpoints.CHAT_NICKNAME_UNBAN, url=self.url)
@@ -162,7 +319,7 @@ class HTTPClient:
             "csrf": self.csrf_token,
         }
 
-        return self.request(route, data=data)
+        return self.request(route, data=data, options=MODERATION_REQUEST)
 
     def moderate(self, nickname=None, message=None, room_id=None):
         route = Route(path=Endpoints.CHAT_NICKNAME_MODERATE, url=self.url)
@@ -173,14 +330,15 @@ class HTTPClient:
             "roomId": room_id,
         }
 
-        return self.request(route, params=params)
+        return self.request(route, params=params, options=MODERATION_REQUEST)
 
     def fetch_nickname_info(self, nicknames):
         route = Route(path=Endpoints.CHAT_NICKNAME_FETCH, url=self.url)
 
         data = [("nick", nickname.lower()) for nickname in nicknames]
 
-        return self.request(route, data=data)
+        # Although it is a POST, it only reads data
+        return self.request(route, data=data, options=COALESCED_MODERATION_REQUEST)
 
     def open_room(self, room_id, force_active=False, limit=20):
         route = Route(path=Endpoints.ROOM_OPEN, url=self.url)
@@ -236,7 +394,7 @@ class HTTPClient:
             "toTime": to_time,
         }
 
-        return self.request(route, params=params)
+        return self.request(route, params=params, options=HOUSEKEEPING_REQUEST)
 
     def delete_messages(self, room_id, messages):
         route = Route(path=Endpoints.ROOM_MESSAGES_DELETE, url=self.url)
@@ -247,15 +405,22 @@ class HTTPClient:
             "roomId": room_id,
         }
 
-        return self.request(route, params=params)
+        return self.request(route, params=params, options=MODERATION_REQUEST)
 
     def delete_message(self, room_id, message_id):
         return self.delete_messages(room_id, [message_id])
 
-    def fetch_messages(self):
+    def fetch_messages(self, room_id=None, before=None, limit=None):
         route = Route(path=Endpoints.ROOM_MESSAGES_FETCH, url=self.url)
 
-        return self.request(route)
+        # The latest messages, or the ones sent before the timestamp
+        params = {
+            "channelId": room_id,
+            "toTime": before,
+            "limit": limit,
+        }
+
+        return self.request(route, params=params, options=HOUSEKEEPING_REQUEST)
 
     def enter_chat(self, nickname, limit=20, captcha={}):
         route = Route(path=Endpoints.USER_CHAT_ENTER, url=self.url)
@@ -304,7 +469,51 @@ class HTTPClient:
 
         return self.request(route)
 
+    async def _restore_session(self, key):
+        """Use the session saved for ``key``, if it is still valid and signed in."""
+        session = await self.session_store.load(key)
+        max_age = self.session_store.max_age
+
+        if session is None or not is_session_valid(session, max_age):
+            return False
+
+        load_session(self._session.cookie_jar, session)
+        session_id = self.session_id
+
+        try:
+            # The server replaces session IDs it doesn't know anymore
+            await self.fetch_session()
+            restored = (
+                session_id is not None
+                and self.session_id == session_id
+                and is_signed_in(await self.fetch_info())
+            )
+        except RETRIED_ERRORS as e:
+            logger.warning("Could not restore the saved session: %s", type(e).__name__)
+            self._session.cookie_jar.clear()
+            return False
+
+        if not restored:
+            logger.info("The saved session expired, logging in again")
+            self._session.cookie_jar.clear()
+            await self.session_store.clear(key)
+
+        return restored
+
     async def login(self, email, password):
+        key = "{}@{}".format(email, self.host)
+
+        if self.session_store is not None and await self._restore_session(key):
+            logger.info("Restored the saved session")
+            return
+
+        await self._login(email, password)
+
+        if self.session_store is not None:
+            session = dump_session(self._session.cookie_jar)
+            await self.session_store.save(key, session)
+
+    async def _login(self, email, password):
         # Fetch CSRF token, necessary for posting the login, and session ID
         await self._fetch_account_session()
         # Post login
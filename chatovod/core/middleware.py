@@ -0,0 +1,109 @@
+import bisect
+import logging
+import time
+from collections import Counter
+
+log = logging.getLogger(__name__)
+
+# Upper bounds of the buckets of a LatencyHistogram, in seconds
+LATENCY_BUCKETS = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+)
+
+
+class LatencyHistogram:
+    """Distribution of the time spent by a middleware stage."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.reset()
+
+    def reset(self):
+        # Calls taking up to each bound, the last item counts the slower ones
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def record(self, elapsed):
+        self.counts[bisect.bisect_left(self.bounds, elapsed)] += 1
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class MiddlewareChain:
+    """Stages run on every adapted event before it reaches its handlers.
+
+    A stage is called with the event and returns it, returns another event
+    to replace it or returns `None` to drop it. Dropping an event only keeps
+    it from the registered handlers, the state of the chat is still updated.
+    A stage raising an error is logged and skipped, the event going on
+    to the next stage as it was.
+    """
+
+    def __init__(self):
+        self.stages = []
+        # LatencyHistogram, events dropped and errors raised of each stage, by name
+        self.histograms = {}
+        self.dropped = Counter()
+        self.errors = Counter()
+
+    def __len__(self):
+        return len(self.stages)
+
+    def add(self, stage, name=None):
+        """Add a stage after the current ones.
+
+        The name defaults to the name of the function of the stage.
+        """
+        if name is None:
+            name = getattr(stage, "__name__", type(stage).__name__)
+
+        if name in self.histograms:
+            raise ValueError("A stage named {0!r} already exists".format(name))
+
+        self.stages.append((name, stage))
+        self.histograms[name] = LatencyHistogram()
+
+    def remove(self, name):
+        self.stages = [(other, stage) for other, stage in self.stages if other != name]
+        self.histograms.pop(name, None)
+
+    def run(self, event):
+        """Run the stages on ``event``, return `None` if one of them dropped it."""
+        for name, stage in self.stages:
+            started_at = time.perf_counter()
+
+            try:
+                event = stage(event)
+            except Exception:
+                log.exception("Middleware stage %s failed on %s", name, event)
+                self.errors[name] += 1
+            finally:
+                self.histograms[name].record(time.perf_counter() - started_at)
+
+            if event is None:
+                self.dropped[name] += 1
+                break
+
+        return event
@@ -0,0 +1,80 @@
+from typing import Any, Dict
+
+
+class Options:
+    """Keyword options with defaults, rejecting the unknown ones.
+
+    Subclasses list every option they accept in ``defaults``, so a misspelt
+    option raises a `TypeError` instead of being silently ignored.
+    """
+
+    defaults: Dict[str, Any] = {}
+
+    def __init__(self, **options):
+        unknown = sorted(set(options).difference(self.defaults))
+
+        if unknown:
+            raise TypeError("Unknown options: {0}".format(", ".join(unknown)))
+
+        self.__dict__.update(self.defaults)
+        self.__dict__.update(options)
+
+    def __repr__(self):
+        return "{0}({1})".format(
+            type(self).__name__,
+            ", ".join("{0}={1!r}".format(*item) for item in vars(self).items()),
+        )
+
+
+class HTTPOptions(Options):
+    """Options of `HTTPClient`.
+
+    Each option is documented next to its default by the feature using it,
+    `Options` only validates them.
+    """
+
+    defaults = {
+        # TransportProfile of the connection pools, the default one when None
+        "transport": None,
+        # RequestScheduler pacing the requests, none are paced when None
+        "scheduler": None,
+        # JSON backend name or function decoding bytes, the fastest one when None
+        "json_decoder": None,
+        # SessionStore keeping the session cookies between runs, none when None
+        "session_store": None,
+    }
+
+
+class ClientOptions(Options):
+    """Options of `Client`, including those of `HTTPOptions`."""
+
+    defaults = dict(
+        HTTPOptions.defaults,
+        # Listening
+        streaming=False,
+        pipelined=False,
+        event_format="dict",
+        queue_size=10000,
+        queue_policy="block",
+        events=None,
+        room_concurrency=None,
+        # Reconnecting
+        reconnect=True,
+        reconnect_delay=1.0,
+        reconnect_max_delay=60.0,
+        reconnect_attempts=None,
+        # State of the chat
+        max_messages=1000,
+        max_message_bytes=None,
+        keep_history=False,
+        history_max_messages=100000,
+        history_max_bytes=None,
+        history_concurrency=3,
+        delete_interval=1.0,
+        delete_concurrency=3,
+        prefetch=(),
+        snapshot_path=None,
+    )
+
+    def http_options(self):
+        return {name: getattr(self, name) for name in HTTPOptions.defaults}
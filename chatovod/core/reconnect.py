@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+import logging
+import random
+
+from chatovod.api.events import APIAdapter
+
+from .chat import event_key
+from .errors import RETRIED_ERRORS
+
+log = logging.getLogger(__name__)
+
+
+class ReconnectStats:
+    """Counters of a `Reconnector`."""
+
+    __slots__ = ("reconnects", "attempts", "failed", "replayed")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.reconnects = 0
+        # Attempts to restore a connection, including the failed ones
+        self.attempts = 0
+        self.failed = 0
+        # Events missed during a gap, handled once the connection is restored
+        self.replayed = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Reconnector:
+    """Listen to the events of a chat, restoring its connection when lost.
+
+    When a bind fails with one of `RETRIED_ERRORS`, the session and the chat
+    info are fetched again to restore the window id, keeping the messages of
+    the chat and updating its rooms and users. Attempts are spaced by
+    a random delay of up to ``base_delay`` seconds, doubled after each failed
+    attempt up to ``max_delay``, and stop after ``max_attempts``, if set.
+
+    Events of the chat info missed during the gap are handled, and the first
+    bind after the gap drops the events already received, by their timestamps
+    and their `event_key`.
+    """
+
+    def __init__(self, chat, base_delay=1.0, max_delay=60.0, max_attempts=None):
+        if max_attempts is not None and max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1, or None")
+
+        self.chat = chat
+        self.loop = chat.loop
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.stats = ReconnectStats()
+
+    def delay(self, attempt):
+        """Seconds to wait before the attempt number ``attempt``, from 0."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def listen_forever(self):
+        listener = self.chat._event_listener
+
+        while True:
+            try:
+                await listener.listen_forever()
+            except RETRIED_ERRORS as e:
+                log.warning("Connection lost after a %s error", type(e).__name__)
+                await self.reconnect()
+
+    async def reconnect(self):
+        """Restore the connection, raising the last error if out of attempts."""
+        if self.max_attempts is None:
+            attempts = itertools.count()
+        else:
+            attempts = range(self.max_attempts)
+
+        error = None
+
+        for attempt in attempts:
+            await asyncio.sleep(self.delay(attempt))
+            self.stats.attempts += 1
+
+            try:
+                await self._rebind()
+            except RETRIED_ERRORS as e:
+                self.stats.failed += 1
+                log.warning("A %s error occurred reconnecting", type(e).__name__)
+                error = e
+                continue
+
+            self.stats.reconnects += 1
+            log.info("Reconnected after %d attempts", attempt + 1)
+            return
+
+        raise error
+
+    async def _rebind(self):
+        http = self.chat._http
+
+        # The parts of Chat._start giving a new window
+        await http.fetch_session()
+        info = await http.fetch_info()
+
+        self.replay(info)
+
+    def replay(self, msg_stream):
+        """Handle the events of the chat info missed during the gap.
+
+        Options, such as the window id, are set again and the rooms and users
+        are updated to those of the info. The other events without a timestamp
+        describe the state kept by the chat and are left out.
+        """
+        chat = self.chat
+        listener = chat._event_listener
+        last_event_ts = chat._last_event_ts
+        received = frozenset(listener.latest_keys)
+        replayed_until = last_event_ts
+        replayed = set(received)
+
+        chat._event_handler.reconcile(msg_stream)
+
+        for data in msg_stream:
+            timestamp = data.get("ts")
+
+            if data.get("t") == "so":
+                chat._event_handler.parse_set_option(APIAdapter.adapt(data))
+                continue
+
+            if not isinstance(timestamp, int):
+                continue
+
+            key = event_key(data)
+
+            if replayed_until is None or timestamp > replayed_until:
+                replayed_until = timestamp
+                replayed = {key}
+            elif timestamp == replayed_until:
+                replayed.add(key)
+
+            # Without events received, the chat info is only the initial state
+            if last_event_ts is not None and (
+                timestamp > last_event_ts
+                or timestamp == last_event_ts
+                and key not in received
+            ):
+                self.stats.replayed += 1
+                listener.received_event(data)
+
+        listener.replayed_until = replayed_until
+        listener.replayed = frozenset(replayed)
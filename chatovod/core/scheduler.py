@@ -0,0 +1,170 @@
+import bisect
+import itertools
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """The order in which queued requests are sent. Lower goes first."""
+
+    moderation = 0
+    chat = 1
+    housekeeping = 2
+
+
+class TokenBucket:
+    """A token bucket refilled at ``rate`` tokens per second."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate, capacity=None, now=0.0):
+        self.rate = rate
+        # The size of a burst
+        self.capacity = rate if capacity is None else capacity
+        self.tokens = self.capacity
+        self.updated_at = now
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def has_token(self, now):
+        self._refill(now)
+        return self.tokens >= 1
+
+    def consume(self):
+        self.tokens -= 1
+
+    def delay(self, now):
+        """Seconds until a token is available."""
+        self._refill(now)
+
+        if self.tokens >= 1:
+            return 0.0
+
+        return (1 - self.tokens) / self.rate
+
+
+class SchedulerStats:
+    """Counters of the requests sent with a given priority."""
+
+    __slots__ = ("sent", "queued", "wait_time", "max_wait_time")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.sent = 0
+        self.queued = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def record(self, waited):
+        self.sent += 1
+
+        if waited > 0:
+            self.queued += 1
+            self.wait_time += waited
+            self.max_wait_time = max(self.max_wait_time, waited)
+
+
+class RequestScheduler:
+    """Pace outbound requests with token buckets and send them by priority.
+
+    Every request takes a token from the bucket of its route and one from
+    a bucket shared by all routes. When tokens run out, requests wait in
+    a queue ordered by :class:`Priority`, then by arrival. ``rate`` and
+    ``capacity`` apply across all routes, ``route_rate`` and ``route_capacity``
+    to each route.
+    """
+
+    def __init__(self, loop, rate=10, capacity=20, route_rate=5, route_capacity=10):
+        self.loop = loop
+        self.route_rate = route_rate
+        self.route_capacity = route_capacity
+
+        self._bucket = TokenBucket(rate, capacity, now=loop.time())
+        self._route_buckets = {}
+        self._waiters = []
+        self._counter = itertools.count()
+        self._timer = None
+
+        self.stats = {priority: SchedulerStats() for priority in Priority}
+
+    @property
+    def queue_depth(self):
+        return sum(1 for waiter in self._waiters if not waiter[3].done())
+
+    def queue_depth_of(self, priority):
+        return sum(
+            1
+            for waiter in self._waiters
+            if waiter[0] == priority and not waiter[3].done()
+        )
+
+    def set_limit(self, route, rate, capacity=None):
+        """Set the rate of a single route, usually an ``APIEndpoint``."""
+        self._route_buckets[route] = TokenBucket(rate, capacity, now=self.loop.time())
+
+    def _get_bucket(self, route):
+        bucket = self._route_buckets.get(route)
+
+        if bucket is None:
+            bucket = TokenBucket(
+                self.route_rate, self.route_capacity, now=self.loop.time()
+            )
+            self._route_buckets[route] = bucket
+
+        return bucket
+
+    async def wait(self, route, priority=Priority.chat):
+        """Wait until a request to ``route`` may be sent."""
+        now = self.loop.time()
+        future = self.loop.create_future()
+        waiter = (priority, next(self._counter), route, future, now)
+
+        bisect.insort(self._waiters, waiter)
+        self._wake_up(now)
+
+        # Cancelled waiters are skipped by _wake_up
+        await future
+
+    def _wake_up(self, now=None):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if now is None:
+            now = self.loop.time()
+        delay = None
+        remaining = []
+
+        for waiter in self._waiters:
+            priority, _, route, future, queued_at = waiter
+
+            if future.done():
+                continue
+
+            bucket = self._get_bucket(route)
+
+            if self._bucket.has_token(now) and bucket.has_token(now):
+                self._bucket.consume()
+                bucket.consume()
+
+                self.stats[priority].record(now - queued_at)
+                future.set_result(None)
+            else:
+                remaining.append(waiter)
+
+                waiter_delay = max(self._bucket.delay(now), bucket.delay(now))
+                delay = waiter_delay if delay is None else min(delay, waiter_delay)
+
+        self._waiters = remaining
+
+        if delay is not None:
+            self._timer = self.loop.call_later(delay, self._wake_up)
@@ -0,0 +1,173 @@
+"""Stores keeping the session cookies of a client between runs.
+
+Restoring a session lets `HTTPClient.login` skip the login requests.
+A store only needs to implement `SessionStore.load`, `SessionStore.save`
+and `SessionStore.clear`, e.g. on top of a database shared by several bots.
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from http.cookies import SimpleCookie
+
+from yarl import URL
+
+from .cookies import cookie_expiry
+
+log = logging.getLogger(__name__)
+
+# Cookies of the session: the CSRF token and the session ID, over HTTPS or not
+SESSION_COOKIES = ("csrf", "ssid", "sid")
+
+
+def dump_session(cookie_jar, now=None):
+    """Build the session record of the session cookies of ``cookie_jar``."""
+    now = time.time() if now is None else now
+    cookies = [
+        {
+            "name": morsel.key,
+            "value": morsel.value,
+            "domain": morsel["domain"],
+            "path": morsel["path"] or "/",
+            "expires": cookie_expiry(morsel, now),
+        }
+        for morsel in cookie_jar
+        if morsel.key in SESSION_COOKIES
+    ]
+
+    return {"saved_at": now, "cookies": cookies}
+
+
+def is_session_valid(session, max_age, now=None):
+    """Whether no cookie of ``session`` expired and it is not too old."""
+    now = time.time() if now is None else now
+
+    if not session.get("cookies") or now - session["saved_at"] > max_age:
+        return False
+
+    return all(
+        cookie["expires"] is None or cookie["expires"] > now
+        for cookie in session["cookies"]
+    )
+
+
+def is_signed_in(info):
+    """Whether the chat info ``info``, from `HTTPClient.fetch_info`, is signed in."""
+    return isinstance(info, list) and any(
+        data.get("t") == "so" and data.get("k") == "signedIn" and data.get("v")
+        for data in info
+    )
+
+
+def load_session(cookie_jar, session):
+    """Add the cookies of a session record to ``cookie_jar``."""
+    for cookie in session["cookies"]:
+        morsel = SimpleCookie()
+        morsel[cookie["name"]] = cookie["value"]
+        morsel[cookie["name"]]["path"] = cookie["path"]
+
+        domain = cookie["domain"]
+        if domain.startswith("."):
+            # Shared with the subdomains
+            morsel[cookie["name"]]["domain"] = domain
+
+        response_url = URL.build(scheme="https", host=domain.lstrip("."))
+        cookie_jar.update_cookies(morsel, response_url=response_url)
+
+
+class SessionStore(metaclass=abc.ABCMeta):
+    """Base class of the stores of session records, by key."""
+
+    # Seconds after which a saved session isn't used, even if it didn't expire
+    max_age = 7 * 24 * 60 * 60
+
+    @abc.abstractmethod
+    async def load(self, key):
+        """Return the session record saved for ``key``, or `None`."""
+
+    @abc.abstractmethod
+    async def save(self, key, session):
+        """Save the session record ``session`` for ``key``."""
+
+    @abc.abstractmethod
+    async def clear(self, key):
+        """Remove the session record saved for ``key``, if any."""
+
+
+class MemorySessionStore(SessionStore):
+    """Keep sessions for the lifetime of the process."""
+
+    def __init__(self):
+        self.sessions = {}
+
+    async def load(self, key):
+        return self.sessions.get(key)
+
+    async def save(self, key, session):
+        self.sessions[key] = session
+
+    async def clear(self, key):
+        self.sessions.pop(key, None)
+
+
+class FileSessionStore(SessionStore):
+    """Keep sessions in a JSON file, readable by its owner only.
+
+    The file is read and written in the default executor of the event loop.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Updates read and write the whole file, one at a time
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                sessions = json.load(file)
+        except FileNotFoundError:
+            sessions = {}
+        except ValueError:
+            log.warning("Ignoring the invalid session file %s", self.path)
+            sessions = {}
+
+        return sessions
+
+    def _write(self, sessions):
+        temporary_path = "{}.tmp".format(self.path)
+        # The cookies give access to the account, keep them private
+        descriptor = os.open(
+            temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600
+        )
+
+        with open(descriptor, "w", encoding="utf-8") as file:
+            json.dump(sessions, file)
+
+        os.replace(temporary_path, self.path)
+
+    def _update(self, key, session):
+        with self._lock:
+            sessions = self._read()
+
+            if session is not None:
+                sessions[key] = session
+                self._write(sessions)
+            elif sessions.pop(key, None) is not None:
+                self._write(sessions)
+
+    def _run(self, function, *args):
+        return asyncio.get_event_loop().run_in_executor(None, function, *args)
+
+    async def load(self, key):
+        sessions = await self._run(self._read)
+        return sessions.get(key)
+
+    async def save(self, key, session):
+        await self._run(self._update, key, session)
+
+    async def clear(self, key):
+        await self._run(self._update, key, None)
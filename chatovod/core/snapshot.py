@@ -0,0 +1,112 @@
+"""Snapshots of the state of a `Chat`, to start serving before it is fetched.
+
+A snapshot is a JSON document compressed with gzip. It holds the rooms,
+the users and the timestamp of the last event received, in the format of
+the events they were created from.
+"""
+
+import gzip
+import json
+import logging
+import os
+import time
+
+from chatovod.structures.room import Room
+from chatovod.structures.user import User
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+
+
+def _dump_room(room):
+    return {
+        "room_id": room.id,
+        "type": room.type.value,
+        "name": room.name,
+        "can_be_closed": room.can_be_closed,
+        "display_user_flow": room.display_user_flow,
+    }
+
+
+def _dump_user(user):
+    return {
+        "nick": user.nickname,
+        "id": user.id,
+        "sx": user.gender.value,
+        "g": user.group.value,
+        "s": user.status.value,
+        "c": user.nickname_colour,
+        "tc": user.message_colour,
+        "vip": user.vip,
+        "b": user.bold_nickname,
+        "tb": user.bold_message,
+    }
+
+
+def take_snapshot(chat):
+    return {
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "last_event_ts": chat._last_event_ts,
+        "rooms": [_dump_room(room) for room in chat._rooms.values()],
+        "users": [_dump_user(user) for user in chat._users],
+    }
+
+
+def restore_snapshot(chat, snapshot):
+    """Replace the rooms and users of ``chat`` with those of ``snapshot``.
+
+    Returns `False`, leaving the chat empty, when the snapshot can't be used.
+    """
+    chat._rooms.clear()
+    chat._users.clear()
+
+    try:
+        for data in snapshot.get("rooms", ()):
+            chat._add_room(Room(data=data))
+
+        for data in snapshot.get("users", ()):
+            chat._add_user(User(event=data))
+    except (KeyError, TypeError, ValueError) as e:
+        log.warning("Ignoring the incomplete snapshot: %r", e)
+        chat._rooms.clear()
+        chat._users.clear()
+        restored = False
+    else:
+        chat._last_event_ts = snapshot.get("last_event_ts")
+        restored = True
+
+    return restored
+
+
+def write_snapshot(snapshot, path):
+    """Write ``snapshot`` to ``path``, replacing it only once fully written."""
+    content = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":"))
+    temporary_path = "{}.tmp".format(path)
+
+    with gzip.open(temporary_path, "wb") as file:
+        file.write(content.encode("utf-8"))
+
+    os.replace(temporary_path, path)
+
+
+def read_snapshot(path):
+    """Read the snapshot at ``path``.
+
+    Returns `None` when there is none, or when it can't be used.
+    """
+    try:
+        with gzip.open(path, "rb") as file:
+            snapshot = json.loads(file.read().decode("utf-8"))
+    except FileNotFoundError:
+        snapshot = None
+    except (OSError, ValueError) as e:
+        log.warning("Ignoring the invalid snapshot %s: %s", path, e)
+        snapshot = None
+
+    if snapshot is not None and snapshot.get("version") != SNAPSHOT_VERSION:
+        log.info("Ignoring the snapshot %s of another version", path)
+        snapshot = None
+
+    return snapshot
@@ -0,0 +1,71 @@
+import time
+from typing import NamedTuple, Optional
+
+import aiohttp
+
+
+class TransportProfile(NamedTuple):
+    """Connection settings used by :class:`HTTPClient`."""
+
+    # Simultaneous connections, 0 for no limit
+    limit: int = 100
+    limit_per_host: int = 0
+    # Seconds an idle connection is kept open, and a resolved host cached
+    keepalive_timeout: float = 15.0
+    ttl_dns_cache: Optional[int] = 10
+    # Give the long-poll a connection outside of the pool of the other requests
+    reserve_bind_connection: bool = True
+
+    def create_connector(self, loop, limit=None):
+        return aiohttp.TCPConnector(
+            limit=self.limit if limit is None else limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+            loop=loop,
+        )
+
+
+class TransportStats:
+    """Counters of the connection pool usage."""
+
+    __slots__ = ("queued", "queued_time", "max_queued_time", "created", "reused")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.queued = 0
+        self.queued_time = 0.0
+        self.max_queued_time = 0.0
+        self.created = 0
+        self.reused = 0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def create_trace_config(self):
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_queued_start(session, context, params):
+            context.queued_at = time.perf_counter()
+
+        async def on_queued_end(session, context, params):
+            waited = time.perf_counter() - context.queued_at
+
+            self.queued += 1
+            self.queued_time += waited
+            self.max_queued_time = max(self.max_queued_time, waited)
+
+        async def on_create_end(session, context, params):
+            self.created += 1
+
+        async def on_reuse(session, context, params):
+            self.reused += 1
+
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+
+        return trace_config
@@ -0,0 +1,89 @@
+import sys
+
+
+def nickname_key(nickname):
+    """The key of a nickname in a `UserRegistry`, ignoring its case."""
+    return sys.intern(nickname.casefold())
+
+
+class UserRegistry:
+    """The users of the chat, indexed by nickname, by id and by room.
+
+    Nicknames are matched regardless of their case, using interned
+    casefolded keys. Every update is done in constant time.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._ids = {}
+        self._rooms = {}
+        self._user_rooms = {}
+
+    def __len__(self):
+        return len(self._users)
+
+    def __iter__(self):
+        return iter(self._users.values())
+
+    def __contains__(self, nickname):
+        return nickname_key(nickname) in self._users
+
+    def get(self, nickname):
+        return self._users.get(nickname_key(nickname))
+
+    def get_by_id(self, user_id):
+        return self._ids.get(user_id)
+
+    def add(self, user):
+        """Add ``user``, replacing the user with the same nickname."""
+        key = nickname_key(user.nickname)
+        user.nickname = sys.intern(user.nickname)
+
+        previous = self._users.get(key)
+        if previous is not None and previous.id is not None:
+            self._ids.pop(previous.id, None)
+
+        self._users[key] = user
+
+        if user.id is not None:
+            self._ids[user.id] = user
+
+    def remove(self, nickname):
+        """Remove and return the user with ``nickname``, if any.
+
+        The user also leaves every room.
+        """
+        key = nickname_key(nickname)
+        user = self._users.pop(key, None)
+
+        if user is not None and user.id is not None:
+            self._ids.pop(user.id, None)
+
+        for room_id in self._user_rooms.pop(key, ()):
+            self._rooms[room_id].discard(key)
+
+        return user
+
+    def enter_room(self, nickname, room_id):
+        key = nickname_key(nickname)
+        self._rooms.setdefault(room_id, set()).add(key)
+        self._user_rooms.setdefault(key, set()).add(room_id)
+
+    def leave_room(self, nickname, room_id):
+        key = nickname_key(nickname)
+        self._rooms.get(room_id, set()).discard(key)
+        self._user_rooms.get(key, set()).discard(room_id)
+
+    def in_room(self, room_id):
+        """The known users in the room."""
+        users = self._users
+        return [users[key] for key in self._rooms.get(room_id, ()) if key in users]
+
+    def rooms_of(self, nickname):
+        return set(self._user_rooms.get(nickname_key(nickname), ()))
+
+    def clear(self):
+        self._users.clear()
+        self._ids.clear()
+        self._rooms.clear()
+        self._user_rooms.clear()
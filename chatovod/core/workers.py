@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+# Raw key of the room of an event
+ROOM_ATTRIBUTE = "r"
+
+
+class RoomWorkers:
+    """Handle the events of each room on a worker of its own.
+
+    Events of the same room are handled one at a time in the order they
+    were received, while the events of different rooms are handled
+    concurrently. Events without a room share a single worker.
+
+    Only coroutine handlers run concurrently, a slow synchronous handler
+    still blocks the event loop.
+    """
+
+    def __init__(self, loop, handle, concurrency=10):
+        self.loop = loop
+        # Events handled at the same time, across all rooms
+        self.concurrency = concurrency
+        self._handle = handle
+        # Created by the first worker, so it belongs to the running loop
+        self._semaphore = None
+        self._queues = {}
+        self._workers = {}
+        self._pending = 0
+        self._space_waiters = []
+
+    @property
+    def pending(self):
+        """Number of events waiting to be handled."""
+        return self._pending
+
+    @property
+    def rooms(self):
+        """Rooms which currently have a worker."""
+        return list(self._workers)
+
+    def submit(self, data, *args):
+        """Queue ``data`` on the worker of its room, ``args`` are passed to handle."""
+        room_id = data.get(ROOM_ATTRIBUTE)
+        queue = self._queues.get(room_id)
+
+        if queue is None:
+            queue = self._queues[room_id] = deque()
+            self._workers[room_id] = self.loop.create_task(self._work(room_id, queue))
+
+        queue.append((data, args))
+        self._pending += 1
+
+    async def wait_for_space(self, maxsize):
+        """Wait until less than ``maxsize`` events are pending, ``0`` for no limit."""
+        while 0 < maxsize <= self._pending:
+            waiter = self.loop.create_future()
+            self._space_waiters.append(waiter)
+            await waiter
+
+    def _handled(self, count=1):
+        self._pending -= count
+        waiters, self._space_waiters = self._space_waiters, []
+
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _work(self, room_id, queue):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        try:
+            while queue:
+                data, args = queue[0]
+
+                async with self._semaphore:
+                    try:
+                        await self._handle(data, *args)
+                    except Exception:
+                        log.exception("Error while handling %s in %s", data, room_id)
+
+                queue.popleft()
+                self._handled()
+        finally:
+            # Events dropped by close
+            if queue:
+                self._handled(len(queue))
+
+            # Workers stop once their room is idle, the next event starts a new one
+            del self._queues[room_id]
+            del self._workers[room_id]
+
+    async def join(self):
+        """Wait until every submitted event has been handled."""
+        while self._workers:
+            await asyncio.wait(list(self._workers.values()))
+
+    async def close(self):
+        """Cancel the workers, dropping the events not handled yet."""
+        workers = list(self._workers.values())
+
+        for worker in workers:
+            worker.cancel()
+
+        if workers:
+            await asyncio.wait(workers)
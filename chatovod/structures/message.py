@@ -2,6 +2,20 @@ from chatovod.structures import abc as ChatovodABC
 
 
 class Message(ChatovodABC.Message):
+
+    __slots__ = (
+        "chat",
+        "room",
+        "id",
+        "author",
+        "content",
+        "to",
+        "cmd_me",
+        "seen",
+        "_old",
+        "fetched",
+    )
+
     def __init__(self, *, chat, room, data):
         self.chat = chat
         self.room = room
@@ -47,7 +47,8 @@ class User:
 
     def __init__(self, *, event):
         self.nickname = event["nick"]
-        self.id = str(event.get("id"))
+        user_id = event.get("id")
+        self.id = None if user_id is None else str(user_id)
 
         self.gender = Gender(event.get("sx"))
         self.group = Group(event.get("g"))
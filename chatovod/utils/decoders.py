@@ -0,0 +1,49 @@
+"""JSON backends used to decode the API responses.
+
+orjson and ujson are used when installed, as they parse
+the raw bytes of a response considerably faster than the standard library.
+"""
+
+import json
+from typing import Any, Callable, Dict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+try:
+    import ujson  # type: ignore
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+JSON_DECODERS: Dict[str, Callable[[bytes], Any]] = {"json": json.loads}
+
+if orjson is not None:
+    JSON_DECODERS["orjson"] = orjson.loads
+
+if ujson is not None:
+    JSON_DECODERS["ujson"] = ujson.loads
+
+# Fastest first
+PREFERRED_DECODERS = ("orjson", "ujson", "json")
+
+
+def get_json_decoder(backend=None):
+    """Return a function decoding JSON from bytes.
+
+    :param backend: the name of the backend, a function taking bytes,
+    or `None` to use the fastest installed backend.
+    Unknown or missing backends raise a `ValueError`.
+    """
+    if callable(backend):
+        return backend
+
+    if backend is None:
+        backend = next(name for name in PREFERRED_DECODERS if name in JSON_DECODERS)
+
+    try:
+        return JSON_DECODERS[backend]
+    except KeyError:
+        raise ValueError("JSON backend {0!r} is not installed".format(backend))
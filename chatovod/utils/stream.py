@@ -0,0 +1,182 @@
+import json
+import re
+
+_ARRAY_START = 0
+_FIRST_ELEMENT = 1
+_ELEMENT = 2
+_SEPARATOR = 3
+_END = 4
+_DOCUMENT = 5
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+# Characters changing the nesting of an element, or ending it
+_STRUCTURAL = re.compile(rb'["\[\]{},]')
+# The rest of a string, up to its closing quote
+_STRING_END = re.compile(rb'(?:[^"\\]|\\.)*"', re.DOTALL)
+
+_QUOTE = ord('"')
+_OPENING = frozenset(b"[{")
+_CLOSING = frozenset(b"]}")
+
+
+class JSONArrayParser:
+    """Parse the elements of a JSON array as its bytes arrive.
+
+    Each call to `feed` returns the elements completed by the chunk.
+    The bytes of each element are decoded with ``loads``, e.g. one of
+    `chatovod.utils.decoders.JSON_DECODERS`.
+    If the document is not an array, e.g. an error object,
+    nothing is returned until `close`, which returns the whole document.
+    """
+
+    def __init__(self, loads=json.loads):
+        self._loads = loads
+        self._buffer = b""
+        self._position = 0
+        self._state = _ARRAY_START
+        # Where the scan of the current element stopped, see _find_element_end
+        self._scan = 0
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def is_array(self):
+        """`True` or `False` once the first character is known, else `None`."""
+        if self._state == _ARRAY_START:
+            return None
+
+        return self._state != _DOCUMENT
+
+    def _skip_whitespace(self):
+        self._position = _WHITESPACE.match(self._buffer, self._position).end()
+
+        return self._position < len(self._buffer)
+
+    def _error(self, message):
+        document = self._buffer.decode("utf-8", "replace")
+        return json.JSONDecodeError(message, document, self._position)
+
+    def _find_element_end(self, final):
+        """End of the element at the current position, `None` if incomplete."""
+        buffer = self._buffer
+        scan = max(self._scan, self._position)
+        depth = self._depth
+        end = None
+
+        while end is None:
+            if self._in_string:
+                match = _STRING_END.match(buffer, scan)
+
+                if match is None:
+                    break
+
+                scan = match.end()
+                self._in_string = False
+
+                if depth == 0:
+                    end = scan
+
+                continue
+
+            match = _STRUCTURAL.search(buffer, scan)
+
+            if match is None:
+                break
+
+            char = buffer[match.start()]
+            scan = match.end()
+
+            if char == _QUOTE:
+                self._in_string = True
+            elif char in _OPENING:
+                depth += 1
+            elif depth == 0:
+                # A number or a literal, ended by the separator or the array
+                end = match.start()
+            elif char in _CLOSING:
+                depth -= 1
+
+                if depth == 0:
+                    end = scan
+
+        self._scan = scan
+        self._depth = depth
+
+        # Only a number or a literal can end with the document
+        if end is None and final and depth == 0 and not self._in_string:
+            end = len(buffer)
+
+        return end
+
+    def _parse(self, final=False):
+        elements = []
+
+        while self._state not in (_DOCUMENT, _END) and self._skip_whitespace():
+            char = self._buffer[self._position]
+
+            if self._state == _ARRAY_START:
+                if char == ord("["):
+                    self._position += 1
+                    self._state = _FIRST_ELEMENT
+                else:
+                    self._state = _DOCUMENT
+            elif self._state == _FIRST_ELEMENT:
+                if char == ord("]"):
+                    self._position += 1
+                    self._state = _END
+                else:
+                    self._state = _ELEMENT
+            elif self._state == _ELEMENT:
+                end = self._find_element_end(final)
+
+                if end is None:
+                    break
+
+                elements.append(self._loads(self._buffer[self._position : end]))
+                self._position = end
+                self._scan = 0
+                self._depth = 0
+                self._state = _SEPARATOR
+            elif self._state == _SEPARATOR:
+                if char == ord(","):
+                    self._state = _ELEMENT
+                elif char == ord("]"):
+                    self._state = _END
+                else:
+                    raise self._error("Expecting ',' delimiter")
+
+                self._position += 1
+
+        if self._state != _DOCUMENT:
+            # Drop what was already parsed
+            self._buffer = self._buffer[self._position :]
+            self._scan = max(self._scan - self._position, 0)
+            self._position = 0
+
+        return elements
+
+    def feed(self, chunk):
+        """Add a chunk of bytes and return the elements completed by it."""
+        self._buffer += chunk
+        return self._parse()
+
+    def close(self):
+        """Finish parsing and return the remaining elements.
+
+        When the document is not an array, the decoded document is returned.
+        Incomplete documents raise a `json.JSONDecodeError`.
+        """
+        if self._state == _ARRAY_START:
+            self._skip_whitespace()
+            # An empty body is not a valid document either
+            self._state = _DOCUMENT
+
+        if self._state == _DOCUMENT:
+            return self._loads(self._buffer)
+
+        elements = self._parse(final=True)
+
+        if self._state != _END:
+            raise self._error("Unterminated array")
+
+        return elements
@@ -2,8 +2,13 @@ import pytest
 
 from chatovod.api.event_adapter import (
     API_EVENT_TYPE_ATTRIBUTE,
+    Event,
     EventAdapter,
+    EventNotRegisteredError,
     EventsCollection,
+    EventView,
+    compile_adapter,
+    compile_event_class,
 )
 
 
@@ -81,3 +86,204 @@ class TestEventAdapter:
             "id": 1,
             "user": "Admin",
         }
+
+    def test_adapt_unregistered_event(self, fake_api_data: dict):
+        event_adapter = EventAdapter(EventsCollection())
+
+        with pytest.raises(EventNotRegisteredError):
+            event_adapter.adapt(fake_api_data)
+
+
+class FakeAPIEventChainedTransforms:
+    event_type = "c"
+    new_type = "chained"
+    transforms = {"a": "b", "b": "c"}
+
+
+class TestCompileAdapter:
+    def test_renames_and_patches_type(self, fake_api_new_type_data: dict):
+        adapt = compile_adapter(FakeAPIEventNewType)
+
+        assert adapt(fake_api_new_type_data) == {
+            API_EVENT_TYPE_ATTRIBUTE: FakeAPIEventNewType.new_type,
+            "id": 1,
+            "user": "Admin",
+        }
+
+    def test_does_not_modify_data(self, fake_api_new_type_data: dict):
+        adapt = compile_adapter(FakeAPIEventNewType)
+        data = dict(fake_api_new_type_data)
+
+        adapt(data)
+
+        assert data == fake_api_new_type_data
+
+    def test_missing_keys_are_skipped(self):
+        adapt = compile_adapter(FakeAPIEventNewType)
+
+        assert adapt({API_EVENT_TYPE_ATTRIBUTE: "u", "i": 1}) == {
+            API_EVENT_TYPE_ATTRIBUTE: FakeAPIEventNewType.new_type,
+            "id": 1,
+        }
+
+    def test_keeps_type_without_new_type(self, fake_api_data: dict):
+        adapt = compile_adapter(FakeAPIEvent)
+
+        assert adapt(fake_api_data)[API_EVENT_TYPE_ATTRIBUTE] == "u"
+
+    def test_chained_renames_are_done_at_once(self):
+        adapt = compile_adapter(FakeAPIEventChainedTransforms)
+
+        assert adapt({API_EVENT_TYPE_ATTRIBUTE: "c", "a": 1, "b": 2}) == {
+            API_EVENT_TYPE_ATTRIBUTE: "chained",
+            "b": 1,
+            "c": 2,
+        }
+
+    def test_matches_transform(self, api_data: dict, api_transform: dict):
+        class FakeAPIRoomEvent:
+            event_type = "r"
+            transforms = api_transform
+
+        adapt = compile_adapter(FakeAPIRoomEvent)
+
+        assert adapt(api_data) == EventAdapter(None).transform(  # type: ignore
+            api_data, api_transform
+        )
+
+
+class TestEventView:
+    @pytest.fixture
+    def view(self, fake_api_new_type_data: dict):
+        collection = EventsCollection()
+        collection.register(FakeAPIEventNewType)
+
+        return EventAdapter(collection).view(fake_api_new_type_data)
+
+    def test_keys_are_translated(self, view: EventView):
+        assert view[API_EVENT_TYPE_ATTRIBUTE] == FakeAPIEventNewType.new_type
+        assert view["id"] == 1
+        assert view.get("user") == "Admin"
+        assert view.get("missing", 2) == 2
+
+    def test_renamed_keys_are_hidden(self, view: EventView):
+        assert "i" not in view
+        assert view.get("i") is None
+
+        with pytest.raises(KeyError):
+            view["i"]
+
+    def test_data_is_not_copied(self, view: EventView, fake_api_new_type_data):
+        assert view.raw is fake_api_new_type_data
+
+    def test_matches_adapt(self, view: EventView):
+        adapted_data = {
+            API_EVENT_TYPE_ATTRIBUTE: FakeAPIEventNewType.new_type,
+            "id": 1,
+            "user": "Admin",
+        }
+
+        assert view.to_dict() == adapted_data
+        assert dict(view) == adapted_data
+        assert list(view) == list(adapted_data)
+        assert len(view) == len(adapted_data)
+        assert view == adapted_data
+
+    def test_chained_renames(self):
+        collection = EventsCollection()
+        collection.register(FakeAPIEventChainedTransforms)
+        view = EventAdapter(collection).view({API_EVENT_TYPE_ATTRIBUTE: "c", "a": 1})
+
+        assert view["b"] == 1
+        assert "a" not in view
+        assert "c" not in view
+
+    def test_view_of_unregistered_event(self, fake_api_data: dict):
+        with pytest.raises(EventNotRegisteredError):
+            EventAdapter(EventsCollection()).view(fake_api_data)
+
+
+class TestCompileEventClass:
+    @pytest.fixture
+    def event_class(self):
+        return compile_event_class(FakeAPIEventNewType)
+
+    def test_keeps_the_structure(self, event_class):
+        assert event_class.__name__ == FakeAPIEventNewType.__name__
+        assert event_class.event_type == FakeAPIEventNewType.event_type
+        assert event_class.new_type == FakeAPIEventNewType.new_type
+        assert event_class.transforms == FakeAPIEventNewType.transforms
+        assert issubclass(event_class, Event)
+
+    def test_fields_are_slots(self, event_class, fake_api_new_type_data: dict):
+        event = event_class(fake_api_new_type_data)
+
+        assert event_class.__slots__ == ("id", "user")
+        assert event.id == 1
+        assert event.user == "Admin"
+        assert not hasattr(event, "__dict__")
+
+    def test_missing_fields_are_none(self, event_class):
+        event = event_class({API_EVENT_TYPE_ATTRIBUTE: "u"})
+
+        assert event.user is None
+        # Only as attributes, they are not items
+        assert "user" not in event
+        assert event.get("user", "Nobody") == "Nobody"
+        assert event.to_dict() == {API_EVENT_TYPE_ATTRIBUTE: "user"}
+
+    def test_none_values_are_kept(self, event_class):
+        event = event_class({API_EVENT_TYPE_ATTRIBUTE: "u", "i": 1, "u": None})
+
+        assert "user" in event
+        assert event.get("user", "Nobody") is None
+        assert event == {API_EVENT_TYPE_ATTRIBUTE: "user", "id": 1, "user": None}
+        assert event != {API_EVENT_TYPE_ATTRIBUTE: "user", "id": 1}
+
+    def test_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            Event({})
+
+    def test_keys_without_transform(self, event_class):
+        event = event_class({API_EVENT_TYPE_ATTRIBUTE: "u", "i": 1, "vip": True})
+
+        assert event.vip is True
+        assert event["vip"] is True
+
+        with pytest.raises(AttributeError):
+            event.missing
+
+    def test_items(self, event_class, fake_api_new_type_data: dict):
+        event = event_class(fake_api_new_type_data)
+
+        assert event[API_EVENT_TYPE_ATTRIBUTE] == FakeAPIEventNewType.new_type
+        assert event["user"] == "Admin"
+        assert event.get("i") is None
+        assert "id" in event
+
+        with pytest.raises(KeyError):
+            event["i"]
+
+    def test_matches_adapt(self, event_class, fake_api_new_type_data: dict):
+        collection = EventsCollection()
+        collection.register(FakeAPIEventNewType)
+        adapter = EventAdapter(collection)
+
+        event = adapter.build(fake_api_new_type_data)
+
+        assert isinstance(event, Event)
+        assert event.to_dict() == adapter.adapt(fake_api_new_type_data)
+        assert event == adapter.adapt(fake_api_new_type_data)
+
+    def test_reserved_names_are_not_slots(self):
+        class FakeAPIEventReservedNames:
+            event_type = "x"
+            transforms = {"g": "get", "c": "class", "n": "new-name"}
+
+        event_class = compile_event_class(FakeAPIEventReservedNames)
+        event = event_class({API_EVENT_TYPE_ATTRIBUTE: "x", "g": 1, "c": 2, "n": 3})
+
+        assert event_class.__slots__ == ()
+        assert event["get"] == 1
+        assert event["class"] == 2
+        assert event["new-name"] == 3
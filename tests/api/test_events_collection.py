@@ -1,6 +1,7 @@
 import pytest
 
 from chatovod.api.event_adapter import EventNotRegisteredError, EventsCollection
+from chatovod.api.events import APIAdapter
 
 
 class BlankEvent:
@@ -14,11 +15,30 @@ class TestEventsCollection:
 
         assert BlankEvent is not None
         assert blank_event is not None
+        assert blank_event.event_type == BlankEvent.event_type
         assert len(collection.events_map) == 1
         assert collection.get_event_by_type("blank") == blank_event
+        assert callable(collection.get_adapter("blank"))
 
     def test_get_event_by_type_raises_error_when_event_is_not_registered(self):
         collection = EventsCollection()
 
         with pytest.raises(EventNotRegisteredError):
             collection.get_event_by_type("invalid_event")
+
+    def test_get_adapter_raises_error_when_event_is_not_registered(self):
+        collection = EventsCollection()
+
+        with pytest.raises(EventNotRegisteredError):
+            collection.get_adapter("invalid_event")
+
+
+def test_known_keys_of_api_events_are_slots():
+    event = APIAdapter.build({"t": "ue", "nick": "Admin", "id": 1, "vip": True})
+    message = APIAdapter.build({"t": "m", "ts": 1, "m": "Hi", "to": ["Admin"]})
+
+    assert event._extra is None
+    assert event.nick == "Admin"
+    assert event.vip is True
+    assert message._extra is None
+    assert message.to == ["Admin"]
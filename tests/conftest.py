@@ -0,0 +1,126 @@
+import asyncio
+from collections import defaultdict
+
+import pytest
+
+from chatovod.core.errors import ConnectionReset
+
+
+class FakeHTTPClient:
+    """Serve canned data in place of `HTTPClient`, recording the requests.
+
+    The errors queued in ``errors`` by request name, e.g. ``"session"``,
+    are raised by the next requests of that name.
+    """
+
+    def __init__(self):
+        self.window_id = 0
+        # Names of the requests made, in order
+        self.requests = []
+        self.errors = defaultdict(list)
+        # Requests running at the same time
+        self.running = 0
+        self.max_running = 0
+        # Events returned by each bind, the bind after the last batch fails
+        self.batches = []
+        self.info = [{"t": "so", "k": "wid", "v": 7}]
+        self.bans = {"bans": []}
+        # Every room has the messages 1 to history_size
+        self.history_size = 10
+        # Whether the pages include the message sent at ``before``
+        self.inclusive = False
+        # The room and ``before`` of each page of messages requested
+        self.pages = []
+        # The room and the messages of each delete
+        self.deleted = []
+
+    async def _request(self, name, delay=0):
+        self.requests.append(name)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.running -= 1
+
+        errors = self.errors[name]
+
+        if errors:
+            raise errors.pop(0)
+
+    async def fetch_session(self):
+        await self._request("session")
+
+    async def fetch_info(self):
+        await self._request("info")
+        return self.info
+
+    async def fetch_bans(self):
+        await self._request("bans")
+        return self.bans
+
+    def chat_bind(self):
+        # Recorded when the bind is sent, before it is awaited
+        self.requests.append("bind")
+        return self._bind()
+
+    async def _bind(self):
+        await asyncio.sleep(0)
+
+        if not self.batches:
+            raise ConnectionReset
+
+        return self.batches.pop(0)
+
+    async def stream_chat_bind(self):
+        for data in await self.chat_bind():
+            await asyncio.sleep(0)
+            yield data
+
+    async def fetch_messages(self, room_id, before=None, limit=None):
+        self.pages.append((room_id, before))
+        await self._request("messages")
+
+        end = self.history_size + 1 if before is None else before + self.inclusive
+        start = max(1, end - limit)
+        page = [
+            {"t": "m", "ts": timestamp, "f": "Admin", "m": "Hi", "r": room_id}
+            for timestamp in range(start, end)
+        ]
+        page.append({"t": "hoe", "r": room_id, "hasOlderEvents": start > 1})
+
+        return page
+
+    async def delete_messages(self, room_id, messages):
+        await self._request("delete", delay=0.001)
+        self.deleted.append((room_id, messages))
+
+
+class FakeChat:
+    """The parts of `Chat` used by the tasks running alongside it."""
+
+    def __init__(self, loop, http):
+        self.loop = loop
+        self._http = http
+        self._event_handler = None
+        self._event_listener = None
+        self._last_event_ts = None
+        self._messages_to_delete = []
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def fake_http():
+    return FakeHTTPClient()
+
+
+@pytest.fixture
+def fake_chat(loop, fake_http):
+    return FakeChat(loop, fake_http)
@@ -0,0 +1,70 @@
+import pytest
+
+from chatovod.core.backfill import HistoryLoader
+from chatovod.core.chat import Chat
+from chatovod.core.history import HistoryStore
+
+
+def create_loader(loop, http, **kwargs):
+    chat = Chat(client=None, user=None, http=http, loop=loop)
+
+    return HistoryLoader(chat, **kwargs)
+
+
+def ids(loop, messages):
+    async def iterate():
+        return [message.id async for message in messages]
+
+    return loop.run_until_complete(iterate())
+
+
+def test_pages_until_there_are_no_older_events(loop, fake_http):
+    http = fake_http
+    loader = create_loader(loop, http, page_size=4)
+
+    assert ids(loop, loader.load(1)) == list(range(10, 0, -1))
+    assert http.pages == [(1, None), (1, 7), (1, 3)]
+    assert loader.chat._has_older_events[1] is False
+
+    # The latest page is fetched again, only the flag of the last page stops paging
+    assert ids(loop, loader.load(1)) == list(range(10, 0, -1))
+    assert http.pages[3] == (1, None)
+
+
+def test_inclusive_pages_are_not_duplicated(loop, fake_http):
+    http = fake_http
+    http.inclusive = True
+    loader = create_loader(loop, http, page_size=4)
+
+    assert ids(loop, loader.load(1)) == list(range(10, 0, -1))
+    assert http.pages == [(1, None), (1, 7), (1, 4)]
+
+
+def test_loaded_messages_keep_the_history_ordered(loop, fake_http):
+    loader = create_loader(loop, fake_http, page_size=4)
+    loader.chat._history = HistoryStore(loader.chat)
+
+    ids(loop, loader.load(1))
+
+    assert [message.id for message in loader.chat._history] == list(range(1, 11))
+    assert loader.chat._history._ordered
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected", [({"limit": 3}, [10, 9, 8]), ({"since": 8}, [10, 9, 8])]
+)
+def test_stop_conditions(loop, fake_http, kwargs, expected):
+    loader = create_loader(loop, fake_http, page_size=2)
+
+    assert ids(loop, loader.load(1, **kwargs)) == expected
+    assert len(fake_http.pages) == 2
+
+
+def test_rooms_are_loaded_concurrently(loop, fake_http):
+    http = fake_http
+    loader = create_loader(loop, http, concurrency=2, page_size=3)
+
+    messages = ids(loop, loader.load_rooms([1, 2, 3, 4]))
+
+    assert sorted(messages) == sorted(list(range(1, 11)) * 4)
+    assert http.max_running == 2
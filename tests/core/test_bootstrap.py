@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from chatovod.core.bootstrap import BootstrapPlanner
+from chatovod.core.chat import Chat
+from chatovod.core.options import ClientOptions
+
+
+def create_step(log, name, delay=0.05, error=None):
+    async def run():
+        log.append("start " + name)
+        await asyncio.sleep(delay)
+        log.append("end " + name)
+
+        if error is not None:
+            raise error
+
+        return name.upper()
+
+    return run
+
+
+def test_independent_steps_run_concurrently(loop):
+    log = []
+    planner = BootstrapPlanner(loop)
+    planner.add("session", create_step(log, "session"))
+    planner.add("info", create_step(log, "info"), requires=("session",))
+    planner.add("rooms", create_step(log, "rooms"), requires=("session",))
+
+    results = loop.run_until_complete(planner.run())
+
+    assert results == {"session": "SESSION", "info": "INFO", "rooms": "ROOMS"}
+    assert log[:2] == ["start session", "end session"]
+    assert sorted(log[2:4]) == ["start info", "start rooms"]
+    assert set(planner.timings) == {"session", "info", "rooms", "total"}
+    # About the time of two steps instead of three
+    assert planner.timings["total"] < 0.15
+
+
+def test_optional_steps_may_fail(loop):
+    planner = BootstrapPlanner(loop)
+    planner.add("session", create_step([], "session"))
+    planner.add("bans", create_step([], "bans", error=ValueError), optional=True)
+
+    results = loop.run_until_complete(planner.run())
+
+    assert results == {"session": "SESSION", "bans": None}
+
+
+def test_required_steps_stop_the_bootstrap(loop):
+    log = []
+    planner = BootstrapPlanner(loop)
+    planner.add("session", create_step(log, "session", error=ValueError))
+    planner.add("info", create_step(log, "info"), requires=("session",))
+    planner.add("slow", create_step(log, "slow", delay=1))
+
+    with pytest.raises(ValueError):
+        loop.run_until_complete(planner.run())
+
+    assert "start info" not in log
+    assert "end slow" not in log
+    assert "total" in planner.timings
+
+
+def test_requirements_must_be_added_first(loop):
+    planner = BootstrapPlanner(loop)
+
+    with pytest.raises(ValueError):
+        planner.add("info", create_step([], "info"), requires=("session",))
+
+
+def create_chat(loop, http):
+    options = ClientOptions(prefetch=("bans",))
+    return Chat(client=None, user=None, http=http, loop=loop, options=options)
+
+
+def test_chat_keeps_the_prefetched_results(loop, fake_http):
+    chat = create_chat(loop, fake_http)
+
+    loop.run_until_complete(chat._start())
+    loop.run_until_complete(chat._deleter.close())
+
+    assert chat._http.window_id == 7
+    assert chat._pop_prefetched("bans") == {"bans": []}
+    assert chat._pop_prefetched("bans") is None
+    assert chat._pop_prefetched("rooms") is None
+
+
+def test_chat_times_failed_bootstraps(loop, fake_http):
+    fake_http.errors["info"] = [ValueError]
+    chat = create_chat(loop, fake_http)
+
+    with pytest.raises(ValueError):
+        loop.run_until_complete(chat._start())
+
+    assert {"session", "info", "total"} <= set(chat.bootstrap_timings)
@@ -0,0 +1,104 @@
+import pytest
+
+from chatovod.core.broadcast import EventBroadcaster
+from chatovod.core.dispatch import EventDispatcher
+
+
+@pytest.fixture
+def broadcaster(loop):
+    return EventBroadcaster(loop, EventDispatcher(None, loop=loop))
+
+
+def collect(loop, subscription):
+    async def iterate():
+        return [event async for event in subscription]
+
+    subscription.close()
+
+    return loop.run_until_complete(iterate())
+
+
+def test_every_subscription_receives_the_events(loop, broadcaster):
+    first = broadcaster.subscribe()
+    second = broadcaster.subscribe()
+
+    broadcaster.publish({"t": "m", "f": "Admin", "m": "Hi", "r": 0})
+
+    expected = [{"t": "message", "author": "Admin", "content": "Hi", "room_id": 0}]
+    assert collect(loop, first) == expected
+    assert collect(loop, second) == expected
+    assert broadcaster.subscriptions == []
+
+
+def test_filter_by_type_and_room(loop, broadcaster):
+    subscription = broadcaster.subscribe(types=["message", "ue"], rooms=[1])
+
+    broadcaster.publish({"t": "m", "m": "Hi", "r": 0})
+    broadcaster.publish({"t": "m", "m": "Hello", "r": 1})
+    broadcaster.publish({"t": "ue", "nick": "Admin", "r": 1})
+    broadcaster.publish({"t": "ru", "r": 1})
+
+    events = collect(loop, subscription)
+
+    assert [event["t"] for event in events] == ["message", "user_enter"]
+    assert events[0]["content"] == "Hello"
+
+
+def test_events_go_through_the_middleware(loop, broadcaster):
+    def drop_spam(event):
+        return None if event["content"] == "Spam" else event
+
+    broadcaster.dispatcher.middleware.add(drop_spam)
+    subscription = broadcaster.subscribe()
+
+    broadcaster.publish({"t": "m", "m": "Spam", "r": 0})
+    broadcaster.publish({"t": "m", "m": "Hi", "r": 0})
+
+    events = collect(loop, subscription)
+
+    assert [event["content"] for event in events] == ["Hi"]
+    assert broadcaster.dispatcher.middleware.dropped == {"drop_spam": 1}
+
+
+def test_types_extend_the_dispatcher_subscriptions(broadcaster):
+    broadcaster.dispatcher.subscribe("m")
+    broadcaster.subscribe(types=["message_read"])
+
+    assert broadcaster.dispatcher.subscribed({"t": "pmr"})
+
+
+def test_full_buffers_drop_the_newest_events(loop, broadcaster):
+    slow = broadcaster.subscribe(maxsize=1)
+    fast = broadcaster.subscribe()
+
+    for index in range(3):
+        broadcaster.publish({"t": "m", "m": str(index)})
+
+    assert [event["content"] for event in collect(loop, slow)] == ["0"]
+    assert len(collect(loop, fast)) == 3
+    assert slow.overflowed == 2
+
+
+def test_async_with_closes_the_subscription(loop, broadcaster):
+    async def subscribe():
+        async with broadcaster.subscribe() as subscription:
+            assert broadcaster.subscriptions == [subscription]
+
+    loop.run_until_complete(subscribe())
+
+    assert broadcaster.subscriptions == []
+
+
+def test_drop_oldest_drops_droppable_events_first(loop, broadcaster):
+    subscription = broadcaster.subscribe(maxsize=2, policy="drop_oldest")
+
+    for data in ({"t": "pmr"}, {"t": "m", "m": "0"}, {"t": "m", "m": "1"}):
+        broadcaster.publish(data)
+
+    broadcaster.publish({"t": "m", "m": "2"})
+
+    events = collect(loop, subscription)
+
+    assert [event["content"] for event in events] == ["0", "1"]
+    assert subscription.overflowed == 1
+    assert subscription.queue.stats.dropped == {"pmr": 1}
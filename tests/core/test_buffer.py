@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from chatovod.core.buffer import EventQueue
+
+
+def drain(queue):
+    events = []
+
+    while len(queue):
+        events.append(queue.get_nowait())
+
+    return events
+
+
+def test_unknown_policy(loop):
+    with pytest.raises(ValueError):
+        EventQueue(loop=loop, policy="ignore")
+
+
+def test_events_keep_their_order(loop):
+    queue = EventQueue(loop=loop)
+
+    for index in range(5):
+        queue.put_nowait({"t": "m", "m": index})
+
+    assert [data["m"] for data in drain(queue)] == list(range(5))
+    assert queue.stats.high_water == 5
+
+
+def test_block_waits_for_free_space(loop):
+    queue = EventQueue(loop=loop, maxsize=2)
+    taken = []
+
+    async def produce():
+        for index in range(4):
+            await queue.put({"t": "m", "m": index})
+
+        queue.close()
+
+    async def consume():
+        while True:
+            data = await queue.get()
+
+            if data is None:
+                return
+
+            taken.append(data["m"])
+            assert len(queue) <= 2
+
+    async def run():
+        await asyncio.gather(produce(), consume())
+
+    loop.run_until_complete(run())
+
+    assert taken == [0, 1, 2, 3]
+    assert queue.stats.high_water == 2
+    assert queue.stats.blocked > 0
+
+
+def test_drop_oldest_keeps_critical_events(loop):
+    queue = EventQueue(loop=loop, maxsize=3, policy="drop_oldest")
+
+    queue.put_nowait({"t": "pmr", "r": 1})
+    queue.put_nowait({"t": "m", "m": 0})
+    queue.put_nowait({"t": "pmr", "r": 2})
+
+    assert queue.put_nowait({"t": "m", "m": 1})
+    assert queue.put_nowait({"t": "m", "m": 2})
+    # Only critical events are left, the next one has to wait
+    assert not queue.put_nowait({"t": "m", "m": 3})
+    # While message_read events are dropped right away
+    assert queue.put_nowait({"t": "pmr", "r": 3})
+
+    assert [data["m"] for data in drain(queue)] == [0, 1, 2]
+    assert queue.stats.dropped == {"pmr": 3}
+
+
+def test_coalesce_replaces_state_events(loop):
+    queue = EventQueue(loop=loop, maxsize=3, policy="coalesce")
+
+    queue.put_nowait({"t": "ru", "r": 1, "name": "first"})
+    queue.put_nowait({"t": "m", "m": 0})
+    queue.put_nowait({"t": "ru", "r": 2, "name": "other"})
+
+    assert queue.put_nowait({"t": "ru", "r": 1, "name": "latest"})
+    assert not queue.put_nowait({"t": "ru", "r": 3})
+
+    events = drain(queue)
+
+    assert events[0]["name"] == "latest"
+    assert events[1]["m"] == 0
+    assert queue.stats.coalesced == {"ru": 1}
+
+    # Taken events are not replaced anymore
+    queue.put_nowait({"t": "ru", "r": 1, "name": "new"})
+    assert len(queue) == 1
+
+
+def test_close_wakes_up_consumers(loop):
+    queue = EventQueue(loop=loop)
+
+    async def close_later():
+        await asyncio.sleep(0)
+        queue.close()
+
+    async def run():
+        return await asyncio.gather(queue.get(), close_later())
+
+    result, _ = loop.run_until_complete(run())
+
+    assert result is None
+
+
+@pytest.mark.parametrize("policy", ["block", "drop_oldest", "coalesce"])
+def test_taken_events_are_not_indexed(loop, policy):
+    queue = EventQueue(loop=loop, maxsize=10, policy=policy)
+
+    for index in range(1000):
+        queue.put_nowait({"t": "pmr", "m": index})
+        queue.put_nowait({"t": "ru", "r": index})
+        drain(queue)
+
+    assert len(queue) == 0
+    assert len(queue._droppable_boxes) == 0
+    assert queue._coalesced_boxes == {}
@@ -0,0 +1,81 @@
+from chatovod.core.cache import MessageCache, RoomMessages, message_size
+
+
+class FakeMessage:
+    def __init__(self, timestamp, content="Hi"):
+        self.id = timestamp
+        self.content = content
+
+
+def timestamps(messages):
+    return [message.id for message in messages]
+
+
+class TestRoomMessages:
+    def test_oldest_messages_are_evicted(self):
+        messages = RoomMessages(max_messages=3)
+
+        for timestamp in range(1, 6):
+            messages.add(FakeMessage(timestamp))
+
+        assert timestamps(messages) == [3, 4, 5]
+        assert messages.evicted == 2
+        assert messages.get(2) is None
+        assert messages.get(4).id == 4
+
+    def test_older_messages_are_inserted_in_order(self):
+        messages = RoomMessages(max_messages=4)
+
+        for timestamp in (10, 30, 20, 40, 5):
+            messages.add(FakeMessage(timestamp))
+
+        assert timestamps(messages) == [10, 20, 30, 40]
+        assert timestamps(messages.since(15)) == [20, 30, 40]
+
+    def test_same_timestamp_replaces_the_message(self):
+        messages = RoomMessages()
+        messages.add(FakeMessage(1, "first"))
+        messages.add(FakeMessage(1, "edited"))
+
+        assert len(messages) == 1
+        assert messages.get(1).content == "edited"
+        assert messages.size == message_size(messages.get(1))
+
+    def test_remove(self):
+        messages = RoomMessages(max_messages=3)
+
+        # Wrap around the ring buffer
+        for timestamp in range(1, 6):
+            messages.add(FakeMessage(timestamp))
+
+        assert messages.remove(4).id == 4
+        assert messages.remove(4) is None
+        assert timestamps(messages) == [3, 5]
+
+        messages.add(FakeMessage(6))
+
+        assert timestamps(messages) == [3, 5, 6]
+
+    def test_max_bytes(self):
+        size = message_size(FakeMessage(0, "x" * 100))
+        messages = RoomMessages(max_bytes=size * 2)
+
+        for timestamp in range(5):
+            messages.add(FakeMessage(timestamp, "x" * 100))
+
+        assert timestamps(messages) == [3, 4]
+        assert messages.size == size * 2
+
+
+def test_message_cache_keeps_rooms_apart():
+    cache = MessageCache(max_messages=2)
+    cache.add(0, FakeMessage(1))
+    cache.add(1, FakeMessage(1))
+    cache.add(1, FakeMessage(2))
+    cache.add(1, FakeMessage(3))
+
+    assert len(cache) == 3
+    assert cache.get(0, 1) is not None
+    assert cache.get(1, 1) is None
+    assert cache.get(2, 1) is None
+    assert cache.remove(1, 3).id == 3
@@ -0,0 +1,139 @@
+import asyncio
+from typing import NamedTuple
+
+import pytest
+
+from chatovod.core.coalesce import RequestCoalescer, request_key
+from chatovod.core.http import HTTPClient
+
+
+class TestRequestKey:
+    def test_dict_order_does_not_matter(self):
+        first = request_key("GET", "/", params={"a": 1, "b": 2})
+        second = request_key("GET", "/", params={"b": 2, "a": 1})
+
+        assert first == second
+
+    def test_list_order_matters(self):
+        first = request_key("POST", "/", data=[("nick", "a"), ("nick", "b")])
+        second = request_key("POST", "/", data=[("nick", "b"), ("nick", "a")])
+
+        assert first != second
+
+    def test_different_params(self):
+        first = request_key("GET", "/", params={"roomId": 1})
+        second = request_key("GET", "/", params={"roomId": 2})
+
+        assert first != second
+
+
+class TestRequestCoalescer:
+    def test_concurrent_calls_share_one_request(self, loop):
+        coalescer = RequestCoalescer(loop=loop)
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0)
+            return {"nick": "Admin"}
+
+        async def run():
+            return await asyncio.gather(
+                *[coalescer.run("key", fetch) for _ in range(5)]
+            )
+
+        results = loop.run_until_complete(run())
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert coalescer.misses == 1
+        assert coalescer.hits == 4
+        assert coalescer.in_flight == 0
+
+    def test_sequential_calls_are_not_shared(self, loop):
+        coalescer = RequestCoalescer(loop=loop)
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+
+        loop.run_until_complete(coalescer.run("key", fetch))
+        loop.run_until_complete(coalescer.run("key", fetch))
+
+        assert len(calls) == 2
+
+    def test_errors_are_shared(self, loop):
+        coalescer = RequestCoalescer(loop=loop)
+
+        async def fetch():
+            await asyncio.sleep(0)
+            raise ValueError
+
+        async def run():
+            return await asyncio.gather(
+                coalescer.run("key", fetch),
+                coalescer.run("key", fetch),
+                return_exceptions=True,
+            )
+
+        results = loop.run_until_complete(run())
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+    def test_cancelled_caller_does_not_cancel_the_others(self, loop):
+        coalescer = RequestCoalescer(loop=loop)
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return 1
+
+        async def run():
+            first = loop.create_task(coalescer.run("key", fetch))
+            second = loop.create_task(coalescer.run("key", fetch))
+            await asyncio.sleep(0)
+            first.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await first
+
+            return await second
+
+        assert loop.run_until_complete(run()) == 1
+
+
+class FakeRoute(NamedTuple):
+    method: str
+    url: str
+
+    @property
+    def path(self):
+        return self.url
+
+
+class TestHTTPClientCoalescing:
+    def test_only_idempotent_requests_are_coalesced(self, loop):
+        sent = []
+
+        async def send(session, route, priority, return_response=False, **kwargs):
+            sent.append(route.method)
+            await asyncio.sleep(0)
+
+        async def run():
+            http = HTTPClient(host="test.chatovod.com", loop=loop)
+            http._send = send
+
+            get = FakeRoute("GET", "/chat/load/rooms")
+            post = FakeRoute("POST", "/chat/send")
+
+            await asyncio.gather(
+                http.request(get),
+                http.request(get),
+                http.request(post, data={"msg": "Hi"}),
+                http.request(post, data={"msg": "Hi"}),
+            )
+            await http.close()
+
+        loop.run_until_complete(run())
+
+        assert sent.count("GET") == 1
+        assert sent.count("POST") == 2
@@ -0,0 +1,78 @@
+import time
+from http.cookies import SimpleCookie
+
+from yarl import URL
+
+from chatovod.core.cookies import CookieCache, VersionedCookieJar
+
+CHAT_URL = URL("https://test.chatovod.com")
+
+
+def set_cookie(cookie_jar, name, value):
+    cookie = SimpleCookie()
+    cookie[name] = value
+    cookie_jar.update_cookies(cookie, response_url=CHAT_URL)
+
+
+def test_values_are_cached_until_the_jar_changes(loop):
+    cookie_jar = VersionedCookieJar(loop=loop)
+    cache = CookieCache(cookie_jar)
+
+    assert cache.get(CHAT_URL, "csrf") is None
+
+    set_cookie(cookie_jar, "csrf", "first")
+
+    assert cache.get(CHAT_URL, "csrf") == "first"
+    assert cache.get(CHAT_URL, "csrf") == "first"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    set_cookie(cookie_jar, "csrf", "second")
+
+    assert cache.get(CHAT_URL, "csrf") == "second"
+
+    cookie_jar.clear()
+
+    assert cache.get(CHAT_URL, "csrf") is None
+    assert (cache.hits, cache.misses) == (1, 4)
+
+
+def test_expired_values_are_read_again(loop, monkeypatch):
+    cookie_jar = VersionedCookieJar(loop=loop)
+    cache = CookieCache(cookie_jar)
+    cookie = SimpleCookie()
+    cookie["ssid"] = "session"
+    cookie["ssid"]["max-age"] = "60"
+    cookie_jar.update_cookies(cookie, response_url=CHAT_URL)
+
+    assert cache.get(CHAT_URL, "ssid") == "session"
+    assert cache.get(CHAT_URL, "ssid") == "session"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+
+    # The jar didn't change, but the cookie expired
+    assert cache.get(CHAT_URL, "ssid") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_expirations_are_kept_by_domain(loop, monkeypatch):
+    cookie_jar = VersionedCookieJar(loop=loop)
+    cache = CookieCache(cookie_jar)
+    account_url = URL("https://account.chatovod.com")
+
+    set_cookie(cookie_jar, "csrf", "chat")
+    cookie = SimpleCookie()
+    cookie["csrf"] = "account"
+    cookie["csrf"]["max-age"] = "60"
+    cookie_jar.update_cookies(cookie, response_url=account_url)
+
+    assert cookie_jar.get_expiry(CHAT_URL, "csrf") is None
+    assert cache.get(CHAT_URL, "csrf") == "chat"
+    assert cache.get(account_url, "csrf") == "account"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+
+    # Only the cookie of the account expired
+    assert cache.get(CHAT_URL, "csrf") == "chat"
+    assert cache.get(account_url, "csrf") is None
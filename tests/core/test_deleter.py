@@ -0,0 +1,119 @@
+import asyncio
+
+from chatovod.core.deleter import DeferredDeleter
+from chatovod.core.errors import ConnectionReset, Forbidden
+
+
+class FakeRoom:
+    def __init__(self, room_id):
+        self.id = room_id
+
+
+class FakeMessage:
+    def __init__(self, room_id, message_id):
+        self.room = FakeRoom(room_id)
+        self.id = message_id
+
+
+def create_deleter(chat, **kwargs):
+    deleter = DeferredDeleter(chat, **kwargs)
+    deleter.retry_delay = 0
+
+    return deleter
+
+
+def queue(chat, deleter, messages):
+    for room_id, message_id in messages:
+        chat._messages_to_delete.append(FakeMessage(room_id, message_id))
+        deleter.notify()
+
+
+def test_flush_chunks_rooms_concurrently(loop, fake_chat):
+    chat = fake_chat
+    deleter = create_deleter(chat, chunk_size=2, concurrency=2)
+    queue(chat, deleter, [(room_id, index) for room_id in (1, 2) for index in range(3)])
+
+    loop.run_until_complete(deleter.flush())
+
+    assert sorted(chat._http.deleted) == [
+        (1, [0, 1]),
+        (1, [2]),
+        (2, [0, 1]),
+        (2, [2]),
+    ]
+    assert chat._http.max_running == 2
+    assert chat._messages_to_delete == []
+    assert deleter.stats.deleted == 6
+
+
+def test_failed_chunks_are_retried(loop, fake_chat):
+    chat = fake_chat
+    chat._http.errors["delete"] = [ConnectionReset, ConnectionReset]
+    deleter = create_deleter(chat)
+    queue(chat, deleter, [(1, 1)])
+
+    loop.run_until_complete(deleter.flush())
+
+    assert chat._http.deleted == [(1, [1])]
+    assert deleter.stats.as_dict() == {
+        "deleted": 1,
+        "requests": 3,
+        "retries": 2,
+        "failed": 0,
+    }
+
+
+def test_refused_chunks_are_not_retried(loop, fake_chat):
+    chat = fake_chat
+    chat._http.errors["delete"] = [Forbidden]
+    deleter = create_deleter(chat)
+    queue(chat, deleter, [(1, 1), (1, 2)])
+
+    loop.run_until_complete(deleter.flush())
+
+    assert chat._http.deleted == []
+    assert deleter.stats.failed == 2
+    assert deleter.stats.requests == 1
+
+
+def test_background_flush(loop, fake_chat):
+    chat = fake_chat
+    deleter = create_deleter(chat, interval=60, threshold=2)
+
+    async def run():
+        deleter.start()
+        queue(chat, deleter, [(1, 1)])
+        await asyncio.sleep(0.01)
+        # Below the threshold, waiting for the timer
+        assert chat._http.deleted == []
+
+        queue(chat, deleter, [(1, 2)])
+        await asyncio.sleep(0.01)
+        assert chat._http.deleted == [(1, [1, 2])]
+
+        queue(chat, deleter, [(2, 3)])
+        await deleter.close()
+
+    loop.run_until_complete(run())
+
+    assert chat._http.deleted[-1] == (2, [3])
+
+
+def test_close_finishes_the_flush_in_progress(loop, fake_chat):
+    chat = fake_chat
+    deleter = create_deleter(chat, threshold=5)
+
+    async def run():
+        deleter.start()
+        await asyncio.sleep(0)
+        queue(chat, deleter, [(1, index) for index in range(5)])
+        # The flush has taken the messages and is waiting for the request
+        while not chat._http.requests:
+            await asyncio.sleep(0)
+
+        await deleter.close()
+
+    loop.run_until_complete(run())
+
+    assert chat._http.deleted == [(1, [0, 1, 2, 3, 4])]
+    assert deleter.stats.deleted == 5
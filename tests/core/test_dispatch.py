@@ -0,0 +1,238 @@
+import asyncio
+
+import pytest
+
+from chatovod.api.event_adapter import EventsCollection, EventView
+from chatovod.core.dispatch import EventDispatcher
+
+events = EventsCollection()
+
+
+@events.register
+class FakeMessageEvent:
+    event_type = "m"
+    new_type = "message"
+    transforms = {"f": "author"}
+
+
+@events.register
+class FakeUserEnterEvent:
+    event_type = "ue"
+    new_type = "user_enter"
+    transforms = {"nick": "nickname"}
+
+
+@events.register
+class FakeMessageReadEvent:
+    event_type = "pmr"
+    new_type = "message_read"
+    transforms = {"r": "room_id"}
+
+
+@events.register
+class FakeErrorEvent:
+    event_type = "error"
+    transforms = {"et": "type"}
+
+
+class FakeHandler:
+    def __init__(self):
+        self.received = []
+
+    def parse_message(self, data):
+        self.received.append(data)
+
+    def parse_error(self, data):
+        self.received.append(data)
+
+
+@pytest.fixture
+def handler():
+    return FakeHandler()
+
+
+@pytest.fixture
+def dispatcher(handler):
+    return EventDispatcher(handler, events_collection=events)
+
+
+class TestEventDispatcher:
+    def test_table_is_built_from_the_handler(self, dispatcher, handler):
+        assert dispatcher.parsers == {
+            "m": handler.parse_message,
+            "error": handler.parse_error,
+        }
+        assert dispatcher.handlers == {}
+
+    def test_dispatch_adapts_the_event(self, dispatcher, handler):
+        dispatcher.dispatch({"t": "m", "f": "Admin"})
+        dispatcher.dispatch({"t": "error", "et": "auth"})
+
+        assert handler.received == [
+            {"t": "message", "author": "Admin"},
+            {"t": "error", "type": "auth"},
+        ]
+        assert dispatcher.counters == {"m": 1, "error": 1}
+
+    def test_unhandled_events_are_counted(self, dispatcher, caplog):
+        dispatcher.dispatch({"t": "ue", "nick": "Admin"})
+        dispatcher.dispatch({"t": "ue", "nick": "Fluffy"})
+        dispatcher.dispatch({"t": "new"})
+
+        assert dispatcher.unhandled == {"ue": 2, "new": 1}
+        # Warned only the first time
+        assert len(caplog.records) == 2
+
+    @pytest.mark.parametrize("event", ["ue", "user_enter"])
+    def test_register(self, dispatcher, event):
+        received = []
+        dispatcher.register(event, received.append)
+
+        dispatcher.dispatch({"t": "ue", "nick": "Admin"})
+
+        assert received == [{"t": "user_enter", "nickname": "Admin"}]
+
+    def test_register_unknown_event(self, dispatcher):
+        with pytest.raises(ValueError):
+            dispatcher.register("unknown", print)
+
+    def test_unregister(self, dispatcher):
+        received = []
+        dispatcher.register("message", received.append)
+        dispatcher.unregister("message", received.append)
+        dispatcher.dispatch({"t": "m", "f": "Admin"})
+
+        assert received == []
+        assert "m" not in dispatcher.handlers
+
+    def test_update_state_only_runs_the_parser(self, dispatcher, handler):
+        received = []
+        dispatcher.register("message", received.append)
+
+        dispatcher.update_state({"t": "m", "f": "Admin"})
+
+        assert handler.received == [{"t": "message", "author": "Admin"}]
+        assert received == []
+
+    def test_coroutine_handlers_are_run(self, loop, handler):
+        dispatcher = EventDispatcher(handler, events_collection=events, loop=loop)
+        received = []
+
+        async def on_message(data):
+            received.append(data)
+
+        dispatcher.register("m", on_message)
+        dispatcher.dispatch({"t": "m", "f": "Admin"})
+        loop.run_until_complete(asyncio.sleep(0))
+
+        assert received == [{"t": "message", "author": "Admin"}]
+
+    def test_view_dispatch_passes_views(self, handler):
+        dispatcher = EventDispatcher(
+            handler, events_collection=events, event_format="view"
+        )
+        data = {"t": "m", "f": "Admin"}
+        received = []
+        dispatcher.register("m", received.append)
+
+        dispatcher.dispatch(data)
+
+        view = received[0]
+        # The event is adapted once, for both the parser and the handlers
+        assert handler.received == [view]
+        assert handler.received[0] is view
+        assert isinstance(view, EventView)
+        assert view.raw is data
+        assert view == {"t": "message", "author": "Admin"}
+
+    def test_typed_dispatch_passes_events(self, handler):
+        dispatcher = EventDispatcher(
+            handler, events_collection=events, event_format="typed"
+        )
+        received = []
+        dispatcher.register("m", received.append)
+
+        dispatcher.dispatch({"t": "m", "f": "Admin"})
+
+        event = received[0]
+        assert isinstance(event, FakeMessageEvent)
+        assert event.author == "Admin"
+        assert handler.received[0] is event
+
+    def test_unknown_event_format(self, dispatcher):
+        with pytest.raises(ValueError):
+            dispatcher.event_format = "xml"
+
+    def test_dispatch_in_order_waits_for_coroutines(self, loop, dispatcher):
+        received = []
+
+        async def on_message(data):
+            await asyncio.sleep(0)
+            received.append(data["author"])
+
+        dispatcher.register("m", on_message)
+        loop.run_until_complete(dispatcher.dispatch_in_order({"t": "m", "f": "A"}))
+
+        assert received == ["A"]
+
+    def test_subscribe(self, dispatcher):
+        dispatcher.subscribe("user_enter")
+
+        assert dispatcher.subscribed({"t": "ue"})
+        # Events with a parser are always kept
+        assert dispatcher.subscribed({"t": "error"})
+        assert dispatcher.subscribed({"t": "m"})
+        assert not dispatcher.subscribed({"t": "pmr"})
+        assert not dispatcher.subscribed({"t": "md"})
+        assert dispatcher.skipped == {"pmr": 1, "md": 1}
+
+        dispatcher.subscribe()
+
+        assert dispatcher.subscribed({"t": "pmr"})
+
+    def test_register_extends_subscriptions(self, dispatcher):
+        dispatcher.subscribe("m")
+        dispatcher.register("message_read", print)
+
+        assert dispatcher.subscribed({"t": "pmr"})
+
+    def test_middleware(self, dispatcher, handler):
+        def shout(data):
+            return dict(data, author=data["author"].upper())
+
+        def drop_bots(data):
+            return None if data["author"] == "BOT" else data
+
+        received = []
+        dispatcher.register("m", received.append)
+        dispatcher.middleware.add(shout)
+        dispatcher.middleware.add(drop_bots, name="bots")
+
+        dispatcher.dispatch({"t": "m", "f": "Admin"})
+        dispatcher.dispatch({"t": "m", "f": "Bot"})
+
+        assert received == [{"t": "message", "author": "ADMIN"}]
+        # The state is kept from every event, as received
+        assert handler.received == [
+            {"t": "message", "author": "Admin"},
+            {"t": "message", "author": "Bot"},
+        ]
+        assert dispatcher.middleware.dropped == {"bots": 1}
+        assert dispatcher.middleware.histograms["shout"].count == 2
+
+    def test_middleware_sees_events_without_handlers(self, dispatcher, handler):
+        seen = []
+
+        def archive(data):
+            seen.append(data["t"])
+            return None
+
+        dispatcher.middleware.add(archive)
+
+        dispatcher.dispatch({"t": "m", "f": "Admin"})
+        dispatcher.dispatch({"t": "pmr", "r": 1})
+        dispatcher.dispatch({"t": "new"})
+
+        assert seen == ["message", "message_read"]
+        # Dropping doesn't keep the state from being updated
+        assert handler.received == [{"t": "message", "author": "Admin"}]
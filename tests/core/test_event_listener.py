@@ -0,0 +1,132 @@
+import pytest
+
+from chatovod.core.chat import EventListener, event_key
+from chatovod.core.errors import ConnectionReset
+
+
+class RecordingListener(EventListener):
+    def __init__(self, *args, log, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.log = log
+
+    def received_event(self, data):
+        self.log.append(data["t"])
+
+
+BATCHES = [[{"t": "m1"}, {"t": "m2"}], [{"t": "m3"}], [{"t": "m4"}, {"t": "m5"}]]
+
+
+def create_listener(chat, **kwargs):
+    # The binds are logged along with the events
+    log = chat._http.requests
+    chat._http.batches = list(BATCHES)
+
+    return RecordingListener(chat, log=log, **kwargs), log
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_listen(loop, fake_chat, streaming):
+    listener, log = create_listener(fake_chat, streaming=streaming)
+
+    loop.run_until_complete(listener.listen())
+
+    assert log == ["bind", "m1", "m2"]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_pipelined_events_keep_their_order(loop, fake_chat, streaming):
+    listener, log = create_listener(fake_chat, streaming=streaming, pipelined=True)
+
+    with pytest.raises(ConnectionReset):
+        loop.run_until_complete(listener.listen_forever())
+
+    events = [entry for entry in log if entry != "bind"]
+
+    # Every event received before the error is still handled
+    assert events == ["m1", "m2", "m3", "m4", "m5"]
+    assert log.count("bind") == len(BATCHES) + 1
+
+
+def test_pipelined_bind_does_not_wait_for_handlers(loop, fake_chat):
+    listener, log = create_listener(fake_chat, pipelined=True)
+
+    with pytest.raises(ConnectionReset):
+        loop.run_until_complete(listener.listen_forever())
+
+    # The second bind is sent before the events of the first one are handled
+    assert log.index("bind", 1) < log.index("m1")
+
+
+def test_handler_errors_stop_the_listener(loop, fake_chat):
+    listener, log = create_listener(fake_chat, pipelined=True)
+
+    def received_event(data):
+        raise ValueError
+
+    listener.received_event = received_event
+
+    with pytest.raises(ValueError):
+        loop.run_until_complete(listener.listen_forever())
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_replayed_events_are_dropped(loop, fake_chat, streaming):
+    batch = [{"t": "m", "ts": 1}, {"t": "m", "ts": 2}, {"t": "m", "ts": 3}]
+    fake_chat._http.batches = [batch, batch]
+    listener = EventListener(fake_chat, streaming=streaming)
+    listener.replayed_until = 2
+    listener.replayed = frozenset([event_key({"t": "m", "ts": 2})])
+
+    async def fetch():
+        return [data["ts"] async for data in listener._fetch_events()]
+
+    assert loop.run_until_complete(fetch()) == [3]
+    assert listener.duplicates == 2
+
+    # Only the first bind after a reconnect replays events
+    assert loop.run_until_complete(fetch()) == [1, 2, 3]
+    assert listener.replayed_until is None
+
+
+def test_new_events_of_the_replayed_millisecond_are_kept(loop, fake_chat):
+    batch = [{"t": "m", "ts": 2, "f": "ana"}, {"t": "m", "ts": 2, "f": "bob"}]
+    fake_chat._http.batches = [batch]
+    listener = EventListener(fake_chat)
+    listener.replayed_until = 2
+    listener.replayed = frozenset([event_key(batch[0])])
+
+    async def fetch():
+        return [data["f"] async for data in listener._fetch_events()]
+
+    assert loop.run_until_complete(fetch()) == ["bob"]
+    assert listener.duplicates == 1
+
+
+def test_room_workers_update_the_state_in_order(loop, fake_chat):
+    class StateHandler:
+        def __init__(self):
+            self.parsed = []
+
+        def parse_user_enter(self, data):
+            self.parsed.append(data["t"])
+
+        def parse_user_enter_room(self, data):
+            self.parsed.append(data["t"])
+
+    chat = fake_chat
+    chat._event_handler = StateHandler()
+    listener = EventListener(chat)
+    listener.use_room_workers()
+    handled = []
+    listener.dispatcher.register("uer", handled.append)
+
+    listener.received_event({"t": "ue", "nick": "Admin"})
+    listener.received_event({"t": "uer", "nick": "Admin", "r": 1})
+
+    # Parsed as received, while the handlers wait for their room worker
+    assert chat._event_handler.parsed == ["user_enter", "user_enter_room"]
+    assert handled == []
+
+    loop.run_until_complete(listener.room_workers.join())
+
+    assert [data["nick"] for data in handled] == ["Admin"]
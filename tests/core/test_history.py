@@ -0,0 +1,204 @@
+import pytest
+
+from chatovod.core.chat import Chat
+from chatovod.core.history import HistoryStore, InternTable
+from chatovod.core.options import ClientOptions
+from chatovod.structures.message import Message
+from chatovod.structures.room import Room
+
+
+class FakeRoom:
+    def __init__(self, room_id):
+        self.id = room_id
+
+
+class FakeChat:
+    def __init__(self, *room_ids):
+        self.rooms = {room_id: FakeRoom(room_id) for room_id in room_ids}
+
+    def _get_room(self, room_id):
+        return self.rooms.get(room_id)
+
+
+def create_message(chat, timestamp, room_id=0, **data):
+    data.setdefault("content", "Message {}".format(timestamp))
+    data.setdefault("author", "Admin")
+
+    return Message(
+        chat=chat, room=chat._get_room(room_id), data=dict(data, timestamp=timestamp)
+    )
+
+
+@pytest.fixture
+def chat():
+    return FakeChat(0, 1)
+
+
+def test_intern_table():
+    table = InternTable()
+
+    assert table.intern("Admin") == table.intern("Admin") == 0
+    assert table.intern("Fluffy") == 1
+    assert table.get_id("Nobody") is None
+    assert len(table) == 2
+
+
+def test_messages_are_materialized(chat):
+    store = HistoryStore(chat)
+    original = create_message(
+        chat, 10, room_id=1, content="Привет", to=["Fluffy"], nh=True, u=False, pp=True
+    )
+
+    store.append(original)
+    message = store[0]
+
+    for name in Message.__slots__:
+        assert getattr(message, name) == getattr(original, name)
+
+    assert store[-1].id == 10
+    with pytest.raises(IndexError):
+        store[1]
+
+
+def test_messages_without_author(chat):
+    store = HistoryStore(chat)
+    store.append(create_message(chat, 1, author=None))
+
+    assert store[0].author is None
+
+
+@pytest.mark.parametrize("timestamps", [[1, 2, 3, 4], [3, 1, 4, 2]])
+def test_lookups(chat, timestamps):
+    store = HistoryStore(chat)
+    store.extend(
+        create_message(chat, timestamp, room_id=timestamp % 2)
+        for timestamp in timestamps
+    )
+
+    assert store.get(1, 3).content == "Message 3"
+    assert store.get(0, 3) is None
+    assert store.get(5, 3) is None
+
+    ids = sorted(message.id for message in store.messages(room_id=0, since=2))
+    assert ids == [2, 4]
+    ids = sorted(message.id for message in store.messages(since=2, until=3))
+    assert ids == [2, 3]
+    assert list(store.messages(room_id=5)) == []
+
+
+def test_columns_are_smaller_than_objects(chat):
+    store = HistoryStore(chat)
+    store.extend(create_message(chat, timestamp) for timestamp in range(100))
+
+    assert len(store) == 100
+    assert store.nbytes < 100 * 50
+
+
+def test_insert_keeps_the_order(chat):
+    store = HistoryStore(chat)
+    store.extend(create_message(chat, timestamp) for timestamp in (5, 6, 9))
+    store.insert(
+        [
+            create_message(chat, 8, to=["Fluffy"]),
+            create_message(chat, 1, content="Первое"),
+            create_message(chat, 10),
+        ]
+    )
+
+    assert [message.id for message in store] == [1, 5, 6, 8, 9, 10]
+    assert store._ordered
+    assert store.get(0, 1).content == "Первое"
+    assert store.get(0, 8).to == ["Fluffy"]
+    assert store.get(0, 9).content == "Message 9"
+
+
+@pytest.mark.parametrize("timestamps", [[1, 2], [7, 8], [12, 13]])
+def test_insert_splices_pages_without_overlap(chat, timestamps):
+    store = HistoryStore(chat)
+    store.extend(create_message(chat, timestamp) for timestamp in (5, 6, 9, 10))
+    store.append(create_message(chat, 11, to=["Fluffy"]))
+    store.remove(0, 6)
+    store.insert(
+        create_message(chat, timestamp, to=["Admin"], content="Старое")
+        for timestamp in reversed(timestamps)
+    )
+
+    expected = sorted([5, 9, 10, 11] + timestamps)
+    assert [message.id for message in store] == expected
+    assert store._ordered
+    assert store.get(0, timestamps[0]).content == "Старое"
+    assert store.get(0, timestamps[1]).to == ["Admin"]
+    assert store.get(0, 9).content == "Message 9"
+    assert store.get(0, 11).to == ["Fluffy"]
+    assert store.get(0, 6) is None
+
+
+def test_remove(chat):
+    store = HistoryStore(chat)
+    store.extend(create_message(chat, timestamp, to=["Fluffy"]) for timestamp in (1, 2))
+    store.append(create_message(chat, 2, room_id=1))
+
+    assert store.remove(0, 2).id == 2
+    assert store.remove(0, 2) is None
+    assert [(message.id, message.room.id) for message in store] == [(1, 0), (2, 1)]
+    assert store[0].to == ["Fluffy"]
+    assert store[1].room.id == 1
+    assert store.get(0, 2) is None
+    assert [message.id for message in store.messages(room_id=0)] == [1]
+
+
+def test_removed_rows_are_compacted(chat):
+    store = HistoryStore(chat)
+    store.extend(create_message(chat, timestamp) for timestamp in range(8))
+
+    store.remove(0, 3)
+
+    # Only flagged until a quarter of the rows are removed
+    assert len(store) == 7
+    assert len(store._timestamps) == 8
+
+    store.remove(0, 5)
+    store.remove(0, 6)
+
+    assert len(store._timestamps) == len(store) == 5
+    assert [message.id for message in store] == [0, 1, 2, 4, 7]
+    assert store.get(0, 7).content == "Message 7"
+
+
+def test_max_messages(chat):
+    store = HistoryStore(chat, max_messages=8)
+    store.extend(create_message(chat, timestamp) for timestamp in range(9))
+
+    # Down to three quarters of the cap, keeping the latest messages
+    assert [message.id for message in store] == [3, 4, 5, 6, 7, 8]
+    assert store.dropped == 3
+    assert store.get(0, 3).content == "Message 3"
+
+
+def test_max_bytes(chat):
+    store = HistoryStore(chat, max_bytes=1000)
+
+    for timestamp in range(100):
+        store.append(create_message(chat, timestamp, content="x" * 20))
+        assert store.nbytes <= 1000
+
+    assert store[-1].id == 99
+    assert store.dropped == 100 - len(store)
+
+
+def test_deleted_messages_leave_the_chat_history(loop):
+    chat = Chat(
+        client=None,
+        user=None,
+        http=None,
+        loop=loop,
+        options=ClientOptions(keep_history=True),
+    )
+    dispatcher = chat._event_listener.dispatcher
+    chat._add_room(Room(data={"room_id": 1, "type": 0}))
+
+    dispatcher.dispatch({"t": "m", "ts": 10, "r": 1, "f": "Admin", "m": "Hi"})
+    dispatcher.dispatch({"t": "m", "ts": 11, "r": 1, "f": "Admin", "m": "Spam"})
+    dispatcher.dispatch({"t": "md", "ts": [11], "r": 1})
+
+    assert [message.content for message in chat._history] == ["Hi"]
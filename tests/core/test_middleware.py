@@ -0,0 +1,56 @@
+import pytest
+
+from chatovod.core.middleware import LatencyHistogram, MiddlewareChain
+
+
+def test_histogram_buckets():
+    histogram = LatencyHistogram(bounds=(0.1, 1.0))
+
+    for elapsed in (0.05, 0.1, 0.5, 2.0):
+        histogram.record(elapsed)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.max == 2.0
+    assert histogram.mean == pytest.approx(2.65 / 4)
+
+
+def test_stages_run_in_order():
+    chain = MiddlewareChain()
+    chain.add(lambda event: event + ["first"], name="first")
+    chain.add(lambda event: event + ["second"], name="second")
+
+    assert chain.run([]) == ["first", "second"]
+
+
+def test_dropping_stops_the_chain():
+    chain = MiddlewareChain()
+    chain.add(lambda event: None, name="drop")
+    chain.add(lambda event: event, name="never")
+
+    assert chain.run({}) is None
+    assert chain.histograms["never"].count == 0
+
+
+def test_stage_names_are_unique():
+    chain = MiddlewareChain()
+    chain.add(print)
+
+    with pytest.raises(ValueError):
+        chain.add(print)
+
+    chain.remove("print")
+
+    assert len(chain) == 0
+    assert chain.histograms == {}
+
+
+def test_failing_stages_are_skipped(caplog):
+    chain = MiddlewareChain()
+    chain.add(lambda event: event["missing"], name="broken")
+    chain.add(lambda event: dict(event, seen=True), name="next")
+
+    assert chain.run({}) == {"seen": True}
+    assert chain.errors == {"broken": 1}
+    assert chain.histograms["broken"].count == 1
+    assert "broken" in caplog.text
@@ -0,0 +1,33 @@
+import pytest
+
+from chatovod.core.chat import Chat
+from chatovod.core.options import ClientOptions, HTTPOptions
+
+
+def test_defaults():
+    options = ClientOptions(streaming=True)
+
+    assert options.streaming is True
+    assert options.queue_policy == "block"
+
+
+def test_unknown_options_are_rejected():
+    with pytest.raises(TypeError, match="pipeline, streamig"):
+        ClientOptions(streamig=True, pipeline=True)
+
+
+def test_http_options():
+    options = ClientOptions(json_decoder="json", pipelined=True)
+
+    assert options.http_options() == dict(HTTPOptions.defaults, json_decoder="json")
+    assert HTTPOptions(**options.http_options()).json_decoder == "json"
+
+
+def test_chat_is_configured_by_the_options(loop):
+    options = ClientOptions(max_messages=5, keep_history=True, pipelined=True)
+    chat = Chat(client=None, user=None, http=None, loop=loop, options=options)
+
+    assert chat._messages.max_messages == 5
+    assert chat._history is not None
+    assert chat._event_listener.pipelined is True
+    assert chat._event_listener.event_queue.maxsize == options.queue_size
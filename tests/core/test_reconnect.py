@@ -0,0 +1,159 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from chatovod.core.errors import ChatovodConnectionError, ConnectionReset
+from chatovod.core.reconnect import Reconnector
+
+INFO = [
+    {"t": "so", "k": "wid", "v": 7},
+    {"t": "ro", "r": 1},
+    {"t": "m", "ts": 100, "r": 1},
+    {"t": "m", "ts": 150, "r": 1, "f": "ana"},
+    {"t": "m", "ts": 150, "r": 1, "f": "bob"},
+    {"t": "m", "ts": 200, "r": 1},
+    {"t": "m", "ts": 300, "r": 1},
+]
+
+
+class FakeEventHandler:
+    def __init__(self, http):
+        self.http = http
+        self.reconciled = None
+
+    def reconcile(self, msg_stream):
+        self.reconciled = msg_stream
+
+    def parse_set_option(self, data):
+        if data["option"] == "wid":
+            self.http.window_id = data["value"]
+
+
+class FakeEventListener:
+    def __init__(self, failures):
+        self.failures = failures
+        self.received = []
+        self.replayed_until = None
+        self.replayed = frozenset()
+        # The first message of INFO at 150 was received before the gap
+        self.latest_keys = {(150, "m", 1, "ana", None)}
+
+    async def listen_forever(self):
+        await asyncio.sleep(0)
+
+        if self.failures:
+            raise self.failures.pop(0)
+
+        raise asyncio.CancelledError
+
+    def received_event(self, data):
+        self.received.append((data["ts"], data.get("f")))
+
+
+def create_reconnector(chat, errors=(), failures=(), **kwargs):
+    chat._http.info = INFO
+    chat._http.errors["session"] = list(errors)
+    chat._event_handler = FakeEventHandler(chat._http)
+    chat._event_listener = FakeEventListener(list(failures))
+    chat._last_event_ts = 150
+
+    return Reconnector(chat, base_delay=0, **kwargs)
+
+
+def test_reconnect_restores_the_window_id(loop, fake_chat):
+    chat = fake_chat
+    reconnector = create_reconnector(chat)
+
+    loop.run_until_complete(reconnector.reconnect())
+
+    assert chat._http.requests == ["session", "info"]
+    assert chat._http.window_id == 7
+    assert reconnector.stats.as_dict() == {
+        "reconnects": 1,
+        "attempts": 1,
+        "failed": 0,
+        "replayed": 3,
+    }
+    assert chat._event_handler.reconciled is INFO
+
+
+def test_reconnect_replays_events_after_the_last_one(loop, fake_chat):
+    chat = fake_chat
+    reconnector = create_reconnector(chat)
+
+    loop.run_until_complete(reconnector.reconnect())
+
+    # Including the message missed in the same millisecond as the last one
+    assert chat._event_listener.received == [(150, "bob"), (200, None), (300, None)]
+    assert chat._event_listener.replayed_until == 300
+    assert chat._event_listener.replayed == {(300, "m", 1, None, None)}
+
+
+def test_reconnect_without_events_received(loop, fake_chat):
+    chat = fake_chat
+    reconnector = create_reconnector(chat)
+    chat._last_event_ts = None
+
+    loop.run_until_complete(reconnector.reconnect())
+
+    assert chat._event_listener.received == []
+    assert chat._event_listener.replayed_until == 300
+
+
+def test_reconnect_retries(loop, fake_chat):
+    chat = fake_chat
+    reconnector = create_reconnector(
+        chat, errors=[ChatovodConnectionError, asyncio.TimeoutError]
+    )
+
+    loop.run_until_complete(reconnector.reconnect())
+
+    assert chat._http.requests == ["session", "session", "session", "info"]
+    assert reconnector.stats.attempts == 3
+    assert reconnector.stats.failed == 2
+    assert reconnector.stats.reconnects == 1
+
+
+def test_reconnect_gives_up(loop, fake_chat):
+    reconnector = create_reconnector(
+        fake_chat, errors=[ConnectionReset] * 3, max_attempts=2
+    )
+
+    with pytest.raises(ConnectionReset):
+        loop.run_until_complete(reconnector.reconnect())
+
+    assert reconnector.stats.failed == 2
+    assert reconnector.stats.reconnects == 0
+
+
+def test_max_attempts_must_allow_an_attempt(fake_chat):
+    with pytest.raises(ValueError):
+        Reconnector(fake_chat, max_attempts=0)
+
+
+def test_delay_is_jittered_and_capped(fake_chat):
+    reconnector = Reconnector(fake_chat, base_delay=1, max_delay=10)
+
+    delays = [reconnector.delay(attempt) for attempt in range(10)]
+
+    assert all(
+        0 <= delay <= min(10, 2**attempt) for attempt, delay in enumerate(delays)
+    )
+
+
+def test_listen_forever_reconnects(loop, fake_chat):
+    reconnector = create_reconnector(
+        fake_chat,
+        failures=[
+            ConnectionReset,
+            ChatovodConnectionError,
+            aiohttp.ServerDisconnectedError(),
+            asyncio.TimeoutError,
+        ],
+    )
+
+    with pytest.raises(asyncio.CancelledError):
+        loop.run_until_complete(reconnector.listen_forever())
+
+    assert reconnector.stats.reconnects == 4
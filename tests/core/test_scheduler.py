@@ -0,0 +1,128 @@
+import asyncio
+
+from chatovod.core.http import HTTPClient
+from chatovod.core.scheduler import Priority, RequestScheduler, TokenBucket
+
+
+class TestTokenBucket:
+    def test_starts_full(self):
+        bucket = TokenBucket(rate=2, capacity=3)
+
+        assert bucket.tokens == 3
+
+    def test_refill_is_capped(self):
+        bucket = TokenBucket(rate=2, capacity=3)
+        bucket.consume()
+        bucket.consume()
+
+        assert bucket.has_token(now=0.0)
+        assert bucket.delay(now=0.0) == 0.0
+        bucket.consume()
+
+        assert not bucket.has_token(now=0.0)
+        assert bucket.delay(now=0.0) == 0.5
+        assert bucket.has_token(now=0.5)
+
+        bucket._refill(now=100.0)
+        assert bucket.tokens == 3
+
+
+class TestRequestScheduler:
+    def test_sends_immediately_while_there_are_tokens(self, loop):
+        scheduler = RequestScheduler(loop=loop, rate=10, capacity=10)
+
+        async def run():
+            for _ in range(5):
+                await scheduler.wait("/chat/send")
+
+        loop.run_until_complete(run())
+
+        stats = scheduler.stats[Priority.chat]
+        assert stats.sent == 5
+        assert stats.queued == 0
+        assert scheduler.queue_depth == 0
+
+    def test_queued_requests_are_sent_by_priority(self, loop):
+        scheduler = RequestScheduler(loop=loop, rate=100, capacity=1)
+        order = []
+
+        async def request(name, priority):
+            await scheduler.wait(name, priority)
+            order.append(name)
+
+        async def run():
+            # Takes the only token, everything else has to queue
+            await scheduler.wait("/chat/start")
+
+            tasks = [
+                loop.create_task(request("read", Priority.housekeeping)),
+                loop.create_task(request("send", Priority.chat)),
+                loop.create_task(request("ban", Priority.moderation)),
+            ]
+            await asyncio.sleep(0)
+
+            assert scheduler.queue_depth == 3
+            assert scheduler.queue_depth_of(Priority.chat) == 1
+
+            await asyncio.gather(*tasks)
+
+        loop.run_until_complete(run())
+
+        assert order == ["ban", "send", "read"]
+        assert scheduler.stats[Priority.housekeeping].queued == 1
+        assert scheduler.stats[Priority.housekeeping].max_wait_time > 0
+
+    def test_routes_have_their_own_buckets(self, loop):
+        scheduler = RequestScheduler(loop=loop, rate=100, capacity=100)
+        scheduler.set_limit("/chat/deleteMessages", rate=20, capacity=1)
+        order = []
+
+        async def request(name):
+            await scheduler.wait(name)
+            order.append(name)
+
+        async def run():
+            await asyncio.gather(
+                request("/chat/deleteMessages"),
+                request("/chat/deleteMessages"),
+                request("/chat/send"),
+            )
+
+        loop.run_until_complete(run())
+
+        # The second delete waits for its bucket without holding the send back
+        assert order == ["/chat/deleteMessages", "/chat/send", "/chat/deleteMessages"]
+
+    def test_cancelled_requests_leave_the_queue(self, loop):
+        scheduler = RequestScheduler(loop=loop, rate=100, capacity=1)
+
+        async def run():
+            await scheduler.wait("/chat/send")
+
+            task = loop.create_task(scheduler.wait("/chat/send"))
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.sleep(0)
+
+            assert scheduler.queue_depth == 0
+
+            await scheduler.wait("/chat/send")
+
+        loop.run_until_complete(run())
+
+        assert scheduler.stats[Priority.chat].sent == 2
+
+
+def test_http_client_only_paces_with_a_scheduler(loop):
+    async def run():
+        default = HTTPClient(host="test.chatovod.com", loop=loop)
+        scheduler = RequestScheduler(loop=loop)
+        paced = HTTPClient(host="test.chatovod.com", loop=loop, scheduler=scheduler)
+
+        assert default.scheduler is None
+        assert paced.scheduler is scheduler
+
+        await default.close()
+        await paced.close()
+
+    loop.run_until_complete(run())
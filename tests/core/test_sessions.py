@@ -0,0 +1,158 @@
+import os
+import stat
+from http.cookies import SimpleCookie
+
+import aiohttp
+import pytest
+from yarl import URL
+
+from chatovod.core.errors import ChatovodConnectionError
+from chatovod.core.http import HTTPClient
+from chatovod.core.sessions import (
+    FileSessionStore,
+    MemorySessionStore,
+    SessionStore,
+    dump_session,
+    is_session_valid,
+    load_session,
+)
+
+CHAT_URL = URL("https://test.chatovod.com")
+
+
+def set_cookie(cookie_jar, name, value, **attributes):
+    cookie = SimpleCookie()
+    cookie[name] = value
+
+    for attribute, attribute_value in attributes.items():
+        cookie[name][attribute] = attribute_value
+
+    cookie_jar.update_cookies(cookie, response_url=CHAT_URL)
+
+
+def test_round_trip(loop):
+    async def run():
+        cookie_jar = aiohttp.CookieJar()
+        set_cookie(cookie_jar, "csrf", "token")
+        set_cookie(cookie_jar, "ssid", "session", **{"max-age": "60"})
+        set_cookie(cookie_jar, "other", "ignored")
+
+        session = dump_session(cookie_jar, now=1000)
+
+        restored = aiohttp.CookieJar()
+        load_session(restored, session)
+
+        return session, restored.filter_cookies(CHAT_URL)
+
+    session, cookies = loop.run_until_complete(run())
+
+    assert sorted(cookie["name"] for cookie in session["cookies"]) == ["csrf", "ssid"]
+    assert {name: morsel.value for name, morsel in cookies.items()} == {
+        "csrf": "token",
+        "ssid": "session",
+    }
+    assert is_session_valid(session, max_age=3600, now=1030)
+    # The session ID expired
+    assert not is_session_valid(session, max_age=3600, now=1090)
+    # Too old
+    assert not is_session_valid(session, max_age=10, now=1030)
+
+
+def test_file_store(loop, tmp_path):
+    path = tmp_path / "sessions.json"
+    store = FileSessionStore(str(path))
+    session = {"saved_at": 0, "cookies": []}
+
+    async def run():
+        assert await store.load("key") is None
+        await store.save("key", session)
+        assert await store.load("key") == session
+        # The cookies give access to the account
+        assert stat.S_IMODE(os.stat(str(path)).st_mode) == 0o600
+        await store.clear("key")
+        return await store.load("key")
+
+    assert loop.run_until_complete(run()) is None
+
+
+def test_stores_implement_every_method():
+    class LoadOnlyStore(SessionStore):
+        async def load(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        LoadOnlyStore()
+
+
+class FakeLoginHTTPClient(HTTPClient):
+    def __init__(self, *args, server_session_id, signed_in=True, error=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.server_session_id = server_session_id
+        self.signed_in = signed_in
+        self.error = error
+        self.logins = 0
+
+    async def fetch_session(self):
+        if self.error is not None:
+            raise self.error
+
+        set_cookie(self._session.cookie_jar, "ssid", self.server_session_id)
+
+    async def fetch_info(self):
+        return [{"t": "so", "k": "signedIn", "v": self.signed_in}]
+
+    async def _login(self, email, password):
+        self.logins += 1
+        set_cookie(self._session.cookie_jar, "csrf", "token")
+        set_cookie(self._session.cookie_jar, "ssid", self.server_session_id)
+
+
+def login(loop, store, server_session_id, **kwargs):
+    async def run():
+        http = FakeLoginHTTPClient(
+            "test.chatovod.com",
+            loop=loop,
+            session_store=store,
+            server_session_id=server_session_id,
+            **kwargs
+        )
+
+        try:
+            await http.login("bot@example.com", "password")
+        finally:
+            await http.close()
+
+        return http.logins
+
+    return loop.run_until_complete(run())
+
+
+def test_login_reuses_the_saved_session(loop):
+    store = MemorySessionStore()
+
+    assert login(loop, store, server_session_id="first") == 1
+    assert login(loop, store, server_session_id="first") == 0
+
+
+def test_login_again_when_the_session_is_refused(loop):
+    store = MemorySessionStore()
+    login(loop, store, server_session_id="first")
+
+    assert login(loop, store, server_session_id="second") == 1
+    cookies = store.sessions["bot@example.com@test.chatovod.com"]["cookies"]
+    assert {cookie["name"]: cookie["value"] for cookie in cookies}["ssid"] == "second"
+
+
+def test_login_again_when_the_session_is_signed_out(loop):
+    store = MemorySessionStore()
+    login(loop, store, server_session_id="first")
+
+    assert login(loop, store, server_session_id="first", signed_in=False) == 1
+
+
+def test_login_again_when_the_session_can_not_be_checked(loop):
+    store = MemorySessionStore()
+    login(loop, store, server_session_id="first")
+
+    error = ChatovodConnectionError()
+    assert login(loop, store, server_session_id="first", error=error) == 1
@@ -0,0 +1,79 @@
+import gzip
+
+from chatovod.core.chat import Chat
+from chatovod.core.snapshot import (
+    read_snapshot,
+    restore_snapshot,
+    take_snapshot,
+    write_snapshot,
+)
+from chatovod.structures.room import Room
+from chatovod.structures.user import User
+
+
+def create_chat(loop):
+    return Chat(client=None, user=None, http=None, loop=loop)
+
+
+def test_round_trip(loop, tmp_path):
+    chat = create_chat(loop)
+    chat._add_room(Room(data={"room_id": 1, "type": 1, "name": "Общий"}))
+    chat._add_user(User(event={"nick": "Admin", "id": 7, "g": "admin", "vip": True}))
+    chat._event_listener.received_event({"t": "pmr", "ts": 1590000000000})
+
+    path = str(tmp_path / "chat.snapshot")
+    write_snapshot(take_snapshot(chat), path)
+
+    restored = create_chat(loop)
+    assert restore_snapshot(restored, read_snapshot(path))
+
+    room = restored._get_room(1)
+    assert (room.name, room.type.value) == ("Общий", 1)
+    user = restored._get_user("admin")
+    assert (user.id, user.group.value, user.vip) == ("7", "admin", True)
+    assert restored._get_user_by_id("7") is user
+    assert restored._last_event_ts == 1590000000000
+
+
+def test_missing_or_invalid_snapshots(tmp_path):
+    path = tmp_path / "chat.snapshot"
+
+    assert read_snapshot(str(path)) is None
+
+    path.write_bytes(b"not gzip")
+    assert read_snapshot(str(path)) is None
+
+    with gzip.open(str(path), "wb") as file:
+        file.write(b'{"version": 0}')
+    assert read_snapshot(str(path)) is None
+
+
+def test_incomplete_snapshots_are_ignored(loop):
+    chat = create_chat(loop)
+
+    assert restore_snapshot(chat, {"version": 2, "rooms": [{"type": 0}]}) is False
+    assert len(chat._rooms) == 0
+
+    # Keys missing from older snapshots
+    assert restore_snapshot(chat, {"version": 2})
+    assert chat._last_event_ts is None
+
+
+def test_chat_info_updates_the_restored_state(loop):
+    chat = create_chat(loop)
+    chat._add_room(Room(data={"room_id": 1, "type": 0}))
+    chat._add_room(Room(data={"room_id": 2, "type": 0}))
+    chat._add_user(User(event={"nick": "Gone"}))
+    restore_snapshot(chat, take_snapshot(chat))
+    room = chat._get_room(1)
+
+    info = [
+        {"t": "ro", "r": 1, "channelType": 0},
+        {"t": "ue", "nick": "Admin"},
+        {"t": "m", "r": 1, "ts": 100, "f": "Admin", "m": "Hi"},
+    ]
+    loop.run_until_complete(chat._event_handler.handle_start(info))
+
+    assert list(chat._rooms.values()) == [room]
+    assert [user.nickname for user in chat._users] == ["Admin"]
+    assert chat._get_message(1, 100).room is room
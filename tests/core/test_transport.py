@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+from chatovod.core.http import HTTPClient
+from chatovod.core.transport import TransportProfile, TransportStats
+
+
+def create_client(loop, **kwargs):
+    async def create():
+        return HTTPClient(host="test.chatovod.com", loop=loop, **kwargs)
+
+    return loop.run_until_complete(create())
+
+
+class TestHTTPClientTransport:
+    def test_default_profile(self, loop):
+        http = create_client(loop)
+
+        assert http.transport == TransportProfile()
+        assert http._session.connector.limit == TransportProfile().limit
+
+        loop.run_until_complete(http.close())
+
+    def test_profile_is_applied_to_the_pool(self, loop):
+        profile = TransportProfile(limit=8, limit_per_host=4)
+        http = create_client(loop, transport=profile)
+
+        assert http._session.connector.limit == 8
+        assert http._session.connector.limit_per_host == 4
+
+        loop.run_until_complete(http.close())
+
+    def test_bind_has_a_reserved_connection(self, loop):
+        http = create_client(loop)
+
+        assert http._bind_session is not http._session
+        assert http._bind_session.connector.limit == 1
+        assert http._bind_session.cookie_jar is http._session.cookie_jar
+
+        loop.run_until_complete(http.close())
+
+        assert http._session.closed
+        assert http._bind_session.closed
+
+    def test_bind_shares_the_pool_when_not_reserved(self, loop):
+        profile = TransportProfile(reserve_bind_connection=False)
+        http = create_client(loop, transport=profile)
+
+        assert http._bind_session is http._session
+
+        loop.run_until_complete(http.close())
+
+
+class TestTransportStats:
+    def test_pool_wait_is_recorded(self, loop):
+        stats = TransportStats()
+        trace_config = stats.create_trace_config()
+        context = SimpleNamespace()
+
+        async def trace():
+            for callback in trace_config.on_connection_queued_start:
+                await callback(None, context, None)
+            for callback in trace_config.on_connection_queued_end:
+                await callback(None, context, None)
+            for callback in trace_config.on_connection_reuseconn:
+                await callback(None, context, None)
+
+        loop.run_until_complete(trace())
+
+        assert stats.queued == 1
+        assert stats.queued_time >= 0
+        assert stats.max_queued_time == stats.queued_time
+        assert stats.reused == 1
+        assert stats.created == 0
+
+    def test_reset(self):
+        stats = TransportStats()
+        stats.queued = 3
+        stats.reset()
+
+        assert stats.as_dict() == {
+            "queued": 0,
+            "queued_time": 0.0,
+            "max_queued_time": 0.0,
+            "created": 0,
+            "reused": 0,
+        }
@@ -0,0 +1,89 @@
+from chatovod.core.chat import Chat
+from chatovod.core.users import UserRegistry, nickname_key
+from chatovod.structures.user import User
+
+
+def create_user(nickname, user_id=None):
+    return User(event={"nick": nickname, "id": user_id})
+
+
+def test_nickname_key():
+    assert nickname_key("ADMIN") is nickname_key("admin")
+    assert nickname_key("Straße") == nickname_key("STRASSE")
+
+
+class TestUserRegistry:
+    def test_lookups_ignore_the_case(self):
+        users = UserRegistry()
+        admin = create_user("Admin", 1)
+        users.add(admin)
+
+        assert users.get("aDMIN") is admin
+        assert "admin" in users
+        assert users.get_by_id("1") is admin
+        assert users.get("Fluffy") is None
+
+    def test_replaced_users_leave_the_id_index(self):
+        users = UserRegistry()
+        users.add(create_user("Admin", 1))
+        users.add(create_user("admin", 2))
+
+        assert len(users) == 1
+        assert users.get_by_id("1") is None
+        assert users.get_by_id("2").nickname == "admin"
+
+    def test_rooms(self):
+        users = UserRegistry()
+        admin = create_user("Admin")
+        users.add(admin)
+
+        users.enter_room("admin", 1)
+        users.enter_room("Admin", 2)
+        users.leave_room("ADMIN", 1)
+
+        assert users.in_room(1) == []
+        assert users.in_room(2) == [admin]
+        assert users.rooms_of("admin") == {2}
+
+        assert users.remove("Admin") is admin
+        assert users.in_room(2) == []
+        assert users.rooms_of("admin") == set()
+
+
+def test_user_events_update_the_chat(loop):
+    chat = Chat(client=None, user=None, http=None, loop=loop)
+    dispatcher = chat._event_listener.dispatcher
+
+    dispatcher.dispatch({"t": "ue", "nick": "Admin", "id": 7})
+    dispatcher.dispatch({"t": "uer", "nick": "admin", "r": 1})
+
+    assert chat._get_user("ADMIN").id == "7"
+    assert chat._get_user_by_id("7").nickname == "Admin"
+    assert chat._users.in_room(1) == [chat._get_user("admin")]
+
+    dispatcher.dispatch({"t": "ul", "nick": "Admin"})
+
+    assert chat._get_user("admin") is None
+    assert chat._users.in_room(1) == []
+
+
+def room_open(room_id):
+    return {"t": "ro", "r": room_id, "channelType": 0}
+
+
+def test_reconcile_merges_the_chat_info(loop):
+    chat = Chat(client=None, user=None, http=None, loop=loop)
+    handler = chat._event_handler
+    handler.reconcile([room_open(1), room_open(2)])
+    handler.parse_user_enter({"t": "ue", "nick": "Admin", "id": 7})
+    handler.parse_user_enter({"t": "ue", "nick": "Gone", "id": 8})
+    room = chat._get_room(1)
+
+    handler.reconcile(
+        [room_open(1), room_open(3), {"t": "ue", "nick": "admin", "id": 7}]
+    )
+
+    # Known rooms are kept as they are
+    assert chat._get_room(1) is room
+    assert list(chat._rooms) == [1, 3]
+    assert [user.nickname for user in chat._users] == ["admin"]
@@ -0,0 +1,117 @@
+import asyncio
+
+from chatovod.core.workers import RoomWorkers
+
+
+class SlowHandler:
+    def __init__(self, slow_rooms=()):
+        self.slow_rooms = slow_rooms
+        self.handled = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, data):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+
+        delay = 0.01 if data.get("r") in self.slow_rooms else 0
+        await asyncio.sleep(delay)
+
+        self.running -= 1
+        self.handled.append(data["m"])
+
+
+def run(loop, workers, events):
+    async def submit_and_join():
+        for data in events:
+            workers.submit(data)
+
+        await workers.join()
+
+    loop.run_until_complete(submit_and_join())
+
+
+class TestRoomWorkers:
+    def test_order_is_kept_within_a_room(self, loop):
+        handler = SlowHandler()
+        workers = RoomWorkers(loop=loop, handle=handler)
+        events = [{"r": index % 3, "m": index} for index in range(30)]
+
+        run(loop, workers, events)
+
+        for room_id in range(3):
+            handled = [index for index in handler.handled if index % 3 == room_id]
+            assert handled == sorted(handled)
+
+        assert sorted(handler.handled) == list(range(30))
+
+    def test_slow_room_does_not_hold_back_the_others(self, loop):
+        handler = SlowHandler(slow_rooms=(0,))
+        workers = RoomWorkers(loop=loop, handle=handler)
+        events = [{"r": 0, "m": "slow"}, {"r": 1, "m": "fast"}]
+
+        run(loop, workers, events)
+
+        assert handler.handled == ["fast", "slow"]
+
+    def test_concurrency_is_bounded(self, loop):
+        handler = SlowHandler(slow_rooms=range(10))
+        workers = RoomWorkers(loop=loop, handle=handler, concurrency=3)
+        events = [{"r": index, "m": index} for index in range(10)]
+
+        run(loop, workers, events)
+
+        assert handler.max_running == 3
+        assert len(handler.handled) == 10
+
+    def test_events_without_room_share_a_worker(self, loop):
+        handler = SlowHandler()
+        workers = RoomWorkers(loop=loop, handle=handler)
+
+        async def submit():
+            workers.submit({"m": 1})
+            workers.submit({"m": 2})
+
+            assert workers.rooms == [None]
+            assert workers.pending == 2
+
+            await workers.join()
+
+        loop.run_until_complete(submit())
+
+        assert handler.handled == [1, 2]
+        assert workers.rooms == []
+
+    def test_errors_do_not_stop_the_room(self, loop):
+        handled = []
+
+        async def handle(data):
+            if data["m"] == 1:
+                raise ValueError
+
+            handled.append(data["m"])
+
+        workers = RoomWorkers(loop=loop, handle=handle)
+
+        run(loop, workers, [{"r": 0, "m": 1}, {"r": 0, "m": 2}])
+
+        assert handled == [2]
+
+    def test_wait_for_space(self, loop):
+        handler = SlowHandler(slow_rooms=(1,))
+        workers = RoomWorkers(loop=loop, handle=handler)
+        pending = []
+
+        async def submit():
+            for index in range(10):
+                await workers.wait_for_space(3)
+                workers.submit({"r": 1, "m": index})
+                pending.append(workers.pending)
+
+            await workers.join()
+
+        loop.run_until_complete(submit())
+
+        assert max(pending) == 3
+        assert workers.pending == 0
+        assert handler.handled == list(range(10))
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from chatovod.utils.decoders import JSON_DECODERS, get_json_decoder
+
+PAYLOAD = '[{"t": "m", "f": "Admin", "m": "Привет"}]'.encode("utf-8")
+
+
+def test_default_decoder_is_installed():
+    assert get_json_decoder() in JSON_DECODERS.values()
+
+
+def test_stdlib_decoder():
+    assert get_json_decoder("json") is json.loads
+
+
+@pytest.mark.parametrize("backend", sorted(JSON_DECODERS))
+def test_decoders_parse_bytes(backend):
+    decode = get_json_decoder(backend)
+
+    assert decode(PAYLOAD) == [{"t": "m", "f": "Admin", "m": "Привет"}]
+
+
+def test_custom_decoder():
+    def decode(data):
+        return data
+
+    assert get_json_decoder(decode) is decode
+
+
+def test_missing_decoder():
+    with pytest.raises(ValueError):
+        get_json_decoder("simdjson")
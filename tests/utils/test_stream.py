@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from chatovod.utils.stream import JSONArrayParser
+
+EVENTS = [
+    {"t": "m", "ts": 1590000000000, "f": "Admin", "m": "Привет", "r": 0},
+    {"t": "ue", "nick": "Fluffy"},
+    {"t": "md", "ts": [1590000000000, 1590000000001], "r": 0},
+]
+
+
+def feed_in_chunks(parser, data, size):
+    elements = []
+
+    for start in range(0, len(data), size):
+        elements.extend(parser.feed(data[start : start + size]))
+
+    return elements
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 4096])
+def test_elements_are_parsed_incrementally(size):
+    parser = JSONArrayParser()
+    data = json.dumps(EVENTS, ensure_ascii=False, indent=1).encode("utf-8")
+
+    elements = feed_in_chunks(parser, data, size)
+    elements.extend(parser.close())
+
+    assert parser.is_array
+    assert elements == EVENTS
+
+
+def test_elements_are_returned_as_soon_as_complete():
+    parser = JSONArrayParser()
+
+    assert parser.feed(b'[{"t": "ue"}, {"t": ') == [{"t": "ue"}]
+    assert parser.feed(b'"ul"}]') == [{"t": "ul"}]
+    assert parser.close() == []
+
+
+def test_numbers_wait_for_a_delimiter():
+    parser = JSONArrayParser()
+
+    assert parser.feed(b"[12") == []
+    assert parser.feed(b"34, 5") == [1234]
+    assert parser.feed(b"]") == [5]
+
+
+def test_empty_array():
+    parser = JSONArrayParser()
+
+    assert parser.feed(b" [ ") == []
+    assert parser.feed(b"] ") == []
+    assert parser.close() == []
+
+
+def test_document_that_is_not_an_array():
+    parser = JSONArrayParser()
+
+    assert parser.feed(b'{"t": "error",') == []
+    assert parser.feed(b' "et": "connection"}') == []
+    assert parser.is_array is False
+    assert parser.close() == {"t": "error", "et": "connection"}
+
+
+@pytest.mark.parametrize("data", [b"", b'[{"t": "m"}', b'[{"t": "m"} {"t": "m"}]'])
+def test_invalid_documents(data):
+    parser = JSONArrayParser()
+
+    with pytest.raises(json.JSONDecodeError):
+        parser.feed(data)
+        parser.close()
+
+
+def test_elements_ending_the_chunk_are_returned():
+    parser = JSONArrayParser()
+
+    assert parser.feed(b'[{"t": "ue", "nick": "a]b\\"c"}') == [
+        {"t": "ue", "nick": 'a]b"c'}
+    ]
+    assert parser.feed(b', ["x", {"y": [1]}]') == [["x", {"y": [1]}]]
+    assert parser.feed(b"]") == []
+    assert parser.close() == []
+
+
+def test_elements_are_decoded_with_loads():
+    decoded = []
+
+    def loads(data):
+        decoded.append(data)
+        return json.loads(data)
+
+    parser = JSONArrayParser(loads=loads)
+
+    assert parser.feed(b'[{"t": "ue"}, 5]') == [{"t": "ue"}, 5]
+    assert decoded == [b'{"t": "ue"}', b"5"]